@@ -0,0 +1,102 @@
+# coding: utf-8
+"""
+Memory and attribute access cost of components, compared with the previous implementation (values copied in the
+instance __dict__, attribute names resolved with a scan of mailup_pattern_fields)::
+
+    python benchmarks/components_benchmark.py [number_of_recipients]
+"""
+from __future__ import print_function
+
+import gc
+import sys
+import timeit
+
+from mailup.components import Recipient
+
+try:
+    import tracemalloc
+except ImportError:
+    # python 2: memory is not measured
+    tracemalloc = None
+
+
+class DictRecipient(object):
+    """
+    Recipient of the previous implementation
+    """
+    mailup_pattern_fields = Recipient.mailup_pattern_fields
+
+    def __init__(self, data_dict, client=None, logger=None, status=None):
+        self.status = status
+        self.client = client
+        self.logger = logger
+        self.data_dict = dict((key, value) for key, value in data_dict.items() if key in self.mailup_pattern_fields)
+
+    def __getattr__(self, name):
+        field_pattern_dict = self.mailup_pattern_fields
+        if name in field_pattern_dict.values():
+            key = list(field_pattern_dict.keys())[list(field_pattern_dict.values()).index(name)]
+            return object.__getattribute__(self, 'data_dict')[key]
+        return object.__getattribute__(self, name)
+
+    def __setattr__(self, name, value):
+        field_pattern_dict = self.mailup_pattern_fields
+        if name != 'data_dict':
+            data_dict = self.__dict__.get('data_dict')
+            if data_dict and name in field_pattern_dict.values():
+                key = list(field_pattern_dict.keys())[list(field_pattern_dict.values()).index(name)]
+                if key in data_dict:
+                    data_dict[key] = value
+        else:
+            for key, key_value in value.items():
+                if key in field_pattern_dict:
+                    setattr(self, field_pattern_dict[key], key_value)
+        object.__setattr__(self, name, value)
+
+
+def get_data_dict(index):
+    return {
+        'idRecipient': index,
+        'idList': 1,
+        'Email': 'recipient{}@example.com'.format(index),
+        'Name': 'Recipient {}'.format(index),
+        'Fields': [],
+    }
+
+
+def measure_memory(component_class, count):
+    """
+    :return: bytes allocated for each component, data_dict values excluded
+    """
+    data_dicts = [get_data_dict(index) for index in range(count)]
+    gc.collect()
+    tracemalloc.start()
+    components = [component_class(data_dict, status='subscribed') for data_dict in data_dicts]
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del components
+    return size / float(count)
+
+
+def measure_access(component_class, number=200000):
+    """
+    :return: microseconds for reading and for writing an attribute
+    """
+    component = component_class(get_data_dict(1), status='subscribed')
+    read = timeit.timeit(lambda: component.email, number=number)
+    write = timeit.timeit(lambda: setattr(component, 'name', 'John'), number=number)
+    return read / number * 1e6, write / number * 1e6
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    for component_class in (DictRecipient, Recipient):
+        read, write = measure_access(component_class)
+        line = '{:<14} read {:.3f} us, write {:.3f} us'.format(component_class.__name__, read, write)
+        if tracemalloc is not None:
+            line += ', {:.0f} bytes for each of {} components'.format(measure_memory(component_class, count), count)
+        print(line)
+
+
+if __name__ == '__main__':
+    main()
@@ -71,6 +71,8 @@ setup(
         # eg:
         #   'rst': ['docutils>=0.11'],
         #   ':python_version=="2.6"': ['argparse'],
+        ':python_version=="2.7"': ['futures'],
+        'async': ['aiohttp>=3.3'],
     },
     entry_points={
         'console_scripts': [
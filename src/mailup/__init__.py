@@ -1,10 +1,17 @@
 
 # module import
-import clients
-import components
-import logger
-import exceptions
-import providers
-import utils
+from mailup import batches
+from mailup import caches
+from mailup import clients
+from mailup import components
+from mailup import logger
+from mailup import exceptions
+from mailup import filters
+from mailup import limiters
+from mailup import providers
+from mailup import retries
+from mailup import tokens
+from mailup import transports
+from mailup import utils
 
 __version__ = "0.3.0"
@@ -127,7 +127,7 @@ class TestPymailupBase(unittest.TestCase):
         return '{} {}'.format(first.title(), last.title())
 
     def create_random_recipient(self):
-        from components import Recipient
+        from mailup.components import Recipient
 
         test_list = self.get_or_create_test_list()
 
@@ -0,0 +1,595 @@
+# coding: utf-8
+"""
+asyncio version of MailUpClient (Python >= 3.6, requires aiohttp: pip install pymailup[async])
+
+Every endpoint method of MailUpClient is available with the same signature and returns an awaitable::
+
+    async with AsyncMailUpClient(client_id, client_secret, username, password) as mailup_client:
+        lists = await mailup_client.read_lists()
+        async for data_dict in mailup_client.get_recipients(list_id, 'subscribed', stream=True):
+            ...
+"""
+
+import asyncio
+import base64
+import copy
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+try:
+    import aiohttp
+except ImportError:
+    aiohttp = None
+
+from mailup import exceptions
+from mailup.clients import MailUpClient
+from mailup.logger import LoggerSingleton
+
+
+class AsyncMailUpResponse(object):
+    """
+    Response of AsyncMailUpTransport, exposes the attributes of requests.Response used by the client
+    """
+
+    def __init__(self, status_code, content, reason=None, headers=None):
+        self.status_code = status_code
+        self.content = content
+        self.reason = reason
+        self.headers = headers or {}
+
+    @property
+    def text(self):
+        return self.content.decode('utf-8', 'replace')
+
+    def json(self):
+        return json.loads(self.text)
+
+    def __repr__(self):
+        return '<AsyncMailUpResponse [{}]>'.format(self.status_code)
+
+
+class AsyncMailUpTransport(object):
+    """
+    Connection-pooled aiohttp transport used by AsyncMailUpClient.
+
+    The aiohttp.ClientSession is created on first use, inside the running event loop, and rebuilt after a fork.
+    """
+
+    def __init__(
+        self, pool_maxsize=10, keep_alive=True, connect_timeout=None, read_timeout=None,
+    ):
+        if aiohttp is None:
+            raise ImportError('AsyncMailUpClient requires aiohttp: pip install pymailup[async]')
+
+        self.pool_maxsize = pool_maxsize
+        self.keep_alive = keep_alive
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+
+        self._session = None
+        self._pid = None
+
+    @property
+    def session(self):
+        pid = os.getpid()
+        if self._session is None or self._session.closed or self._pid != pid:
+            self._session = self.build_session()
+            self._pid = pid
+        return self._session
+
+    def build_session(self):
+        connector = aiohttp.TCPConnector(limit=self.pool_maxsize, force_close=not self.keep_alive)
+        return aiohttp.ClientSession(connector=connector)
+
+    def get_timeout(self, read_timeout=None):
+        read_timeout = read_timeout or self.read_timeout
+        return aiohttp.ClientTimeout(connect=self.connect_timeout or read_timeout, sock_read=read_timeout)
+
+    async def request(self, method, url, data=None, params=None, headers=None, cookies=None, timeout=None):
+        async with self.session.request(
+            method.upper(), url, data=data, params=self.get_params(params), headers=headers, cookies=cookies,
+            timeout=self.get_timeout(timeout),
+        ) as response:
+            content = await response.read()
+            return AsyncMailUpResponse(
+                status_code=response.status,
+                content=content,
+                reason=response.reason,
+                headers=response.headers,
+            )
+
+    @staticmethod
+    def get_params(params):
+        # aiohttp accepts only str, int and float values in querystring
+        if not params:
+            return None
+        return {
+            key: str(value).lower() if isinstance(value, bool) else value
+            for key, value in params.items() if value is not None
+        }
+
+    async def close(self):
+        if self._session is not None and not self._session.closed and self._pid == os.getpid():
+            await self._session.close()
+        self._session = None
+        self._pid = None
+
+
+class AsyncTokenLock(object):
+    """
+    Lock of the token state of an AsyncMailUpClient and, with a token_store, of all the processes using the same
+    account: the lock of the token store blocks, it is taken in the token store thread of the client
+    """
+
+    def __init__(self, client):
+        self.client = client
+
+    async def __aenter__(self):
+        await self.client.token_lock.acquire()
+        if self.client.token_store is None:
+            return
+        try:
+            await self.client.run_token_store(self.client.token_store.acquire_lock, self.client.token_store_key)
+        except asyncio.CancelledError:
+            # the lock is still taken by the token store thread: it is released right after
+            self.client.token_executor.submit(self.client.token_store.release_lock, self.client.token_store_key)
+            self.client.token_lock.release()
+            raise
+        except BaseException:
+            self.client.token_lock.release()
+            raise
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        try:
+            if self.client.token_store is not None:
+                await self.client.run_token_store(self.client.token_store.release_lock, self.client.token_store_key)
+        finally:
+            self.client.token_lock.release()
+
+
+class AsyncMailUpClient(MailUpClient):
+    """
+    MailUpClient for asyncio: calls, retries and pagination never block the event loop.
+
+    The access token is retrieved on the first call (or with "await client.retrieve_access_token()"), concurrent
+    tasks wait for a single token request.
+    """
+
+    def __init__(
+        self, client_id, client_secret, username, password, logger_enabled=False, transport=None, retry_policy=None,
+        rate_limiter=None, token_store=None, response_cache=None,
+    ):
+        # Init Logger
+        self.logger = LoggerSingleton()
+        if not logger_enabled:
+            self.logger.disabled = True
+
+        self.configuration['MAILUP_CLIENT_ID'] = client_id
+        self.configuration['MAILUP_CLIENT_SECRET'] = client_secret
+        self.configuration['MAILUP_USERNAME'] = username
+        self.configuration['MAILUP_PASSWORD'] = password
+
+        self.transport = transport or self.build_transport()
+        self.retry_policy = retry_policy or self.build_retry_policy()
+        self.rate_limiter = rate_limiter or self.build_rate_limiter()
+        self.token_store = token_store or self.build_token_store()
+        self.response_cache = response_cache or self.build_response_cache()
+        self.single_flight = dict() if self.configuration['MAILUP_COALESCE_REQUESTS'] else None
+
+        self.access_token = None
+        self.refreshed_token = None
+        self.token_expires_at = None
+        self._token_lock = None
+        self._token_executor = None
+
+    def build_transport(self):
+        return AsyncMailUpTransport(
+            pool_maxsize=self.configuration['MAILUP_POOL_MAXSIZE'],
+            keep_alive=self.configuration['MAILUP_KEEP_ALIVE'],
+            connect_timeout=self.configuration['MAILUP_CLIENT_CONNECT_TIMEOUT'],
+            read_timeout=self.configuration['MAILUP_CLIENT_TIMEOUT'],
+        )
+
+    async def close(self):
+        await self.transport.close()
+        if self._token_executor is not None:
+            self._token_executor.shutdown(wait=False)
+            self._token_executor = None
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        await self.close()
+
+    @property
+    def token_lock(self):
+        if self._token_lock is None:
+            self._token_lock = asyncio.Lock()
+        return self._token_lock
+
+    @property
+    def token_executor(self):
+        # token stores lock per thread: their lock, load and save always run in the same thread
+        if self._token_executor is None:
+            self._token_executor = ThreadPoolExecutor(max_workers=1)
+        return self._token_executor
+
+    async def run_token_store(self, function, *args):
+        if self.token_store is None:
+            return function(*args)
+        return await asyncio.get_event_loop().run_in_executor(self.token_executor, function, *args)
+
+    def lock_token(self):
+        """
+        Async context manager locking the token state of the client and, with a token_store, of all the processes
+        using the same account
+        """
+        return AsyncTokenLock(self)
+
+    # SUPPORT METHODS
+    def call_handler(
+        self, method, url, data=None, params=None, headers=None, cookies=None, attempts=None, timeout=None,
+        page_size=None, page_number=0, stream=False, parallel=None, retry_safe=False, cache=False, limit=None,
+        paginate=True, raise_errors=False,
+    ):
+        """
+        Awaitable version of MailUpClient.call_handler, with stream=True an async generator of "Items" is returned
+        """
+        if limit:
+            page_size = min(page_size or self.configuration_dict['MAILUP_DEFAULT_PAGE_SIZE'], limit)
+        kwargs = dict(
+            data=data, params=params, headers=headers, cookies=cookies, attempts=attempts, timeout=timeout,
+            page_size=page_size, page_number=page_number, parallel=parallel, retry_safe=retry_safe, limit=limit,
+            raise_errors=raise_errors,
+        )
+        if stream:
+            return self.iter_items(method, url, **kwargs)
+        return self._call_handler(method, url, cache=cache, paginate=paginate, **kwargs)
+
+    async def _call_handler(self, method, url, cache=False, **kwargs):
+        if method.upper() != 'GET':
+            return await self.read_response(method, url, **kwargs)
+
+        key = self.get_cache_key(
+            url, kwargs['params'], kwargs['page_size'], kwargs['page_number'], kwargs['limit'], kwargs['paginate'],
+        )
+        cache_key = None
+        if cache and self.response_cache is not None:
+            cache_key = key
+            mailup_response = self.response_cache.get(cache_key)
+            if mailup_response is not None:
+                return mailup_response
+
+        if self.single_flight is None:
+            return await self.read_response(method, url, cache_key=cache_key, **kwargs)
+
+        # concurrent tasks with the same GET await the same call
+        flight_key = (key, (kwargs['headers'] or {}).get('Authorization'))
+        task = self.single_flight.get(flight_key)
+        if task is None:
+            task = asyncio.ensure_future(self.read_response(method, url, cache_key=cache_key, **kwargs))
+            self.single_flight[flight_key] = task
+            task.add_done_callback(lambda done: self.single_flight.pop(flight_key, None))
+        # shielded: a cancelled caller does not cancel the call of the others
+        return copy.deepcopy(await asyncio.shield(task))
+
+    async def read_response(self, method, url, cache_key=None, limit=None, paginate=True, **kwargs):
+        mailup_response = None
+        pages = self.iter_pages(method, url, **kwargs)
+        try:
+            async for r_json in pages:
+                if mailup_response is None:
+                    mailup_response = r_json
+                else:
+                    mailup_response['Items'].extend(r_json['Items'])
+                if not paginate or (limit and self.truncate_items(mailup_response, limit)):
+                    break
+        finally:
+            await pages.aclose()
+
+        if self.response_cache is not None:
+            if cache_key is not None and mailup_response is not None:
+                self.response_cache.set(cache_key, self.get_cache_scope(url), mailup_response)
+            elif method.upper() != 'GET':
+                self.response_cache.invalidate(self.get_cache_scope(url))
+        return mailup_response
+
+    async def iter_pages(
+        self, method, url, data=None, params=None, headers=None, cookies=None, attempts=None, timeout=None,
+        page_size=None, page_number=0, parallel=None, retry_safe=False, raise_errors=False,
+    ):
+        page_size = page_size or self.configuration_dict['MAILUP_DEFAULT_PAGE_SIZE']
+        if parallel is None:
+            parallel = self.configuration_dict['MAILUP_PARALLEL_PAGINATION']
+
+        # PARAMS FOR RESPONSE LIB
+        params = dict(params or {})
+        params["PageNumber"] = page_number
+        params["PageSize"] = page_size
+
+        first_page = True
+        while True:
+            r_json = await self.request_page(
+                method, url, data=data, params=params, headers=headers, cookies=cookies, attempts=attempts,
+                timeout=timeout, retry_safe=retry_safe, raise_errors=raise_errors,
+            )
+            if r_json is None:
+                break
+
+            has_items = type(r_json) is dict and type(r_json.get('Items')) is list and len(r_json['Items']) > 0
+            if first_page or has_items:
+                yield r_json
+            if not has_items:
+                break
+
+            last_page_number = self.get_last_page_number(r_json)
+            if last_page_number is not None and params["PageNumber"] >= last_page_number:
+                break
+
+            if first_page and parallel and last_page_number is not None:
+                async for r_json in self.prefetch_pages(
+                    method, url, range(params["PageNumber"] + 1, last_page_number + 1), data=data, params=params,
+                    headers=headers, cookies=cookies, attempts=attempts, timeout=timeout, retry_safe=retry_safe,
+                    raise_errors=raise_errors,
+                ):
+                    if type(r_json) is not dict or not r_json.get('Items'):
+                        break
+                    yield r_json
+                break
+
+            first_page = False
+            params = dict(params, PageNumber=params["PageNumber"] + 1)
+
+    async def prefetch_pages(
+        self, method, url, page_numbers, data=None, params=None, headers=None, cookies=None, attempts=None,
+        timeout=None, retry_safe=False, raise_errors=False,
+    ):
+        max_workers = self.configuration_dict['MAILUP_MAX_WORKERS']
+        page_numbers = iter(page_numbers)
+        pending = []
+
+        def submit_next():
+            for number in page_numbers:
+                pending.append(asyncio.ensure_future(self.request_page(
+                    method, url, data=data, params=dict(params, PageNumber=number), headers=headers,
+                    cookies=cookies, attempts=attempts, timeout=timeout, retry_safe=retry_safe, raise_errors=raise_errors,
+                )))
+                return True
+            return False
+
+        try:
+            while len(pending) < max_workers and submit_next():
+                pass
+            while pending:
+                r_json = await pending.pop(0)
+                submit_next()
+                yield r_json
+        finally:
+            for future in pending:
+                future.cancel()
+
+    async def iter_items(
+        self, method, url, data=None, params=None, headers=None, cookies=None, attempts=None, timeout=None,
+        page_size=None, page_number=0, parallel=None, retry_safe=False, raise_errors=False, limit=None,
+    ):
+        count = 0
+        pages = self.iter_pages(
+            method, url, data=data, params=params, headers=headers, cookies=cookies, attempts=attempts,
+            timeout=timeout, page_size=page_size, page_number=page_number, parallel=parallel,
+            retry_safe=retry_safe, raise_errors=raise_errors,
+        )
+        try:
+            async for r_json in pages:
+                if type(r_json) is dict:
+                    for item in r_json.get('Items') or []:
+                        yield item
+                        count += 1
+                        if limit and count >= limit:
+                            return
+        finally:
+            await pages.aclose()
+
+    async def request_page(
+        self, method, url, data=None, params=None, headers=None, cookies=None, attempts=None, timeout=None,
+        retry_safe=False, raise_errors=False,
+    ):
+        attempts = attempts or self.retry_policy.attempts
+        timeout = timeout or self.configuration_dict['MAILUP_CLIENT_TIMEOUT']
+
+        if self.is_authorized(headers):
+            # the token is retrieved on the first call and refreshed before it expires
+            await self.ensure_token()
+            headers = self.authorize_headers(headers)
+
+        # CALL
+        attempt = 0
+        while attempt < attempts:
+            attempt += 1
+            backoff = None
+            response = None
+            try:
+                self.logger.debug('Calling url "{url}" in {method} with params = {params}'.format(
+                    method=method.upper(),
+                    url=url,
+                    params=params,
+                ))
+                if self.rate_limiter is not None:
+                    endpoint_kind = self.get_endpoint_kind(url)
+                    if self.rate_limiter.is_blocking(endpoint_kind):
+                        # buckets shared between processes lock a SQLite database
+                        wait = await asyncio.get_event_loop().run_in_executor(
+                            None, self.rate_limiter.reserve, endpoint_kind
+                        )
+                    else:
+                        wait = self.rate_limiter.reserve(endpoint_kind)
+                    if wait > 0:
+                        await asyncio.sleep(wait)
+                response = await self.do_call(
+                    method, url, data=data, params=params, headers=headers, cookies=cookies, timeout=timeout,
+                )
+            except exceptions.MailUpCallError:
+                if not self.retry_policy.is_retryable(method, safe=retry_safe):
+                    self.logger.critical("MailUp does not respond, {method} is not repeated".format(
+                        method=method.upper()
+                    ))
+                    break
+                backoff = self.retry_policy.get_backoff(attempt)
+            else:
+                self.logger.debug('HTTP response: {response}'.format(response=response))
+
+                # 200: success
+                if response.status_code == 200:
+                    if not response.content:
+                        # Any API like delete group return None if OK
+                        return None
+                    return response.json()
+
+                # 401: unauthorised
+                elif response.status_code == 401:
+                    self.logger.error('Response status 401')
+                    if not self.is_authorized(headers):
+                        # token request refused: refreshing the token would call it again
+                        break
+                    await self.refresh_token(used_token=headers['Authorization'][len('Bearer '):])
+                    headers = self.authorize_headers(headers)
+
+                elif self.retry_policy.is_retryable(method, response.status_code, safe=retry_safe):
+                    self.logger.error('Response status {}: {}'.format(response.status_code, response.content))
+                    if response.status_code == 403:
+                        self.logger.error('You probably have just created a list and MailUp is not ready yet')
+                    backoff = self.retry_policy.get_backoff(attempt, response)
+
+                elif response.status_code == 404:
+                    self.logger.error('Response status 404')
+                    break
+
+                elif response.status_code == 500:
+                    self.logger.error('HTTP request error: {}'.format(response.reason))
+                    break
+                else:
+                    # Other error
+                    error_message = response.text.replace('\\\'', '"').replace('\'', '"')
+                    self.logger.error('HTTP request error: {}'.format(error_message))
+                    break
+
+            self.logger.warning('Attempts remaining: {attempts}/{tot_attempt}'.format(
+                attempts=attempts - attempt,
+                tot_attempt=attempts,
+            ))
+            if backoff and attempt < attempts:
+                self.logger.warning('Recalling API after {:.1f} seconds'.format(backoff))
+                await asyncio.sleep(backoff)
+        else:
+            self.logger.critical('Max attempts exceeded calling {url}'.format(url=url))
+        if raise_errors:
+            raise self.get_call_error(url, response)
+        return None
+
+    async def do_call(
+        self, method, url, data=None, params=None, headers=None, cookies=None, attempts=1,
+        timeout=None
+    ):
+        timeout = timeout or self.configuration_dict['MAILUP_CLIENT_TIMEOUT']
+        for i in range(1, attempts + 1):
+            try:
+                return await self.transport.request(
+                    method, url, data=data, params=params, headers=headers, cookies=cookies,
+                    timeout=timeout,
+                )
+            except (asyncio.TimeoutError, aiohttp.ClientConnectionError) as e:
+                self.logger.error(
+                    'ERROR during attempt {}/{}: MailUpRequest {}'.format(i, attempts, e.__class__.__name__)
+                )
+                if i == attempts or not self.retry_policy.is_retryable(method):
+                    break
+                await asyncio.sleep(self.retry_policy.get_backoff(i))
+        raise exceptions.MailUpCallError('Max attempts exceeded')
+
+    # TOKEN
+    def get_basic_credentials(self):
+        credentials = '{}:{}'.format(self.client_id, self.client_secret)
+        return base64.b64encode(credentials.encode('utf-8')).decode('ascii')
+
+    async def ensure_token(self):
+        if not self.access_token:
+            async with self.lock_token():
+                if not self.access_token and not await self.run_token_store(self.load_token):
+                    await self.request_token(*self.get_access_token_request(), retry_safe=True)
+        if self.is_token_expiring():
+            await self.refresh_token(if_expiring=True)
+
+    async def request_token(self, url, params, headers, retry_safe=False):
+        rest_request_json = await self.call_handler("POST", url, params=params, headers=headers, retry_safe=retry_safe)
+        if rest_request_json:
+            self.set_token(rest_request_json)
+            await self.run_token_store(self.save_token)
+        return rest_request_json
+
+    def schedule_token_refresh(self):
+        # no background thread: tasks refresh the token before it expires
+        pass
+
+    async def retrieve_access_token(self):
+        async with self.lock_token():
+            self.logger.debug('Retrieving access token...')
+            # password grant can be safely repeated
+            await self.request_token(*self.get_access_token_request(), retry_safe=True)
+            self.logger.debug('Access token retrieved')
+
+    async def refresh_token(self, used_token=None, if_expiring=False):
+        used_token = used_token or self.access_token
+        async with self.lock_token():
+            if self.access_token != used_token:
+                # another task has already refreshed the token
+                return
+            if if_expiring and not self.is_token_expiring():
+                # refreshed by another task while waiting for the lock
+                return
+            if await self.run_token_store(self.load_token) and not self.is_token_expiring():
+                # refreshed by another process
+                return
+            self.logger.debug('Refreshing token...')
+            if await self.request_token(*self.get_refresh_token_request()):
+                self.logger.debug('Token refreshed')
+            else:
+                self.logger.warning('Token refresh failed, retrieving a new access token')
+                await self.request_token(*self.get_access_token_request(), retry_safe=True)
+
+    # ENDPOINTS WITH RESPONSE POST-PROCESSING
+    async def count_items(self, r_json):
+        # count_ methods pass the awaitable of their read
+        return super(AsyncMailUpClient, self).count_items(await r_json)
+
+    async def add_recipient_to_list(self, list_id, data_dict, confirm_email=False, **kwargs):
+        url = self.console_endpoint + "/Console/List/{list_id}/Recipient?ConfirmEmail={confirm_email}".format(
+            list_id=list_id,
+            confirm_email=confirm_email,
+        )
+        call_response = await self.call_handler(
+            "POST", url, data=json.dumps(data_dict), headers=self.get_headers(), **kwargs
+        )
+        if not call_response:
+            raise exceptions.InvalidRecipientConfigurationException(data_dict)
+        return call_response
+
+    async def send_message_to_list(self, list_id, message_id, **kwargs):
+        url = self.console_endpoint + "/Console/List/{list_id}/Email/{message_id}/Send".format(
+            list_id=list_id,
+            message_id=message_id,
+        )
+        call_response = await self.call_handler(
+            "POST", url, data=json.dumps(dict()), headers=self.get_headers(), **kwargs
+        )
+        return call_response.__repr__()
+
+    async def send_message_to_group(self, group_id, message_id, **kwargs):
+        url = self.console_endpoint + "/Console/Group/{group_id}/Email/{message_id}/Send".format(
+            group_id=group_id,
+            message_id=message_id,
+        )
+        call_response = await self.call_handler(
+            "POST", url, data=json.dumps(dict()), headers=self.get_headers(), **kwargs
+        )
+        return call_response.__repr__()
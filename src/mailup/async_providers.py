@@ -0,0 +1,572 @@
+# coding: utf-8
+"""
+asyncio version of MailUpComponentProvider, to be used with AsyncMailUpClient::
+
+    provider = AsyncMailUpComponentProvider(client=async_mailup_client)
+    mailup_list = await provider.get_list(list_id)
+    async for recipient in provider.iter_recipients(list_id, 'subscribed'):
+        ...
+
+Components are returned without client: their methods that call MailUp (save, get_groups, ...) are blocking,
+use the provider and AsyncMailUpClient coroutines to write on MailUp.
+"""
+
+import asyncio
+import time
+
+from mailup import exceptions
+from mailup.batches import RecipientBatch
+from mailup.batches import to_import_data
+from mailup.components import Attachment
+from mailup.components import Group
+from mailup.components import List
+from mailup.components import Message
+from mailup.components import Recipient
+from mailup.components import Tag
+from mailup.logger import LoggerSingleton
+from mailup.providers import MailUpComponentProvider
+from mailup.providers import Page
+
+
+class AsyncMailUpComponentProvider(object):
+    client = None
+    logger = None
+
+    def __init__(self, client, logger=None):
+        # CLIENT INITIALISATION
+        self.client = client
+
+        # LOGGER INITIALISATION
+        if logger:
+            self.logger = logger
+        else:
+            self.logger = LoggerSingleton()
+            self.logger.disabled = True
+
+        super(AsyncMailUpComponentProvider, self).__init__()
+
+    async def gather_bounded(self, coroutines):
+        """
+        Results of "coroutines" in order, running at most MAILUP_MAX_WORKERS of them at once (and no more than the
+        MAILUP_POOL_MAXSIZE pooled connections): aiohttp counts the wait for a free connection in the connect timeout
+        """
+        semaphore = asyncio.Semaphore(max(1, min(
+            self.client.configuration['MAILUP_MAX_WORKERS'],
+            self.client.configuration['MAILUP_POOL_MAXSIZE'],
+        )))
+
+        async def run(coroutine):
+            async with semaphore:
+                return await coroutine
+
+        return await asyncio.gather(*[run(coroutine) for coroutine in coroutines])
+
+    # PAGE PROVIDER METHODS
+    async def get_page(self, read_method, build_component, page_number=0, page_size=None, **kwargs):
+        page_size = page_size or self.client.configuration['MAILUP_DEFAULT_PAGE_SIZE']
+        r_json = await read_method(page_number=page_number, page_size=page_size, paginate=False, **kwargs) or {}
+        return Page(
+            items=[build_component(data_dict) for data_dict in r_json.get('Items') or []],
+            total_count=r_json.get('TotalElementsCount'),
+            page_number=page_number,
+            page_size=page_size,
+        )
+
+    async def page_lists(self, page_number=0, page_size=None, filters=None):
+        return await self.get_page(
+            self.client.read_lists, lambda data_dict: List.from_mailup(data_dict=data_dict, logger=self.logger),
+            page_number=page_number, page_size=page_size, filters=filters,
+        )
+
+    async def page_groups(self, list_id, page_number=0, page_size=None, filters=None):
+        return await self.get_page(
+            self.client.read_groups, lambda data_dict: Group.from_mailup(data_dict=data_dict, logger=self.logger),
+            page_number=page_number, page_size=page_size, list_id=list_id, filters=filters,
+        )
+
+    async def page_recipients(self, list_id, status, page_number=0, page_size=None, filters=None):
+        def build_component(data_dict):
+            data_dict['idList'] = list_id
+            return Recipient.from_mailup(data_dict=data_dict, logger=self.logger, status=status)
+
+        return await self.get_page(
+            self.client.get_recipients, build_component,
+            page_number=page_number, page_size=page_size, list_id=list_id, status=status, filters=filters,
+        )
+
+    async def page_messages(self, list_id, status=None, page_number=0, page_size=None, filters=None):
+        return await self.get_page(
+            self.client.list_messages, lambda data_dict: Message.from_mailup(data_dict=data_dict, logger=self.logger),
+            page_number=page_number, page_size=page_size, list_id=list_id, status=status, filters=filters,
+        )
+
+    async def page_tags(self, list_id, page_number=0, page_size=None):
+        def build_component(data_dict):
+            data_dict['idList'] = list_id
+            return Tag.from_mailup(data_dict=data_dict, logger=self.logger)
+
+        return await self.get_page(
+            self.client.list_tags, build_component,
+            page_number=page_number, page_size=page_size, list_id=list_id,
+        )
+
+    # LIST PROVIDER METHODS
+    async def create_list(self, data_dict):
+        # check data_dict, not valid InvalidConfigurationException is rise
+        List(data_dict, required_fields=['Name', 'owneremail', 'replyto'])
+
+        MailUpComponentProvider.set_list_defaults(data_dict)
+        list_id = await self.client.create_list(
+            data_dict=data_dict
+        )
+        self.logger.info('List with id {list_id} created successfully'.format(list_id=list_id))
+        return await self.get_list(list_id)
+
+    async def get_list(self, list_id):
+        items = (await self.client.read_lists(filters={'idList': list_id}, limit=1))['Items']
+        if not items:
+            raise exceptions.ListNotFoundException(list_id)
+        return List.from_mailup(data_dict=items[0], logger=self.logger)
+
+    async def all_lists(self, raw=False):
+        return await self.filter_lists(filters=None, raw=raw)
+
+    async def filter_lists(self, filters, limit=None, raw=False):
+        return [list_ async for list_ in self.iter_lists(filters=filters, limit=limit, raw=raw)]
+
+    async def iter_lists(self, filters=None, limit=None, raw=False):
+        async for data_dict in self.client.read_lists(filters=filters, stream=True, limit=limit):
+            yield data_dict if raw else List.from_mailup(data_dict=data_dict, logger=self.logger)
+
+    # GROUP PROVIDER METHODS
+    async def create_group(self, data_dict):
+        # check data_dict, not valid InvalidConfigurationException is rise
+        Group(data_dict)
+
+        new_data_dict = await self.client.create_group(
+            list_id=data_dict['idList'],
+            data_dict=data_dict,
+        )
+        new_group = Group.from_mailup(data_dict=new_data_dict, logger=self.logger)
+        self.logger.info('Group {new_group} created successfully'.format(new_group=new_group))
+        return new_group
+
+    async def get_group(self, list_id, group_id):
+        items = (await self.client.read_groups(list_id=list_id, filters={'idGroup': group_id}, limit=1))['Items']
+        if not items:
+            raise exceptions.GroupNotFoundException(group_id)
+        return Group.from_mailup(data_dict=items[0], logger=self.logger)
+
+    async def all_groups(self, list_id, raw=False):
+        return await self.filter_groups(list_id, filters=None, raw=raw)
+
+    async def filter_groups(self, list_id, filters, limit=None, raw=False):
+        return [group async for group in self.iter_groups(list_id, filters=filters, limit=limit, raw=raw)]
+
+    async def iter_groups(self, list_id, filters=None, limit=None, raw=False):
+        async for data_dict in self.client.read_groups(list_id=list_id, filters=filters, stream=True, limit=limit):
+            yield data_dict if raw else Group.from_mailup(data_dict=data_dict, logger=self.logger)
+
+    # RECIPIENT PROVIDER METHODS
+    async def create_recipient(self, data_dict, confirm_email=False, optimistic=None):
+        # check data_dict, not valid InvalidConfigurationException is rise
+        recipient = Recipient(
+            data_dict=data_dict,
+            logger=self.logger,
+            status='pending' if confirm_email else 'subscribed',
+        )
+        list_id = data_dict['idList']
+        if optimistic is None:
+            optimistic = self.client.configuration['MAILUP_OPTIMISTIC_CREATE']
+        if optimistic:
+            return await self.add_recipient(recipient, confirm_email=confirm_email, raise_errors=True)
+        try:
+            await self.get_recipient(list_id=list_id, email=recipient.email, write_log=False)
+            raise exceptions.RecipientAlreadyExistException(
+                list_id=list_id,
+                email=recipient.email,
+            )
+        except exceptions.RecipientNotFoundException:
+            return await self.add_recipient(recipient, confirm_email=confirm_email)
+
+    async def add_recipient(self, recipient, confirm_email=False, raise_errors=False):
+        try:
+            recipient_id = await self.client.add_recipient_to_list(
+                list_id=recipient.list_id,
+                data_dict=recipient.data_dict,
+                confirm_email=confirm_email,
+                raise_errors=raise_errors,
+            )
+        except exceptions.MailUpCallError as e:
+            if e.is_conflict():
+                raise exceptions.RecipientAlreadyExistException(list_id=recipient.list_id, email=recipient.email)
+            raise
+        recipient.data_dict['idRecipient'] = recipient_id
+        self.logger.info('Recipient {new_recipient} created successfully'.format(new_recipient=recipient))
+        return recipient
+
+    async def create_recipients(self, data_dicts, confirm_email=False, wait_import=False, chunk_size=None):
+        status = 'pending' if confirm_email else 'subscribed'
+        recipients_by_list = MailUpComponentProvider.group_recipients_by_list(data_dicts, status, self.logger)
+        chunk_size = chunk_size or self.client.configuration['MAILUP_IMPORT_CHUNK_SIZE']
+
+        result = {'created': [], 'existing': [], 'import_ids': []}
+        for list_id, recipients in recipients_by_list.items():
+            found = await self.get_recipients_by_emails(
+                list_id, [recipient.email for recipient in recipients], write_log=False,
+            )
+            new_recipients = MailUpComponentProvider.split_existing_recipients(recipients, found, result)
+            import_ids = []
+            for index in range(0, len(new_recipients), chunk_size):
+                chunk = new_recipients[index:index + chunk_size]
+                import_id = await self.client.subscribe_recipients_to_list(
+                    list_id=list_id,
+                    list_data_dict=[recipient.data_dict for recipient in chunk],
+                    confirm_email=confirm_email,
+                    raise_errors=True,
+                )
+                import_ids.append(MailUpComponentProvider.check_import_id(import_id, list_id, index, len(chunk)))
+            self.logger.info('{count} recipients submitted to list {list_id}, import_ids={import_ids}'.format(
+                count=len(new_recipients),
+                list_id=list_id,
+                import_ids=import_ids,
+            ))
+            if wait_import and new_recipients:
+                await self.gather_bounded([self.wait_import(import_id) for import_id in import_ids])
+                created = await self.get_recipients_by_emails(
+                    list_id, [recipient.email for recipient in new_recipients], status=status,
+                )
+                MailUpComponentProvider.set_created_ids(new_recipients, created)
+            result['import_ids'].extend(import_ids)
+        return result
+
+    async def get_recipient(self, list_id, recipient_id=None, email=None, status=None, write_log=True, parallel=None):
+        filters = {}
+        if recipient_id:
+            filters['idRecipient'] = recipient_id
+        if email:
+            filters['Email'] = email
+        if not filters:
+            self.logger.warning('"get_recipient" without "recipient_id" or "email"')
+            return None
+
+        if parallel is None:
+            parallel = self.client.configuration['MAILUP_PARALLEL_LOOKUP']
+        statuses = [status] if status else ['subscribed', 'unsubscribed', 'pending']
+
+        if parallel and len(statuses) > 1:
+            data_dict, status_found = await self.find_recipient_parallel(list_id, filters, statuses)
+        else:
+            data_dict, status_found = None, None
+            for status_tried in statuses:
+                data_dict = await self.find_recipient(list_id, filters, status_tried)
+                if data_dict:
+                    status_found = status_tried
+                    break
+
+        if data_dict:
+            data_dict['idList'] = list_id
+            return Recipient.from_mailup(data_dict=data_dict, logger=self.logger, status=status_found)
+        raise exceptions.RecipientNotFoundException(
+            recipient_id=recipient_id,
+            email=email,
+            status=status,
+            write_log=write_log
+        )
+
+    async def find_recipient(self, list_id, filters, status):
+        # a failed call raises MailUpCallError: it is not "not found"
+        items = self.client.get_recipients(
+            list_id=list_id, status=status, filters=filters, limit=1, stream=True, raise_errors=True,
+        )
+        try:
+            async for data_dict in items:
+                return data_dict
+            return None
+        finally:
+            await items.aclose()
+
+    async def find_recipient_parallel(self, list_id, filters, statuses):
+        tasks = [(asyncio.ensure_future(self.find_recipient(list_id, filters, status)), status) for status in statuses]
+        try:
+            # results are taken in "statuses" order, as the sequential lookup does
+            for task, status in tasks:
+                data_dict = await task
+                if data_dict:
+                    return data_dict, status
+            return None, None
+        finally:
+            # lookups of the following statuses are not needed
+            for task, status in tasks:
+                task.cancel()
+
+    async def all_recipients_subscribed(self, list_id, raw=False):
+        return await self.filter_recipients(list_id, filters=None, status='subscribed', raw=raw)
+
+    async def all_recipients_unsubscribed(self, list_id, raw=False):
+        return await self.filter_recipients(list_id, filters=None, status='unsubscribed', raw=raw)
+
+    async def all_recipients_pending(self, list_id, raw=False):
+        return await self.filter_recipients(list_id, filters=None, status='pending', raw=raw)
+
+    async def all_recipients(self, list_id, raw=False):
+        return await self.filter_recipients(list_id, filters=None, raw=raw)
+
+    async def iter_all_recipients(self, list_id, statuses=('subscribed', 'unsubscribed', 'pending'), filters=None,
+                                  raw=False, with_status=False):
+        """
+        Async generator of Recipient of all "statuses", streamed concurrently and yielded as they arrive
+        (data dicts if "raw", (status, recipient) tuples if "with_status")
+        """
+        page_size = self.client.configuration['MAILUP_DEFAULT_PAGE_SIZE']
+        items = asyncio.Queue(maxsize=page_size * len(statuses))
+
+        async def read(status):
+            error = None
+            try:
+                async for data_dict in self.client.get_recipients(
+                    list_id=list_id, status=status, filters=filters, stream=True,
+                ):
+                    await items.put((status, data_dict))
+            except Exception as e:
+                error = e
+            await items.put((None, error))
+
+        tasks = [asyncio.ensure_future(read(status)) for status in statuses]
+        try:
+            running = len(tasks)
+            while running:
+                status, data_dict = await items.get()
+                if status is None:
+                    if data_dict is not None:
+                        raise data_dict
+                    running -= 1
+                    continue
+                data_dict['idList'] = list_id
+                recipient = data_dict if raw else Recipient.from_mailup(data_dict, logger=self.logger, status=status)
+                yield (status, recipient) if with_status else recipient
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    async def filter_recipients(self, list_id, filters, status=None, limit=None, raw=False):
+        statuses = [status] if status else ['subscribed', 'unsubscribed', 'pending']
+        # statuses are requested concurrently, result keeps the order of statuses
+        recipient_lists = await asyncio.gather(*[
+            self._recipient_list(list_id, status_tried, filters, limit, raw) for status_tried in statuses
+        ])
+        return [recipient for recipient_list in recipient_lists for recipient in recipient_list]
+
+    async def _recipient_list(self, list_id, status, filters, limit=None, raw=False):
+        return [
+            recipient async for recipient in self.iter_recipients(list_id, status, filters=filters, limit=limit, raw=raw)
+        ]
+
+    async def iter_recipients(self, list_id, status, filters=None, limit=None, raw=False):
+        async for data_dict in self.client.get_recipients(
+            list_id=list_id, status=status, filters=filters, stream=True, limit=limit,
+        ):
+            data_dict['idList'] = list_id
+            yield data_dict if raw else Recipient.from_mailup(data_dict=data_dict, logger=self.logger, status=status)
+
+    async def get_recipient_batch(self, list_id, statuses=('subscribed', 'unsubscribed', 'pending'), filters=None):
+        batch = RecipientBatch(list_id=list_id)
+        for status in statuses:
+            # items are added as pages arrive, no list of items is built
+            async for item in self.client.get_recipients(list_id=list_id, status=status, filters=filters, stream=True):
+                batch.append_item(item, status=status)
+        return batch
+
+    async def get_recipients_by_emails(self, list_id, emails, status=None, chunk_size=None, write_log=True):
+        return await self.get_recipients_by_field(
+            list_id, 'Email', emails, status=status, chunk_size=chunk_size, write_log=write_log,
+        )
+
+    async def get_recipients_by_ids(self, list_id, recipient_ids, status=None, chunk_size=None, write_log=True):
+        return await self.get_recipients_by_field(
+            list_id, 'idRecipient', recipient_ids, status=status, chunk_size=chunk_size, write_log=write_log,
+        )
+
+    async def get_recipients_by_field(self, list_id, field, keys, status=None, chunk_size=None, write_log=True):
+        keys = list(keys)
+        lookups = MailUpComponentProvider.get_lookups(
+            field, keys, status, chunk_size or self.client.configuration['MAILUP_LOOKUP_CHUNK_SIZE'],
+        )
+        # chunks and statuses are requested concurrently, MAILUP_MAX_WORKERS at a time
+        results = await self.gather_bounded([
+            self._lookup_items(list_id, lookup_status, filters) for lookup_status, filters in lookups
+        ])
+        return MailUpComponentProvider.build_lookup_result(
+            list_id, field, keys, lookups, results, self.logger, write_log=write_log,
+        )
+
+    async def _lookup_items(self, list_id, status, filters):
+        response = await self.client.get_recipients(list_id=list_id, status=status, filters=filters)
+        if response is None:
+            raise exceptions.MailUpCallError('Recipients lookup failed on list {}'.format(list_id))
+        return response['Items']
+
+    # IMPORT PROVIDER METHODS
+    async def subscribe_recipients_list(self, list_id, recipients, confirm_email=False, import_type=None,
+                                        wait_import=False):
+        import_id = await self.client.subscribe_recipients_to_list(
+            list_id=list_id,
+            list_data_dict=to_import_data(recipients),
+            confirm_email=confirm_email,  # confirm_email=True => "Pending"; confirm_email=False => "Subscribed"
+            import_type=import_type,
+        )
+        if wait_import:
+            await self.wait_import(import_id)
+        return import_id
+
+    async def unsubscribe_recipients_list(self, list_id, recipients, wait_import=False):
+        import_id = await self.client.unsubscribe_recipients_to_list(
+            list_id=list_id,
+            list_data_dict=to_import_data(recipients),
+            import_type='asOptout',
+        )
+        if wait_import:
+            await self.wait_import(import_id)
+        return import_id
+
+    async def wait_import(self, import_id, poll_interval=2, timeout=None):
+        """
+        Wait (without blocking the event loop) until import with id "import_id" is complete, see
+        MailUpComponentProvider.wait_import
+        """
+        if timeout is None:
+            timeout = self.client.configuration['MAILUP_IMPORT_TIMEOUT']
+        deadline = time.time() + timeout
+        while True:
+            status = await self.client.read_import_status(import_id)
+            if MailUpComponentProvider.is_import_complete(import_id, status, deadline, timeout, self.logger):
+                return status
+            self.logger.warning('Waiting {} seconds import is complete..'.format(poll_interval))
+            await asyncio.sleep(poll_interval)
+
+    # MESSAGE PROVIDER METHODS
+    async def create_message(self, data_dict, content='', embed=False, is_confirmation=False, tracking_info=None):
+        # check data_dict, not valid InvalidConfigurationException is rise
+        Message(data_dict)
+
+        data_dict['Content'] = content
+        data_dict['Embed'] = embed
+        data_dict['IsConfirmation'] = is_confirmation
+        data_dict['TrackingInfo'] = tracking_info or {
+            'CustomParams': '',
+            'Enabled': False,
+            'Protocols': ['http:', 'https:', 'ftp:', 'news:'],
+        }
+        new_data_dict = await self.client.create_message(
+            list_id=data_dict['idList'],
+            data_dict=data_dict
+        )
+        new_message = Message.from_mailup(data_dict=new_data_dict, logger=self.logger)
+        self.logger.info('Message {new_message} create successfully'.format(new_message=new_message))
+        return new_message
+
+    async def get_message(self, list_id, message_id):
+        data_dict = await self.client.read_message_detail(list_id, message_id)
+        if not data_dict:
+            raise exceptions.MessageNotFoundException(message_id=message_id)
+        return Message.from_mailup(data_dict=data_dict, logger=self.logger, detail=True)
+
+    async def all_messages(self, list_id, status=None, raw=False):
+        return await self.filter_messages(list_id, status=status, raw=raw)
+
+    async def all_published_messages(self, list_id, raw=False):
+        return await self.all_messages(list_id=list_id, status='Online', raw=raw)
+
+    async def all_archived_messages(self, list_id, raw=False):
+        return await self.all_messages(list_id=list_id, status='Archived', raw=raw)
+
+    async def filter_messages(self, list_id, status=None, filters=None, limit=None, raw=False):
+        return [
+            message async for message in self.iter_messages(list_id, status=status, filters=filters, limit=limit, raw=raw)
+        ]
+
+    async def iter_messages(self, list_id, status=None, filters=None, limit=None, raw=False):
+        async for data_dict in self.client.list_messages(
+            list_id=list_id, status=status, filters=filters, stream=True, limit=limit,
+        ):
+            yield data_dict if raw else Message.from_mailup(data_dict=data_dict, logger=self.logger)
+
+    # TAG PROVIDER METHOD
+    async def create_tag(self, data_dict, optimistic=None):
+        # check data_dict, not valid InvalidConfigurationException is rise
+        Tag(data_dict)
+        list_id = data_dict['idList']
+        tag_name = data_dict['Name']
+
+        if optimistic is None:
+            optimistic = self.client.configuration['MAILUP_OPTIMISTIC_CREATE']
+        if optimistic:
+            return await self.add_tag(list_id, tag_name, raise_errors=True)
+        try:
+            await self.get_tag(list_id, tag_name=tag_name, write_log=False)
+            raise exceptions.TagAlreadyExistException(
+                list_id=list_id,
+                tag_name=tag_name,
+            )
+        except exceptions.TagNotFoundException:
+            return await self.add_tag(list_id, tag_name)
+
+    async def add_tag(self, list_id, tag_name, raise_errors=False):
+        try:
+            new_data_dict = await self.client.create_tag(list_id=list_id, tag_name=tag_name, raise_errors=raise_errors)
+        except exceptions.MailUpCallError as e:
+            if e.is_conflict():
+                raise exceptions.TagAlreadyExistException(list_id=list_id, tag_name=tag_name)
+            raise
+        new_data_dict['idList'] = list_id
+        new_tag = Tag.from_mailup(data_dict=new_data_dict, logger=self.logger)
+        self.logger.info('Tag {new_tag} created successfully'.format(new_tag=new_tag))
+        return new_tag
+
+    async def get_tag(self, list_id, tag_id=None, tag_name=None, write_log=True):
+        if not tag_id and not tag_name:
+            return await self.all_tags(list_id)
+        tags_data_paginated = await self.client.list_tags(list_id=list_id, tag_id=tag_id, tag_name=tag_name, limit=1)
+        if tags_data_paginated and tags_data_paginated['TotalElementsCount'] > 0:
+            data_dict = tags_data_paginated['Items'][0]
+            data_dict['idList'] = list_id
+            return Tag.from_mailup(data_dict=data_dict, logger=self.logger)
+        raise exceptions.TagNotFoundException(
+            tag_id=tag_id,
+            tag_name=tag_name,
+            write_log=write_log
+        )
+
+    async def all_tags(self, list_id, raw=False):
+        return [tag async for tag in self.iter_tags(list_id, raw=raw)]
+
+    async def iter_tags(self, list_id, raw=False):
+        async for data_dict in self.client.list_tags(list_id=list_id, stream=True):
+            # Mailup not get (in this case) 'idList' in data_dict
+            data_dict['idList'] = list_id
+            yield data_dict if raw else Tag.from_mailup(data_dict=data_dict, logger=self.logger)
+
+    # ATTACHMENT PROVIDER METHODS
+    async def all_attachments(self, list_id, message_id):
+        attachments_list = []
+        attachments_data_dict = await self.client.read_message_attachments(
+            list_id=list_id,
+            message_id=message_id,
+        )
+        for attachment_data_dict in attachments_data_dict:
+            # Mailup not get (in this case) 'idList' and 'idMessage' in data_dict
+            attachment_data_dict['idList'] = list_id
+            attachment_data_dict['idMessage'] = message_id
+            attachments_list.append(Attachment(data_dict=attachment_data_dict, logger=self.logger))
+        return attachments_list
+
+    async def get_attachment(self, list_id, message_id, file_name=None, slot=None):
+        if not file_name and not slot:
+            return 'Please indicate file name or file slot to find attachment'
+        elif slot and not 1 <= slot <= 5:
+            return 'Please indicate a slot >= 1 and <= 5'
+
+        for attachment in await self.all_attachments(list_id, message_id):
+            if attachment.name == file_name or attachment.slot == slot:
+                return attachment
+        raise exceptions.AttachmentNotFoundException(slot, file_name)
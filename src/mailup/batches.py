@@ -0,0 +1,228 @@
+# coding: utf-8
+"""
+Recipients stored by column, for bulk jobs that do not need a Recipient object for each contact::
+
+    batch = provider.get_recipient_batch(list_id, statuses=['subscribed'])
+    new_batch = RecipientBatch(list_id=other_list_id)
+    for email, name in rows:
+        new_batch.append(email, name, fields={1: 'John'})
+    mailup_client.subscribe_recipients_to_list(other_list_id, new_batch)
+
+numpy and pandas are optional: ids_array() and to_dataframe()/from_dataframe() need them.
+"""
+
+from array import array
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+try:
+    import pandas
+except ImportError:
+    pandas = None
+
+
+class RecipientBatch(object):
+    """
+    Emails, names, ids and statuses are kept in a column each, dynamic fields in a column for each field Id
+    (None where a recipient has no value). Ids are stored in an array, 0 if unknown; statuses as codes of STATUSES,
+    -1 if unknown.
+    """
+    STATUSES = ('subscribed', 'unsubscribed', 'pending')
+
+    def __init__(self, list_id=None):
+        self.list_id = list_id
+        self.emails = []
+        self.names = []
+        self.ids = array('l')
+        self.status_codes = array('b')
+        # field Id: column of values
+        self.field_values = dict()
+        # field Id: Description, when MailUp tells it
+        self.field_names = dict()
+
+    def __len__(self):
+        return len(self.emails)
+
+    def __repr__(self):
+        return u'<{class_name}: {count} recipients>'.format(
+            class_name=self.__class__.__name__,
+            count=len(self),
+        )
+
+    # FILL
+    def append(self, email, name=None, recipient_id=None, status=None, fields=None):
+        """
+        :param fields: dict field Id: value, or MailUp "Fields" list (dicts with "Id", "Value" and "Description")
+        """
+        index = len(self.emails)
+        self.emails.append(email)
+        self.names.append(name)
+        self.ids.append(recipient_id or 0)
+        self.status_codes.append(self.STATUSES.index(status) if status else -1)
+
+        if isinstance(fields, dict):
+            fields = [{'Id': field_id, 'Value': value} for field_id, value in fields.items()]
+        for field in fields or []:
+            column = self.field_values.get(field['Id'])
+            if column is None:
+                column = self.field_values[field['Id']] = [None] * index
+            column.append(field.get('Value'))
+            if field.get('Description'):
+                self.field_names[field['Id']] = field['Description']
+        # recipients without a field get None in its column
+        for column in self.field_values.values():
+            if len(column) == index:
+                column.append(None)
+
+    def extend_items(self, items, status=None):
+        """
+        Add MailUp recipient items, like the "Items" of get_recipients pages or the generator of
+        get_recipients(..., stream=True)
+        """
+        for item in items:
+            self.append_item(item, status=status)
+
+    def append_item(self, item, status=None):
+        """
+        Add a MailUp recipient item
+        """
+        self.append(
+            item.get('Email'),
+            item.get('Name'),
+            recipient_id=item.get('idRecipient'),
+            status=status,
+            fields=item.get('Fields'),
+        )
+
+    @classmethod
+    def from_items(cls, items, list_id=None, status=None):
+        batch = cls(list_id=list_id)
+        batch.extend_items(items, status=status)
+        return batch
+
+    @classmethod
+    def from_recipients(cls, recipients, list_id=None):
+        batch = cls(list_id=list_id)
+        for recipient in recipients:
+            data_dict = recipient.data_dict
+            batch.append(
+                data_dict.get('Email'),
+                data_dict.get('Name'),
+                recipient_id=data_dict.get('idRecipient'),
+                status=recipient.status,
+                fields=data_dict.get('Fields'),
+            )
+            if batch.list_id is None:
+                batch.list_id = data_dict.get('idList')
+        return batch
+
+    # READ
+    def get_status(self, index):
+        code = self.status_codes[index]
+        return self.STATUSES[code] if code >= 0 else None
+
+    def get_data_dict(self, index):
+        """
+        MailUp data dict of recipient "index", fields without value are not included
+        """
+        data_dict = {
+            'Email': self.emails[index],
+            'Fields': [
+                {'Id': field_id, 'Value': column[index]}
+                for field_id, column in self.field_values.items() if column[index] is not None
+            ],
+        }
+        if self.names[index] is not None:
+            data_dict['Name'] = self.names[index]
+        if self.ids[index]:
+            data_dict['idRecipient'] = self.ids[index]
+        return data_dict
+
+    def to_data_dicts(self, start=0, stop=None):
+        """
+        Payload of subscribe_recipients_to_list / unsubscribe_recipients_to_list for recipients start:stop
+        """
+        stop = len(self) if stop is None else min(stop, len(self))
+        return [self.get_data_dict(index) for index in range(start, stop)]
+
+    def iter_chunks(self, chunk_size):
+        """
+        Generator of payloads of "chunk_size" recipients
+        """
+        for start in range(0, len(self), chunk_size):
+            yield self.to_data_dicts(start, start + chunk_size)
+
+    def to_recipients(self, client=None, logger=None):
+        from mailup.components import Recipient
+
+        recipients = []
+        for index in range(len(self)):
+            data_dict = self.get_data_dict(index)
+            data_dict['idList'] = self.list_id
+            data_dict.setdefault('Name', '')
+            recipients.append(Recipient(data_dict, client=client, logger=logger, status=self.get_status(index)))
+        return recipients
+
+    # NUMPY / PANDAS
+    def ids_array(self):
+        """
+        numpy array with a copy of the ids: a view of the array would prevent appending to the batch while it exists
+        """
+        if numpy is None:
+            raise ImportError('numpy is required by RecipientBatch.ids_array')
+        return numpy.array(self.ids, dtype='l')
+
+    def to_dataframe(self):
+        """
+        pandas DataFrame with columns "Email", "Name", "idRecipient", "Status" and a column for each field, named
+        by its Description if known (by its Id otherwise)
+        """
+        if pandas is None:
+            raise ImportError('pandas is required by RecipientBatch.to_dataframe')
+        columns = {
+            'Email': self.emails,
+            'Name': self.names,
+            'idRecipient': list(self.ids),
+            'Status': [self.get_status(index) for index in range(len(self))],
+        }
+        for field_id, column in self.field_values.items():
+            columns[self.field_names.get(field_id, field_id)] = column
+        return pandas.DataFrame(columns)
+
+    @classmethod
+    def from_dataframe(cls, dataframe, list_id=None, field_columns=None):
+        """
+        :param field_columns: dict column name: field Id of the dataframe columns with dynamic fields
+        """
+        batch = cls(list_id=list_id)
+        field_columns = field_columns or {}
+
+        def get_value(row, column):
+            # missing columns and empty cells (NaN) are None
+            value = row.get(column)
+            return None if value is None or pandas.isnull(value) else value
+
+        for row in dataframe.to_dict('records'):
+            recipient_id = get_value(row, 'idRecipient')
+            batch.append(
+                row['Email'],
+                get_value(row, 'Name'),
+                recipient_id=int(recipient_id) if recipient_id else None,
+                status=get_value(row, 'Status'),
+                fields=dict((field_id, get_value(row, column)) for column, field_id in field_columns.items()),
+            )
+        for column, field_id in field_columns.items():
+            batch.field_names[field_id] = column
+        return batch
+
+
+def to_import_data(recipients):
+    """
+    Payload of an import call from a RecipientBatch or a list of Recipients (or of data dicts)
+    """
+    if isinstance(recipients, RecipientBatch):
+        return recipients.to_data_dicts()
+    return [getattr(recipient, 'data_dict', recipient) for recipient in recipients]
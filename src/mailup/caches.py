@@ -0,0 +1,198 @@
+# coding: utf-8
+
+import collections
+import copy
+import json
+import os
+import sqlite3
+import threading
+import time
+
+
+class ResponseCache(object):
+    """
+    Cache of MailUp json responses: an in-memory LRU of "maxsize" entries and, if "path" is given, a SQLite tier
+    shared by the processes using the same file. Entries expire after "ttl" seconds.
+
+    Every entry has a "scope" (see MailUpClient.get_cache_scope): a write call removes all the entries of its scope.
+    With a SQLite tier every invalidation also increments a shared generation: a process that finds a generation
+    different from its own drops its in-memory entries, so it does not serve responses invalidated by another process.
+    Responses are copied in and out of the cache, callers can modify them.
+    """
+
+    def __init__(self, ttl=60, maxsize=256, path=None):
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self.path = path
+
+        self.hits = 0
+        self.misses = 0
+
+        self._lock = threading.Lock()
+        self._entries = collections.OrderedDict()  # key: (scope, expires_at, value)
+        self._generation = None
+        self._local = threading.local()
+
+    @property
+    def connection(self):
+        # sqlite connections can not be shared between threads and forked processes
+        if getattr(self._local, 'pid', None) != os.getpid():
+            connection = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            connection.execute(
+                'CREATE TABLE IF NOT EXISTS mailup_response_cache '
+                '(key TEXT PRIMARY KEY, scope TEXT NOT NULL, expires_at REAL NOT NULL, value TEXT NOT NULL)'
+            )
+            connection.execute(
+                'CREATE INDEX IF NOT EXISTS mailup_response_cache_scope ON mailup_response_cache (scope)'
+            )
+            connection.execute(
+                'CREATE TABLE IF NOT EXISTS mailup_response_cache_generation '
+                '(id INTEGER PRIMARY KEY, generation INTEGER NOT NULL)'
+            )
+            connection.execute('INSERT OR IGNORE INTO mailup_response_cache_generation (id, generation) VALUES (1, 0)')
+            self._local.connection = connection
+            self._local.pid = os.getpid()
+        return self._local.connection
+
+    def get(self, key, default=None):
+        now = time.time()
+        if self.path:
+            self.sync_generation()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[1] <= now:
+                del self._entries[key]
+                entry = None
+            if entry is not None:
+                # most recently used entries are kept at the end
+                self._entries[key] = self._entries.pop(key)
+                self.hits += 1
+                return copy.deepcopy(entry[2])
+
+        if self.path:
+            row = self.connection.execute(
+                'SELECT scope, expires_at, value FROM mailup_response_cache WHERE key = ? AND expires_at > ?',
+                (key, now)
+            ).fetchone()
+            if row:
+                scope, expires_at, value = row
+                value = json.loads(value)
+                self.set_memory(key, scope, expires_at, value)
+                with self._lock:
+                    self.hits += 1
+                return copy.deepcopy(value)
+
+        with self._lock:
+            self.misses += 1
+        return default
+
+    def set(self, key, scope, value):
+        expires_at = time.time() + self.ttl
+        value = copy.deepcopy(value)
+        self.set_memory(key, scope, expires_at, value)
+        if self.path:
+            self.connection.execute(
+                'INSERT OR REPLACE INTO mailup_response_cache (key, scope, expires_at, value) VALUES (?, ?, ?, ?)',
+                (key, scope, expires_at, json.dumps(value))
+            )
+
+    def set_memory(self, key, scope, expires_at, value):
+        with self._lock:
+            self._entries.pop(key, None)
+            self._entries[key] = (scope, expires_at, value)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def sync_generation(self):
+        """
+        Drop the in-memory entries if another process invalidated the SQLite tier since the last read
+        """
+        generation = self.connection.execute(
+            'SELECT generation FROM mailup_response_cache_generation WHERE id = 1'
+        ).fetchone()[0]
+        with self._lock:
+            if generation != self._generation:
+                self._entries.clear()
+                self._generation = generation
+
+    def increment_generation(self):
+        self.connection.execute('UPDATE mailup_response_cache_generation SET generation = generation + 1 WHERE id = 1')
+
+    def invalidate(self, scope):
+        """
+        Remove all the entries of "scope"
+        """
+        with self._lock:
+            for key in [key for key, entry in self._entries.items() if entry[0] == scope]:
+                del self._entries[key]
+        if self.path:
+            self.connection.execute('DELETE FROM mailup_response_cache WHERE scope = ?', (scope,))
+            self.increment_generation()
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+        if self.path:
+            self.connection.execute('DELETE FROM mailup_response_cache')
+            self.increment_generation()
+
+    def stats(self):
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'size': len(self._entries),
+            }
+
+
+class SingleFlight(object):
+    """
+    Coalesce identical concurrent calls: while a call for "key" is running, other threads asking for the same key
+    wait for it and receive a copy of its result (or its exception) instead of calling again.
+    """
+
+    class Call(object):
+
+        def __init__(self):
+            self.event = threading.Event()
+            self.result = None
+            self.error = None
+            self.followers = 0
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = dict()
+
+    def do(self, key, function, *args, **kwargs):
+        with self._lock:
+            call = self._calls.get(key)
+            if call is None:
+                call = self._calls[key] = self.Call()
+                leader = True
+            else:
+                call.followers += 1
+                leader = False
+
+        if not leader:
+            call.event.wait()
+            if call.error is not None:
+                raise call.error
+            return copy.deepcopy(call.result)
+
+        result = None
+        try:
+            result = function(*args, **kwargs)
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            # no follower can join after the call has been removed: the result is copied only if it is shared,
+            # so the leader can modify it while followers are copying
+            if call.followers and call.error is None:
+                call.result = copy.deepcopy(result)
+            call.event.set()
+        return result
@@ -1,13 +1,29 @@
 # coding: utf-8
 
 import base64
+import contextlib
 import json
+import math
+import os
+import re
 import requests
+import threading
 import time
 
+from concurrent.futures import ThreadPoolExecutor
+
 from mailup import exceptions
 from mailup import utils
+from mailup.batches import to_import_data
+from mailup.caches import ResponseCache
+from mailup.caches import SingleFlight
+from mailup.limiters import RateLimiter
 from mailup.logger import LoggerSingleton
+from mailup.retries import RetryPolicy
+from mailup.tokens import FileTokenStore
+from mailup.tokens import SQLiteTokenStore
+from mailup.tokens import TokenStore
+from mailup.transports import MailUpTransport
 
 # MAILUP CONFIGURATION FILE
 _initial_client_configuration = {
@@ -28,8 +44,36 @@ _initial_client_configuration = {
     'MAILUP_CLIENT_TIMEOUT': 60,
     'MAILUP_CLIENT_TIMEOUT_403': 60,
     'MAILUP_CLIENT_ATTEMPT_WAIT': 2,
+    'MAILUP_CLIENT_CONNECT_TIMEOUT': 10,
+    'MAILUP_POOL_CONNECTIONS': 10,
+    'MAILUP_POOL_MAXSIZE': 10,
+    'MAILUP_POOL_BLOCK': False,
+    'MAILUP_KEEP_ALIVE': True,
+    'MAILUP_PARALLEL_PAGINATION': False,
+    'MAILUP_MAX_WORKERS': 4,
+    'MAILUP_PARALLEL_LOOKUP': False,
+    'MAILUP_LOOKUP_CHUNK_SIZE': 50,
+    'MAILUP_IMPORT_CHUNK_SIZE': 1000,
+    'MAILUP_IMPORT_TIMEOUT': 600,
+    'MAILUP_OPTIMISTIC_CREATE': False,
+    'MAILUP_TRUST_IDS': False,
+    'MAILUP_PARTIAL_RECIPIENT_UPDATE': False,
+    'MAILUP_RETRY_JITTER': True,
+    'MAILUP_RATE_LIMITS': None,
+    'MAILUP_RATE_LIMIT_PATH': None,
+    'MAILUP_TOKEN_REFRESH_MARGIN': 60,
+    'MAILUP_TOKEN_BACKGROUND_REFRESH': True,
+    'MAILUP_TOKEN_STORE': None,
+    'MAILUP_TOKEN_STORE_PATH': None,
+    'MAILUP_CACHE_TTL': 0,
+    'MAILUP_CACHE_MAXSIZE': 256,
+    'MAILUP_CACHE_PATH': None,
+    'MAILUP_COALESCE_REQUESTS': True,
 }
 
+# "send" endpoints: Console ".../Send", ".../Sendings/..." urls and SEND_MESSAGE_END_POINT
+_send_url_pattern = re.compile(r'/(Send|Sendings|sendmessage)(/|\?|$)')
+
 
 class MailUpClient(object):
 
@@ -39,7 +83,10 @@ class MailUpClient(object):
     # MAILUP CONFIGURATION
     configuration_dict = _initial_client_configuration
 
-    def __init__(self, client_id, client_secret, username, password, logger_enabled=False):
+    def __init__(
+        self, client_id, client_secret, username, password, logger_enabled=False, transport=None, retry_policy=None,
+        rate_limiter=None, token_store=None, response_cache=None,
+    ):
         # Init Logger
         self.logger = LoggerSingleton()
         if not logger_enabled:
@@ -50,9 +97,90 @@ class MailUpClient(object):
         self.configuration['MAILUP_USERNAME'] = username
         self.configuration['MAILUP_PASSWORD'] = password
 
+        # Init HTTP transport: shared by all calls (token calls too) to reuse keep-alive connections
+        self.transport = transport or self.build_transport()
+        self.retry_policy = retry_policy or self.build_retry_policy()
+        self.rate_limiter = rate_limiter or self.build_rate_limiter()
+        self.token_store = token_store or self.build_token_store()
+        self.response_cache = response_cache or self.build_response_cache()
+        # identical GETs of concurrent threads share one call
+        self.single_flight = SingleFlight() if self.configuration['MAILUP_COALESCE_REQUESTS'] else None
+
+        # Token state is shared by all threads using the client: changes are done holding token_lock.
+        # The token is retrieved (or loaded from token_store) on the first call.
+        self.token_lock = threading.RLock()
         self.access_token = None
         self.refreshed_token = None
-        self.retrieve_access_token()
+        self.token_expires_at = None
+        self._token_timer = None
+
+        # threads of the concurrent calls of providers, started on first use
+        self._executor = None
+        self._executor_pid = None
+        self._executor_lock = threading.Lock()
+
+    def build_transport(self):
+        return MailUpTransport(
+            pool_connections=self.configuration['MAILUP_POOL_CONNECTIONS'],
+            pool_maxsize=self.configuration['MAILUP_POOL_MAXSIZE'],
+            pool_block=self.configuration['MAILUP_POOL_BLOCK'],
+            keep_alive=self.configuration['MAILUP_KEEP_ALIVE'],
+            connect_timeout=self.configuration['MAILUP_CLIENT_CONNECT_TIMEOUT'],
+            read_timeout=self.configuration['MAILUP_CLIENT_TIMEOUT'],
+        )
+
+    def build_retry_policy(self):
+        return RetryPolicy(
+            attempts=self.configuration['MAILUP_CLIENT_ATTEMPTS'],
+            backoff_base=self.configuration['MAILUP_CLIENT_ATTEMPT_WAIT'],
+            backoff_cap=self.configuration['MAILUP_CLIENT_TIMEOUT_403'],
+            jitter=self.configuration['MAILUP_RETRY_JITTER'],
+        )
+
+    def build_rate_limiter(self):
+        if not self.configuration['MAILUP_RATE_LIMITS']:
+            return None
+        return RateLimiter.from_configuration(
+            self.configuration['MAILUP_RATE_LIMITS'],
+            path=self.configuration['MAILUP_RATE_LIMIT_PATH'],
+        )
+
+    def build_token_store(self):
+        backend = self.configuration['MAILUP_TOKEN_STORE']
+        path = self.configuration['MAILUP_TOKEN_STORE_PATH']
+        if not backend:
+            return None
+        if backend not in ('file', 'sqlite'):
+            raise exceptions.InvalidConfigurationException({'MAILUP_TOKEN_STORE': backend})
+        if not path:
+            # a token store without path can not be shared
+            raise exceptions.InvalidConfigurationException({'MAILUP_TOKEN_STORE_PATH': path})
+        if backend == 'sqlite':
+            return SQLiteTokenStore(path)
+        return FileTokenStore(path)
+
+    def build_response_cache(self):
+        if not self.configuration['MAILUP_CACHE_TTL']:
+            return None
+        return ResponseCache(
+            ttl=self.configuration['MAILUP_CACHE_TTL'],
+            maxsize=self.configuration['MAILUP_CACHE_MAXSIZE'],
+            path=self.configuration['MAILUP_CACHE_PATH'],
+        )
+
+    @property
+    def executor(self):
+        """
+        ThreadPoolExecutor of MAILUP_MAX_WORKERS threads shared by the concurrent calls of the client providers,
+        rebuilt after a fork
+        """
+        pid = os.getpid()
+        if self._executor is None or self._executor_pid != pid:
+            with self._executor_lock:
+                if self._executor is None or self._executor_pid != pid:
+                    self._executor = ThreadPoolExecutor(max_workers=self.configuration['MAILUP_MAX_WORKERS'])
+                    self._executor_pid = pid
+        return self._executor
 
     @property
     def configuration(self):
@@ -126,7 +254,62 @@ class MailUpClient(object):
     def client_secret(self, value):
         self.configuration['MAILUP_CLIENT_SECRET'] = value
 
+    def close(self):
+        """
+        Close pooled connections and stop the background token refresh
+        """
+        self.cancel_token_refresh()
+        self.transport.close()
+        with self._executor_lock:
+            if self._executor is not None and self._executor_pid == os.getpid():
+                self._executor.shutdown(wait=False)
+            self._executor = None
+            self._executor_pid = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
     # SUPPORT METHODS
+    def get_endpoint_kind(self, url):
+        """
+        Kind of endpoint used by rate_limiter: "send", "statistics", "console" or None
+        """
+        if url.startswith(self.send_mail_endpoint) or _send_url_pattern.search(url):
+            return 'send'
+        if url.startswith(self.mail_statistics_endpoint):
+            return 'statistics'
+        if url.startswith(self.console_endpoint):
+            return 'console'
+        return None
+
+    def get_cache_key(self, url, params=None, page_size=None, page_number=0, limit=None, paginate=True):
+        return json.dumps([
+            self.token_store_key,
+            url,
+            sorted((params or {}).items()),
+            page_size or self.configuration_dict['MAILUP_DEFAULT_PAGE_SIZE'],
+            page_number,
+            limit,
+            paginate,
+        ])
+
+    @staticmethod
+    def get_cache_scope(url):
+        """
+        Cache entries removed by a write call on "url": the first two segments of the Console path, so a write on
+        ".../Console/List/5/Group/7" removes the cached reads of list 5 (".../Console/List/5/Groups",
+        ".../Console/List/5/Tags", ...) and a write on ".../Console/User/List/5" the cached ".../Console/User/Lists".
+        Plural segments are made singular to match reads and writes.
+        """
+        path = url.split('?')[0]
+        head, sep, tail = path.partition('/Console/')
+        if not sep:
+            return path
+        return '/'.join(segment[:-1] if segment.endswith('s') else segment for segment in tail.split('/')[:2])
+
     def get_headers(self):
         return {
             "Content-Type": "application/json",
@@ -136,25 +319,267 @@ class MailUpClient(object):
             ),
         }
 
+    def authorize_headers(self, headers):
+        """
+        Headers are built before the call: the "Bearer" token they contain is replaced with the current one
+        """
+        if not self.is_authorized(headers):
+            return headers
+        return dict(headers, Authorization="Bearer {access_token}".format(access_token=self.access_token))
+
+    @staticmethod
+    def is_authorized(headers):
+        return bool(headers) and str(headers.get('Authorization')).startswith('Bearer')
+
     def call_handler(
         self, method, url, data=None, params=None, headers=None, cookies=None, attempts=None, timeout=None,
-        page_size=None, page_number=0,
+        page_size=None, page_number=0, stream=False, parallel=None, retry_safe=False, cache=False, limit=None,
+        paginate=True, raise_errors=False,
     ):
-        attempts = attempts or self.configuration_dict['MAILUP_CLIENT_ATTEMPTS']
-        timeout = timeout or self.configuration_dict['MAILUP_CLIENT_TIMEOUT']
-        page_size = page_size or self.configuration_dict['MAILUP_DEFAULT_PAGE_SIZE']
+        """
+        Call MailUp and return the json response.
+        Paginated responses are read until the last page and the "Items" of all pages are merged in the first one.
+
+        :param stream: if True a generator of "Items" is returned (see iter_items) and pages are requested on demand
+        :param parallel: if True pages after the first one are requested concurrently (see iter_pages)
+        :param retry_safe: if True the call is repeated after a timeout even if method is not idempotent
+        :param cache: if True a GET response is read from (and stored in) response_cache; calls with other methods
+                      always remove the cached responses of their scope (see get_cache_scope)
+        :param limit: max number of "Items" returned, pages are not requested once "limit" items have been read
+                      (page_size is reduced to "limit" if greater)
+        :param paginate: if False only page "page_number" is requested and returned, with its "TotalElementsCount"
+        :param raise_errors: if True a failed call raises MailUpCallError (with the response status_code and text)
+                             instead of returning None
+
+        Concurrent GETs with the same url, params and token (MAILUP_COALESCE_REQUESTS) share a single call, each
+        caller receives its own copy of the response.
+        """
+        if limit:
+            page_size = min(page_size or self.configuration_dict['MAILUP_DEFAULT_PAGE_SIZE'], limit)
+        kwargs = dict(
+            data=data, params=params, headers=headers, cookies=cookies, attempts=attempts, timeout=timeout,
+            page_size=page_size, page_number=page_number, parallel=parallel, retry_safe=retry_safe, limit=limit,
+            raise_errors=raise_errors,
+        )
+        if stream:
+            return self.iter_items(method, url, **kwargs)
+
+        kwargs['paginate'] = paginate
+        if method.upper() != 'GET':
+            return self.read_response(method, url, **kwargs)
+
+        cache_key = None
+        if cache and self.response_cache is not None:
+            cache_key = self.get_cache_key(url, params, page_size, page_number, limit, paginate)
+            mailup_response = self.response_cache.get(cache_key)
+            if mailup_response is not None:
+                return mailup_response
+
+        if self.single_flight is None:
+            return self.read_response(method, url, cache_key=cache_key, **kwargs)
+        flight_key = (
+            self.get_cache_key(url, params, page_size, page_number, limit, paginate),
+            (headers or {}).get('Authorization'),
+        )
+        return self.single_flight.do(flight_key, self.read_response, method, url, cache_key=cache_key, **kwargs)
+
+    def read_response(
+        self, method, url, data=None, params=None, headers=None, cookies=None, attempts=None, timeout=None,
+        page_size=None, page_number=0, parallel=None, retry_safe=False, cache_key=None, limit=None, paginate=True,
+        raise_errors=False,
+    ):
+        """
+        Json response of call_handler: all pages merged (up to "limit" items), stored in response_cache with
+        "cache_key"
+        """
+        mailup_response = None
+        for r_json in self.iter_pages(
+            method, url, data=data, params=params, headers=headers, cookies=cookies, attempts=attempts,
+            timeout=timeout, page_size=page_size, page_number=page_number, parallel=parallel,
+            retry_safe=retry_safe, raise_errors=raise_errors,
+        ):
+            if mailup_response is None:
+                mailup_response = r_json
+            else:
+                mailup_response['Items'].extend(r_json['Items'])
+            if not paginate or (limit and self.truncate_items(mailup_response, limit)):
+                # closing iter_pages: next pages are not requested
+                break
+
+        if self.response_cache is not None:
+            if cache_key is not None and mailup_response is not None:
+                self.response_cache.set(cache_key, self.get_cache_scope(url), mailup_response)
+            elif method.upper() != 'GET':
+                self.response_cache.invalidate(self.get_cache_scope(url))
+        return mailup_response
+
+    def iter_pages(
+        self, method, url, data=None, params=None, headers=None, cookies=None, attempts=None, timeout=None,
+        page_size=None, page_number=0, parallel=None, retry_safe=False, raise_errors=False,
+    ):
+        """
+        Generator of MailUp json responses, one for each page.
+        The first response is always returned, next pages only while they contain "Items".
 
+        Once the first page is read its "TotalElementsCount" tells how many pages exist: no further call is done
+        after the last one and, if parallel is True (default MAILUP_PARALLEL_PAGINATION), the remaining pages
+        are requested by MAILUP_MAX_WORKERS threads and returned in order.
+        """
+        page_size = page_size or self.configuration_dict['MAILUP_DEFAULT_PAGE_SIZE']
+        if parallel is None:
+            parallel = self.configuration_dict['MAILUP_PARALLEL_PAGINATION']
 
         # PARAMS FOR RESPONSE LIB
-        if params is None:
-            params = {}
+        params = dict(params or {})
         params["PageNumber"] = page_number
         params["PageSize"] = page_size
 
-        mailup_response = None
+        first_page = True
+        while True:
+            r_json = self.request_page(
+                method, url, data=data, params=params, headers=headers, cookies=cookies, attempts=attempts,
+                timeout=timeout, retry_safe=retry_safe, raise_errors=raise_errors,
+            )
+            if r_json is None:
+                break
+
+            has_items = type(r_json) is dict and type(r_json.get('Items')) is list and len(r_json['Items']) > 0
+            if first_page or has_items:
+                yield r_json
+            if not has_items:
+                break
+
+            last_page_number = self.get_last_page_number(r_json)
+            if last_page_number is not None and params["PageNumber"] >= last_page_number:
+                break
+
+            if first_page and parallel and last_page_number is not None:
+                for r_json in self.prefetch_pages(
+                    method, url, range(params["PageNumber"] + 1, last_page_number + 1), data=data, params=params,
+                    headers=headers, cookies=cookies, attempts=attempts, timeout=timeout, retry_safe=retry_safe,
+                    raise_errors=raise_errors,
+                ):
+                    if type(r_json) is not dict or not r_json.get('Items'):
+                        break
+                    yield r_json
+                break
+
+            first_page = False
+            params = dict(params, PageNumber=params["PageNumber"] + 1)
+
+    @staticmethod
+    def get_last_page_number(r_json):
+        """
+        Number of the last page of a paginated response, None if the response does not tell it
+        """
+        total = r_json.get('TotalElementsCount')
+        page_size = r_json.get('PageSize')
+        if not isinstance(total, int) or not isinstance(page_size, int) or page_size <= 0:
+            return None
+        return max(int(math.ceil(total / float(page_size))) - 1, 0)
+
+    def prefetch_pages(
+        self, method, url, page_numbers, data=None, params=None, headers=None, cookies=None, attempts=None,
+        timeout=None, retry_safe=False, raise_errors=False,
+    ):
+        """
+        Generator of the json responses of "page_numbers" in order, pages are requested concurrently.
+        At most 2 * MAILUP_MAX_WORKERS pages are kept in memory waiting to be consumed.
+        """
+        max_workers = self.configuration_dict['MAILUP_MAX_WORKERS']
+        page_numbers = iter(page_numbers)
+        pending = []
+
+        def submit_next(executor):
+            for number in page_numbers:
+                pending.append(executor.submit(
+                    self.request_page, method, url, data=data, params=dict(params, PageNumber=number),
+                    headers=headers, cookies=cookies, attempts=attempts, timeout=timeout, retry_safe=retry_safe,
+                    raise_errors=raise_errors,
+                ))
+                return True
+            return False
+
+        executor = ThreadPoolExecutor(max_workers=max_workers)
+        try:
+            while len(pending) < 2 * max_workers and submit_next(executor):
+                pass
+            while pending:
+                r_json = pending.pop(0).result()
+                submit_next(executor)
+                yield r_json
+        finally:
+            # generator closed before the end: pages not started yet are not requested
+            for future in pending:
+                future.cancel()
+            executor.shutdown(wait=False)
+
+    def iter_items(
+        self, method, url, data=None, params=None, headers=None, cookies=None, attempts=None, timeout=None,
+        page_size=None, page_number=0, parallel=None, retry_safe=False, raise_errors=False, limit=None,
+    ):
+        """
+        Generator of "Items" of a paginated MailUp response, next page is requested only when the previous one
+        has been consumed (unless parallel is True). The generator stops after "limit" items.
+        """
+        count = 0
+        for r_json in self.iter_pages(
+            method, url, data=data, params=params, headers=headers, cookies=cookies, attempts=attempts,
+            timeout=timeout, page_size=page_size, page_number=page_number, parallel=parallel,
+            retry_safe=retry_safe, raise_errors=raise_errors,
+        ):
+            if type(r_json) is dict:
+                for item in r_json.get('Items') or []:
+                    yield item
+                    count += 1
+                    if limit and count >= limit:
+                        return
+
+    def count_items(self, r_json):
+        """
+        "TotalElementsCount" of a paginated response (count_ methods read a single item to get it),
+        None if the call failed
+        """
+        if type(r_json) is not dict:
+            return None
+        return r_json.get('TotalElementsCount')
+
+    @staticmethod
+    def truncate_items(r_json, limit):
+        """
+        Keep the first "limit" items of a json response
+
+        :return: True if "limit" items have been reached
+        """
+        if type(r_json) is not dict or type(r_json.get('Items')) is not list:
+            return False
+        del r_json['Items'][limit:]
+        return len(r_json['Items']) >= limit
+
+    def request_page(
+        self, method, url, data=None, params=None, headers=None, cookies=None, attempts=None, timeout=None,
+        retry_safe=False, raise_errors=False,
+    ):
+        """
+        Single MailUp call, repeated according to retry_policy (on 401 the token is refreshed)
+
+        :return: the json response, None if the response is empty or an error occurred (MailUpCallError is raised
+                 instead if raise_errors is True)
+        """
+        attempts = attempts or self.retry_policy.attempts
+        timeout = timeout or self.configuration_dict['MAILUP_CLIENT_TIMEOUT']
+
+        if self.is_authorized(headers):
+            # the token is refreshed before it expires, instead of waiting for a 401
+            self.ensure_token()
+            headers = self.authorize_headers(headers)
 
         # CALL
-        while attempts > 0:
+        attempt = 0
+        while attempt < attempts:
+            attempt += 1
+            backoff = None
+            response = None
             try:
                 self.logger.debug("""Calling url "{url}" in {method} with:
                 data = {data}
@@ -168,107 +593,255 @@ class MailUpClient(object):
                     headers=headers,
                     cookies=cookies
                 ))
+                if self.rate_limiter is not None:
+                    self.rate_limiter.acquire(self.get_endpoint_kind(url))
                 response = self.do_call(
-                    method, url, data=data, params=params, headers=headers, cookies=cookies,
-                    timeout=timeout, attempts=attempts
+                    method, url, data=data, params=params, headers=headers, cookies=cookies, timeout=timeout,
                 )
             except exceptions.MailUpCallError:
-                self.logger.critical("MailUp does not respond")
-                break
-
-            self.logger.debug('HTTP response: {response}'.format(response=response))
-
-            # 200: success
-            if response.status_code == 200:
-                if not response.content:
-                    # Any API like delete group return None if OK
-                    return None
-                r_json = response.json()
-                if not mailup_response:
-                    mailup_response = r_json
-                else:
-                    if 'Items' in r_json and len(r_json['Items']):
-                        mailup_response['Items'] = mailup_response.get('Items', []) + r_json.get('Items', [])
-                    else:
-                        break
-                try:
-                    if type(mailup_response) is dict:
-                        if 'Items' in mailup_response and type(mailup_response['Items']) is list and len(mailup_response['Items']):
-                            params["PageNumber"] += 1
-                            continue
-                        else:
-                            break
-                    else:
-                        break
-                except TypeError:
+                if not self.retry_policy.is_retryable(method, safe=retry_safe):
+                    self.logger.critical("MailUp does not respond, {method} is not repeated".format(
+                        method=method.upper()
+                    ))
                     break
+                backoff = self.retry_policy.get_backoff(attempt)
+            else:
+                self.logger.debug('HTTP response: {response}'.format(response=response))
+
+                # 200: success
+                if response.status_code == 200:
+                    if not response.content:
+                        # Any API like delete group return None if OK
+                        return None
+                    return response.json()
+
+                # 401: unauthorised
+                elif response.status_code == 401:
+                    self.logger.error('Response status 401')
+                    if not self.is_authorized(headers):
+                        # token request refused: refreshing the token would call it again
+                        break
+                    self.refresh_token(used_token=headers['Authorization'][len('Bearer '):])
+                    headers = self.authorize_headers(headers)
 
-            # 401: unauthorised
-            elif response.status_code == 401:
-                self.logger.error('Response status 401')
-                self.refresh_token()
-                headers = self.get_headers()
-                # if "Authorization" in headers and headers["Authorization"].startswith("Bearer"):
-                #     headers["Authorization"] = "Bearer {access_token}".format(
-                #         access_token=self.access_token
-                #     )
-
-            elif response.status_code == 403:
-                self.logger.error('Response status 403: {}'.format(response.content))
-                self.logger.error('waiting {} seconds. You probably have just created a list and MailUp is not ready yet'.format(
-                    self.configuration_dict['MAILUP_CLIENT_TIMEOUT_403'])
-                )
-                time.sleep(self.configuration_dict['MAILUP_CLIENT_TIMEOUT_403'])
+                elif self.retry_policy.is_retryable(method, response.status_code, safe=retry_safe):
+                    self.logger.error('Response status {}: {}'.format(response.status_code, response.content))
+                    if response.status_code == 403:
+                        self.logger.error('You probably have just created a list and MailUp is not ready yet')
+                    backoff = self.retry_policy.get_backoff(attempt, response)
 
-            elif response.status_code == 404:
-                self.logger.error('Response status 404')
-                break
+                elif response.status_code == 404:
+                    self.logger.error('Response status 404')
+                    break
 
-            elif response.status_code == 500:
-                self.logger.error('HTTP request error: {}'.format(response.reason))
-                break
-            else:
-                # Other error
-                error_message = response.text.replace('\\\'', '"').replace('\'', '"')
-                self.logger.error('HTTP request error: {}'.format(error_message))
-                break
+                elif response.status_code == 500:
+                    self.logger.error('HTTP request error: {}'.format(response.reason))
+                    break
+                else:
+                    # Other error
+                    error_message = response.text.replace('\\\'', '"').replace('\'', '"')
+                    self.logger.error('HTTP request error: {}'.format(error_message))
+                    break
 
-            attempts -= 1
             self.logger.warning('Attempts remaining: {attempts}/{tot_attempt}'.format(
-                attempts=attempts,
-                tot_attempt=self.configuration_dict['MAILUP_CLIENT_ATTEMPTS']
+                attempts=attempts - attempt,
+                tot_attempt=attempts,
             ))
+            if backoff and attempt < attempts:
+                self.logger.warning('Recalling API after {:.1f} seconds'.format(backoff))
+                time.sleep(backoff)
+        else:
+            self.logger.critical('Max attempts exceeded calling {url}'.format(url=url))
+        if raise_errors:
+            raise self.get_call_error(url, response)
+        return None
 
-        return mailup_response
+    @staticmethod
+    def get_call_error(url, response):
+        """
+        MailUpCallError of a failed call, "response" is the last one received (None if MailUp did not respond)
+        """
+        if response is None:
+            return exceptions.MailUpCallError('MailUp does not respond calling {}'.format(url), write_log=False)
+        return exceptions.MailUpCallError(
+            'Response status {} calling {}: {}'.format(response.status_code, url, response.text),
+            write_log=False,
+            status_code=response.status_code,
+            response_text=response.text,
+        )
 
     def do_call(
         self, method, url, data=None, params=None, headers=None, cookies=None, attempts=1,
         timeout=None
     ):
-        timeout = timeout or self.configuration_dict['MAILUP_CLIENT_ATTEMPT_WAIT']
-        for i in range(0, attempts):
+        """
+        HTTP call: network errors (timeout, connection error) are repeated "attempts" times for idempotent methods
+        """
+        timeout = timeout or self.configuration_dict['MAILUP_CLIENT_TIMEOUT']
+        for i in range(1, attempts + 1):
             try:
-                response = getattr(requests, method.lower())(
-                    url, data=data, params=params, headers=headers, cookies=cookies,
-                    timeout=self.configuration_dict['MAILUP_CLIENT_TIMEOUT']
+                response = self.transport.request(
+                    method, url, data=data, params=params, headers=headers, cookies=cookies,
+                    timeout=timeout,
                 )
                 return response
-            except requests.exceptions.Timeout:
+            except (requests.exceptions.Timeout, requests.exceptions.ConnectionError) as e:
+                # a pooled keep-alive connection closed by MailUp raises ConnectionError
                 self.logger.error(
-                    'ERROR during attempt {}/{}: MailUpRequest Timeout'.format(i+1, attempts)
+                    'ERROR during attempt {}/{}: MailUpRequest {}'.format(i, attempts, e.__class__.__name__)
                 )
-                if i != attempts:
-                    self.logger.error(
-                        'Recalling API after {} seconds'.format(self.configuration_dict['MAILUP_CLIENT_ATTEMPT_WAIT'])
-                    )
-                time.sleep(self.configuration_dict['MAILUP_CLIENT_ATTEMPT_WAIT'])
+                if i == attempts or not self.retry_policy.is_retryable(method):
+                    break
+                backoff = self.retry_policy.get_backoff(i)
+                self.logger.error('Recalling API after {:.1f} seconds'.format(backoff))
+                time.sleep(backoff)
         raise exceptions.MailUpCallError('Max attempts exceeded')
 
+    def has_credentials(self):
+        return bool(self.access_token or (
+            self.client_id and self.client_secret and
+            self.configuration['MAILUP_USERNAME'] and self.configuration['MAILUP_PASSWORD']
+        ))
+
+    def ensure_token(self):
+        """
+        Load (from token_store) or retrieve the access token if missing, refresh it if it is going to expire within
+        MAILUP_TOKEN_REFRESH_MARGIN
+        """
+        if not self.access_token:
+            with self.lock_token():
+                if not self.access_token and not self.load_token():
+                    self.request_token(*self.get_access_token_request(), retry_safe=True)
+        if self.is_token_expiring():
+            self.refresh_token(if_expiring=True)
+
+    @contextlib.contextmanager
+    def lock_token(self):
+        """
+        Lock the token state of the client and, with a token_store, of all the processes using the same account
+        """
+        with self.token_lock:
+            if self.token_store is None:
+                yield
+            else:
+                with self.token_store.lock(self.token_store_key):
+                    yield
+
+    @property
+    def token_store_key(self):
+        return TokenStore.get_key(self.client_id, self.configuration['MAILUP_USERNAME'])
+
+    def load_token(self):
+        """
+        Use the token of token_store if it has been changed by another process
+
+        :return: True if a new token has been loaded
+        """
+        if self.token_store is None:
+            return False
+        token = self.token_store.load(self.token_store_key)
+        if not token or not token.get('access_token') or token['access_token'] == self.access_token:
+            return False
+        self.access_token = token['access_token']
+        self.refreshed_token = token['refresh_token']
+        self.token_expires_at = token.get('expires_at')
+        self.logger.debug('Access token loaded from token store')
+        self.schedule_token_refresh()
+        return True
+
+    def save_token(self):
+        if self.token_store is None:
+            return
+        self.token_store.save(self.token_store_key, {
+            'access_token': self.access_token,
+            'refresh_token': self.refreshed_token,
+            'expires_at': self.token_expires_at,
+        })
+
+    def is_token_expiring(self):
+        if self.token_expires_at is None:
+            return False
+        return time.time() >= self.token_expires_at - self.configuration['MAILUP_TOKEN_REFRESH_MARGIN']
+
+    def request_token(self, url, params, headers, retry_safe=False):
+        """
+        Call the token endpoint and store the new token
+
+        :return: the json response, None if the request failed
+        """
+        rest_request_json = self.call_handler("POST", url, params=params, headers=headers, retry_safe=retry_safe)
+        if rest_request_json:
+            with self.lock_token():
+                self.set_token(rest_request_json)
+                self.save_token()
+            self.schedule_token_refresh()
+        return rest_request_json
+
     def retrieve_access_token(self):
         """
         Use credential settings to initialize "accessToken" and "refreshToken"
         """
-        self.logger.debug('Retrieving access token...')
+        with self.lock_token():
+            self.logger.debug('Retrieving access token...')
+            # password grant can be safely repeated
+            if self.request_token(*self.get_access_token_request(), retry_safe=True):
+                self.logger.debug('Access token retrieved')
+
+    def refresh_token(self, used_token=None, if_expiring=False):
+        """
+        Refresh "accessToken" and "refreshToken".
+        Threads refreshing the same token wait for a single refresh: "used_token" is the token a call has been
+        refused with, if the current one is different it has already been refreshed. With "if_expiring" the token is
+        refreshed only if it is still expiring once the lock is taken (ensure_token).
+        """
+        used_token = used_token or self.access_token
+        with self.lock_token():
+            if self.access_token != used_token:
+                return
+            if if_expiring and not self.is_token_expiring():
+                # refreshed by another thread while waiting for the lock
+                return
+            if self.load_token() and not self.is_token_expiring():
+                # refreshed by another process
+                return
+            self.logger.debug('Refreshing token...')
+            if self.request_token(*self.get_refresh_token_request()):
+                self.logger.debug('Token refreshed')
+            else:
+                # refresh token expired: a new token is requested with credentials
+                self.logger.warning('Token refresh failed, retrieving a new access token')
+                self.request_token(*self.get_access_token_request(), retry_safe=True)
+
+    def schedule_token_refresh(self):
+        """
+        Refresh the token in a background thread MAILUP_TOKEN_REFRESH_MARGIN seconds before it expires
+        """
+        if not self.configuration['MAILUP_TOKEN_BACKGROUND_REFRESH'] or self.token_expires_at is None:
+            return
+        delay = self.token_expires_at - self.configuration['MAILUP_TOKEN_REFRESH_MARGIN'] - time.time()
+        timer = threading.Timer(max(delay, 0), self.background_refresh_token)
+        timer.daemon = True
+        with self.token_lock:
+            self.cancel_token_refresh()
+            self._token_timer = timer
+        timer.start()
+
+    def cancel_token_refresh(self):
+        timer, self._token_timer = self._token_timer, None
+        if timer is not None:
+            timer.cancel()
+
+    def background_refresh_token(self):
+        try:
+            self.refresh_token()
+        except Exception as e:
+            # the token will be refreshed by the next call
+            self.logger.error('Background token refresh failed: {}'.format(e))
+
+    def get_access_token_request(self):
+        """
+        :return: url, params and headers of the "password" grant request
+        """
         url = self.token_endpoint
         params = {
             "grant_type": "password",
@@ -280,19 +853,18 @@ class MailUpClient(object):
         headers = {
             'content-type': 'application/x-www-form-urlencoded',
             'Authorization': "Basic {access_token}".format(
-                access_token=base64.b64encode(self.client_id+":"+self.client_secret),
+                access_token=self.get_basic_credentials(),
             )
         }
-        rest_request_json = self.call_handler("POST", url, params=params, headers=headers)
-        self.access_token = rest_request_json["access_token"]
-        self.refreshed_token = rest_request_json["refresh_token"]
-        self.logger.debug('Access token retrieved')
+        return url, params, headers
 
-    def refresh_token(self):
+    def get_basic_credentials(self):
+        return base64.b64encode(self.client_id+":"+self.client_secret)
+
+    def get_refresh_token_request(self):
         """
-        Refresh "accessToken" and "refreshToken"
+        :return: url, params and headers of the "refresh_token" grant request
         """
-        self.logger.debug('Refreshing token...')
         url = self.token_endpoint
         params = {
             "grant_type": "refresh_token",
@@ -303,10 +875,13 @@ class MailUpClient(object):
         headers = {
             'content-type': 'application/x-www-form-urlencoded',
         }
-        rest_request_json = self.call_handler("POST", url, params=params, headers=headers)
+        return url, params, headers
+
+    def set_token(self, rest_request_json):
         self.access_token = rest_request_json["access_token"]
         self.refreshed_token = rest_request_json["refresh_token"]
-        self.logger.debug('Token refreshed')
+        expires_in = rest_request_json.get("expires_in")
+        self.token_expires_at = time.time() + int(expires_in) if expires_in else None
 
     def read_authentication_info(self, **kwargs):
         """
@@ -351,12 +926,16 @@ class MailUpClient(object):
         )
         return call_response
 
-    def read_lists(self, filters=None, **kwargs):
+    def read_lists(self, filters=None, order_by=None, **kwargs):
         url = self.console_endpoint + "/Console/User/Lists"
-        params = utils.filters_to_querystring(filters)
+        params = utils.filters_to_querystring(filters, order_by)
+        kwargs.setdefault('cache', True)
         call_response = self.call_handler("GET", url, params=params, headers=self.get_headers(), **kwargs)
         return call_response
 
+    def count_lists(self, filters=None, **kwargs):
+        return self.count_items(self.read_lists(filters=filters, limit=1, **kwargs))
+
     # GROUP
     def create_group(self, list_id, data_dict, **kwargs):
         """
@@ -383,14 +962,18 @@ class MailUpClient(object):
         )
         return call_response
 
-    def read_groups(self, list_id, filters=None, **kwargs):
+    def read_groups(self, list_id, filters=None, order_by=None, **kwargs):
         url = self.console_endpoint + "/Console/List/{list_id}/Groups".format(
             list_id=list_id,
         )
-        params = utils.filters_to_querystring(filters)
+        params = utils.filters_to_querystring(filters, order_by)
+        kwargs.setdefault('cache', True)
         call_response = self.call_handler("GET", url, params=params, headers=self.get_headers(), **kwargs)
         return call_response
 
+    def count_groups(self, list_id, filters=None, **kwargs):
+        return self.count_items(self.read_groups(list_id, filters=filters, limit=1, **kwargs))
+
     def delete_group(self, list_id, group_id, **kwargs):
         url = self.console_endpoint + "/Console/List/{list_id}/Group/{group_id}".format(
             list_id=list_id,
@@ -474,7 +1057,7 @@ class MailUpClient(object):
     ):
         """
         :param list_id:
-        :param list_data_dict:
+        :param list_data_dict: list of recipient data dicts or a RecipientBatch
         :param confirm_email: ConfirmEmail=true: if specified, sets the new recipients status to "Pending", and a
                confirmation email is generated (but not yet sent).
         :return:
@@ -488,7 +1071,7 @@ class MailUpClient(object):
         else:
             params = {}
         call_response = self.call_handler(
-            "POST", url, data=json.dumps(list_data_dict), headers=self.get_headers(), params=params, **kwargs
+            "POST", url, data=json.dumps(to_import_data(list_data_dict)), headers=self.get_headers(), params=params, **kwargs
         )
         return call_response
 
@@ -498,7 +1081,7 @@ class MailUpClient(object):
             import_type=import_type,
         )
         call_response = self.call_handler(
-            "POST", url, data=json.dumps(list_data_dict), headers=self.get_headers(), **kwargs
+            "POST", url, data=json.dumps(to_import_data(list_data_dict)), headers=self.get_headers(), **kwargs
         )
         return call_response
 
@@ -514,7 +1097,7 @@ class MailUpClient(object):
         else:
             params = {}
         call_response = self.call_handler(
-            "POST", url, data=json.dumps(list_data_dict), headers=self.get_headers(), params=params, **kwargs
+            "POST", url, data=json.dumps(to_import_data(list_data_dict)), headers=self.get_headers(), params=params, **kwargs
         )
         return call_response
 
@@ -524,16 +1107,17 @@ class MailUpClient(object):
             import_type=import_type,
         )
         call_response = self.call_handler(
-            "POST", url, data=json.dumps(list_data_dict), headers=self.get_headers(), **kwargs
+            "POST", url, data=json.dumps(to_import_data(list_data_dict)), headers=self.get_headers(), **kwargs
         )
         return call_response
 
     def get_recipient_dynamic_field(self, **kwargs):
         url = self.console_endpoint + "/Console/Recipient/DynamicFields"
+        kwargs.setdefault('cache', True)
         call_response = self.call_handler("GET", url, headers=self.get_headers(), **kwargs)
         return call_response
 
-    def get_recipients(self, list_id, status, filters=None, **kwargs):
+    def get_recipients(self, list_id, status, filters=None, order_by=None, **kwargs):
         filters = filters or dict()
         url = None
         if status.lower() == 'subscribed':
@@ -550,10 +1134,16 @@ class MailUpClient(object):
             )
         if not url:
             raise exceptions.InvalidRecipientStatusException(status)
-        params = utils.filters_to_querystring(filters)
+        params = utils.filters_to_querystring(filters, order_by)
         call_response = self.call_handler("GET", url, params=params, headers=self.get_headers(), **kwargs)
         return call_response
 
+    def count_recipients(self, list_id, status, filters=None, **kwargs):
+        """
+        Number of recipients of list "list_id" in "status" matching "filters", with a single call
+        """
+        return self.count_items(self.get_recipients(list_id, status, filters=filters, limit=1, **kwargs))
+
     def get_subscribe_recipients_to_list(self, list_id, recipient_id=None, email=None, **kwargs):
         self.logger.warning('Client method "get_subscribe_recipients_to_list" is deprecated, use get_recipients')
         url = self.console_endpoint + "/Console/List/{list_id}/Recipients/Subscribed".format(
@@ -628,6 +1218,9 @@ class MailUpClient(object):
         call_response = self.call_handler("GET", url, headers=self.get_headers(), **kwargs)
         return call_response
 
+    def count_group_members(self, group_id, **kwargs):
+        return self.count_items(self.get_belong_recipients_to_group(group_id, limit=1, **kwargs))
+
     # IMPORT
     def read_import_status(self, import_id, **kwargs):
         url = self.console_endpoint + "/Console/Import/{import_id}".format(
@@ -669,8 +1262,8 @@ class MailUpClient(object):
         )
         return call_response
 
-    def list_messages(self, list_id, status=None, filters=None, **kwargs):
-        params = utils.filters_to_querystring(filters)
+    def list_messages(self, list_id, status=None, filters=None, order_by=None, **kwargs):
+        params = utils.filters_to_querystring(filters, order_by)
         if not status:
             url = self.console_endpoint + "/Console/List/{list_id}/Emails".format(
                 list_id=list_id,
@@ -684,11 +1277,15 @@ class MailUpClient(object):
         call_response = self.call_handler("GET", url, params=params, headers=self.get_headers(), **kwargs)
         return call_response
 
+    def count_messages(self, list_id, status=None, filters=None, **kwargs):
+        return self.count_items(self.list_messages(list_id, status=status, filters=filters, limit=1, **kwargs))
+
     def read_message_detail(self, list_id, message_id, **kwargs):
         url = self.console_endpoint + "/Console/List/{list_id}/Email/{message_id}".format(
             list_id=list_id,
             message_id=message_id,
         )
+        kwargs.setdefault('cache', True)
         call_response = self.call_handler("GET", url, headers=self.get_headers(), **kwargs)
         return call_response
 
@@ -764,11 +1361,10 @@ class MailUpClient(object):
         return call_response
 
     # TAG
-    def list_tags(self, list_id, tag_id=None, tag_name=None, **kwargs):
+    def list_tags(self, list_id, tag_id=None, tag_name=None, filters=None, order_by=None, **kwargs):
         url = self.console_endpoint + "/Console/List/{list_id}/Tags".format(
             list_id=list_id,
         )
-        params = None
         filter_string = ''
         if tag_id:
             filter_string = "idTag=={tag_id}".format(tag_id=tag_id)
@@ -778,13 +1374,15 @@ class MailUpClient(object):
             filter_string += "Name=='{tag_name}'".format(
                 tag_name=tag_name,
             )
-        if filter_string:
-            params = {
-                "filterby": filter_string,
-            }
+        # "filters" replaces tag_id and tag_name
+        params = utils.filters_to_querystring(filters or filter_string, order_by) or None
+        kwargs.setdefault('cache', True)
         call_response = self.call_handler("GET", url, params=params, headers=self.get_headers(), **kwargs)
         return call_response
 
+    def count_tags(self, list_id, **kwargs):
+        return self.count_items(self.list_tags(list_id, limit=1, **kwargs))
+
     def create_tag(self, list_id, tag_name, **kwargs):
         tag_name = '{quote}{tag_name}{quote}'.format(
             quote='"',
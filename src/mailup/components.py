@@ -1,9 +1,10 @@
 # coding: utf-8 -*-
 
 import ast
-import time
+import copy
 
 from mailup import exceptions
+from mailup.batches import to_import_data
 from mailup.logger import LoggerSingleton
 from mailup.utils import filter_dict
 
@@ -13,92 +14,294 @@ def client_enabled(function):
 
     def wrapper(*args, **kwargs):
 
-        from clients import MailUpClient
+        from mailup.clients import MailUpClient
 
         for arg in args:
             if hasattr(arg, 'client'):
                 if not isinstance(getattr(arg, 'client'), MailUpClient):
                     raise exceptions.ClientNotEnabledException('MailUp client not instanced')
-                if not arg.client.access_token:
-                    raise exceptions.ClientNotEnabledException('MailUp client without access token')
+                if not arg.client.has_credentials():
+                    raise exceptions.ClientNotEnabledException('MailUp client without credentials')
         return function(*args, **kwargs)
 
     return wrapper
 
 
 # COMPONENTS
-class MailUpComponent(object):
+class ChangesDict(dict):
+    """
+    data_dict of a component: it records the keys written since it was read from (or saved on) MailUp.
+    "changed_keys" is None if nothing has changed, the set of changed keys, or True if all keys are unsaved.
+    "snapshots" keeps a copy of the list and dict values handed out by component attributes, which can be changed in
+    place: they are changed if they differ from their copy.
+    """
+    __slots__ = ('changed_keys', 'snapshots')
+
+    def __init__(self, *args, **kwargs):
+        super(ChangesDict, self).__init__(*args, **kwargs)
+        self.changed_keys = True
+        self.snapshots = None
+
+    def __reduce__(self):
+        return restore_changes_dict, (self.__class__, dict(self), self.changed_keys, self.snapshots)
+
+    def get_changes(self):
+        """
+        :return: changed_keys, with the keys of the values changed in place since their snapshot
+        """
+        changed_keys = self.changed_keys
+        if changed_keys is True or not self.snapshots:
+            return changed_keys
+        changed_in_place = set(key for key, value in self.snapshots.items() if key not in self or self[key] != value)
+        if not changed_in_place:
+            return changed_keys
+        return changed_in_place.union(changed_keys or ())
+
+    def snapshot(self, key):
+        """
+        Copy the value of "key" before it is handed out, unless it is already changed
+        """
+        changed_keys = self.changed_keys
+        if changed_keys is True or (changed_keys and key in changed_keys) or key not in self:
+            return
+        if self.snapshots is None:
+            self.snapshots = dict()
+        if key not in self.snapshots:
+            self.snapshots[key] = copy.deepcopy(self[key])
+
+    def reset(self):
+        """
+        Forget all changes: data_dict is saved
+        """
+        self.changed_keys = None
+        self.snapshots = None
+
+    def mark(self, *keys):
+        changed_keys = self.changed_keys
+        if changed_keys is None:
+            self.changed_keys = set(keys)
+        elif changed_keys is not True:
+            changed_keys.update(keys)
+
+    def __setitem__(self, key, value):
+        super(ChangesDict, self).__setitem__(key, value)
+        self.mark(key)
+
+    def __delitem__(self, key):
+        super(ChangesDict, self).__delitem__(key)
+        self.mark(key)
+
+    def update(self, *args, **kwargs):
+        other = dict(*args, **kwargs)
+        super(ChangesDict, self).update(other)
+        self.mark(*other)
+
+    def setdefault(self, key, default=None):
+        if key not in self:
+            self[key] = default
+        return self[key]
+
+    def pop(self, key, *default):
+        if key in self:
+            self.mark(key)
+        return super(ChangesDict, self).pop(key, *default)
+
+    def popitem(self):
+        key, value = super(ChangesDict, self).popitem()
+        self.mark(key)
+        return key, value
+
+    def clear(self):
+        self.mark(*self)
+        super(ChangesDict, self).clear()
+
+
+def restore_changes_dict(cls, items, changed_keys, snapshots=None):
+    # module function: python 2 can not pickle classmethods
+    changes_dict = cls(items)
+    changes_dict.changed_keys = changed_keys
+    changes_dict.snapshots = snapshots
+    return changes_dict
+
+
+def restore_component(cls, mailup_pattern_fields):
+    """
+    Empty component of "cls" (of its with_pattern_fields subclass if "mailup_pattern_fields" is given), unpickling
+    sets its slots
+    """
+    if mailup_pattern_fields is not None:
+        cls = cls.with_pattern_fields(mailup_pattern_fields)
+    return cls.__new__(cls)
+
+
+class PatternField(property):
+    """
+    Component attribute stored in its data_dict with key "key". If the value is "mutable" (a list or a dict that can
+    be changed in place) reading it takes a snapshot of the value, to find out at save time if it has been changed.
+    """
+
+    def __init__(self, key, mutable=False):
+        def get_value(component):
+            return component.data_dict[key]
+
+        def get_mutable_value(component):
+            data_dict = component.data_dict
+            if isinstance(data_dict, ChangesDict):
+                data_dict.snapshot(key)
+            return data_dict[key]
+
+        def set_value(component, value):
+            component.data_dict[key] = value
+
+        super(PatternField, self).__init__(get_mutable_value if mutable else get_value, set_value)
+        self.key = key
+
 
-    # MAILUP CLIENT SINGLETON
-    client = None
+class ComponentMeta(type):
+    """
+    Every attribute of "mailup_pattern_fields" becomes a PatternField of its data_dict key, unless the class defines it
+    (like "id"). "field_keys" maps attributes to keys.
+    """
 
-    # LOGGER SINGLETON
-    logger = None
+    def __init__(cls, name, bases, attrs):
+        super(ComponentMeta, cls).__init__(name, bases, attrs)
+        pattern_fields = getattr(cls, 'mailup_pattern_fields', None) or {}
+        mutable_keys = getattr(cls, 'mutable_keys', ())
+        cls.field_keys = dict((attribute, key) for key, attribute in pattern_fields.items())
+        for attribute, key in cls.field_keys.items():
+            defined = getattr(cls, attribute, None)
+            if defined is None or isinstance(defined, PatternField):
+                setattr(cls, attribute, PatternField(key, mutable=key in mutable_keys))
+
+
+class MailUpComponent(ComponentMeta('MailUpComponentBase', (object,), {'__slots__': ()})):
+    # values are kept in data_dict (a ChangesDict): components have no __dict__, their attributes are PatternFields
+    __slots__ = ('client', 'logger', 'data_dict')
 
-    data_dict = None
     mailup_pattern_fields = dict()
     required_fields = list()
+    # data_dict keys with list or dict values
+    mutable_keys = ('Fields', 'Tags', 'TrackingInfo')
+
+    # subclasses with the mailup_pattern_fields given to __init__, built from _pattern_base
+    _pattern_classes = dict()
+    _pattern_base = None
 
     # STATIC METHOD
     @staticmethod
-    def check_data_dict(component, data_dict):
+    def check_data_dict(component, data_dict, required_fields=None):
         missing_parameters = dict()
-        for field in component.required_fields:
+        if required_fields is None:
+            required_fields = component.required_fields
+        for field in required_fields:
             if field not in data_dict:
                 missing_parameters[field] = None
         if missing_parameters:
             raise exceptions.InvalidConfigurationException(missing_parameters)
 
+    @classmethod
+    def with_pattern_fields(cls, mailup_pattern_fields):
+        key = (cls, tuple(sorted(mailup_pattern_fields.items())))
+        if key not in MailUpComponent._pattern_classes:
+            MailUpComponent._pattern_classes[key] = type(cls)(cls.__name__, (cls,), {
+                '__slots__': (),
+                'mailup_pattern_fields': dict(mailup_pattern_fields),
+                '_pattern_base': cls,
+            })
+        return MailUpComponent._pattern_classes[key]
+
     def __init__(self, data_dict, client=None, logger=None, **kwargs):
         self.client = client
         self.logger = logger or LoggerSingleton()
 
         if 'mailup_pattern_fields' in kwargs:
-            self.mailup_pattern_fields = kwargs['mailup_pattern_fields']
-        if 'required_fields' in kwargs:
-            self.required_fields = kwargs['required_fields']
+            self.__class__ = self.with_pattern_fields(kwargs['mailup_pattern_fields'])
 
         # check data_dict integrity
-        MailUpComponent.check_data_dict(self, data_dict)
+        MailUpComponent.check_data_dict(self, data_dict, kwargs.get('required_fields'))
 
-        # Init Attribute
-        self.data_dict = filter_dict(data_dict, self.mailup_pattern_fields)
+        # Init Attribute: nothing tells data_dict is on MailUp, the first save sends all of it
+        self.data_dict = ChangesDict(filter_dict(data_dict, self.mailup_pattern_fields))
 
         super(MailUpComponent, self).__init__()
 
-    def __getattr__(self, name):
-        field_pattern_dict = self.mailup_pattern_fields
-
-        if name in self.mailup_pattern_fields.values():
-            data_dict = object.__getattribute__(self, 'data_dict')
-
-            # key that has "name" like value
-            key = field_pattern_dict.keys()[field_pattern_dict.values().index(name)]
-            return data_dict[key]
-        else:
-            return super(MailUpComponent, self).__getattribute__(name)
-
-    def __setattr__(self, name, value):
-        field_pattern_dict = self.mailup_pattern_fields
-
-        if not name == 'data_dict':
-            try:
-                data_dict = object.__getattribute__(self, 'data_dict')
-                if data_dict and name in field_pattern_dict.values():
-                    # key that has "name" like value
-                    key = field_pattern_dict.keys()[field_pattern_dict.values().index(name)]
-                    if key in data_dict:
-                        # data dict is updated
-                        data_dict[key] = value
-            except AttributeError:
-                # super is invoked
-                pass
+    # PICKLE
+    def __getstate__(self):
+        # components have no __dict__: the state is the value of every set slot, the default logger is not pickled
+        state = dict()
+        for cls in type(self).__mro__:
+            for slot in cls.__dict__.get('__slots__', ()):
+                if hasattr(self, slot):
+                    state[slot] = getattr(self, slot)
+        if state.get('logger') is LoggerSingleton():
+            state['logger'] = None
+        return state
+
+    def __setstate__(self, state):
+        for slot, value in state.items():
+            setattr(self, slot, value)
+        if self.logger is None:
+            self.logger = LoggerSingleton()
+
+    def __reduce_ex__(self, protocol):
+        # with_pattern_fields subclasses are not module attributes, they are built again when unpickled
+        if self._pattern_base is None:
+            return restore_component, (self.__class__, None), self.__getstate__()
+        return restore_component, (self._pattern_base, self.mailup_pattern_fields), self.__getstate__()
+
+    @classmethod
+    def from_mailup(cls, data_dict, client=None, logger=None):
+        """
+        Component of a data_dict read from MailUp: it is trusted, required fields are not checked, and it has no
+        changes to save
+        """
+        component = cls.__new__(cls)
+        component.client = client
+        component.logger = logger or LoggerSingleton()
+        component.data_dict = ChangesDict(filter_dict(data_dict, cls.mailup_pattern_fields))
+        component.data_dict.changed_keys = None
+        return component
+
+    # CHANGES
+    def get_changes(self):
+        """
+        :return: changes of data_dict (see ChangesDict.get_changes), True (all keys unsaved) if data_dict is not a
+                 ChangesDict
+        """
+        data_dict = self.data_dict
+        if not isinstance(data_dict, ChangesDict):
+            return True
+        return data_dict.get_changes()
+
+    def is_changed(self):
+        return bool(self.get_changes())
+
+    def mark_changed(self, *keys):
+        """
+        Mark data_dict keys as changed, all keys if none is given: needed after changing in place a value of
+        data_dict (e.g. a dynamic field through data_dict["Fields"])
+        """
+        if not isinstance(self.data_dict, ChangesDict):
+            return
+        if keys:
+            self.data_dict.mark(*keys)
         else:
-            for property_name, property_value in value.iteritems():
-                if property_name in field_pattern_dict.keys():
-                    setattr(self, field_pattern_dict[property_name], property_value)
-
-        return super(MailUpComponent, self).__setattr__(name, value)
+            self.data_dict.changed_keys = True
+
+    def mark_saved(self):
+        if not isinstance(self.data_dict, ChangesDict):
+            self.data_dict = ChangesDict(self.data_dict)
+        self.data_dict.reset()
+
+    def get_changed_keys(self):
+        """
+        :return: set of the data_dict keys changed since the component was read or saved
+        """
+        changes = self.get_changes()
+        if changes is True:
+            return set(self.data_dict)
+        # dynamic fields are marked as ('Fields', field Id), see FieldsMixin
+        return set(key[0] if isinstance(key, tuple) else key for key in changes or ())
 
     # COMMON METHODS
     @client_enabled
@@ -114,6 +317,17 @@ class MailUpComponent(object):
 
         return provider.get_list(list_id=list_id)
 
+    @client_enabled
+    def wait_import(self, import_id):
+        from mailup.providers import MailUpComponentProvider
+
+        provider = MailUpComponentProvider(
+            client=self.client,
+            logger=self.logger,
+        )
+
+        return provider.wait_import(import_id)
+
     # COMMON ABSTRACT PROPERTY
     @property
     def id(self):
@@ -127,7 +341,99 @@ class MailUpComponent(object):
         raise NotImplementedError
 
 
+class FieldsMixin(object):
+    """
+    Access to the MailUp dynamic "Fields" of a component by Description or by Id, through an index built on first
+    use and rebuilt when data_dict["Fields"] is replaced or resized. Classes using it need a "_fields_index" slot.
+    """
+    __slots__ = ()
+
+    def get_fields_index(self):
+        """
+        :return: dict Description: field and dict Id: field of data_dict["Fields"]
+        """
+        fields = self.data_dict['Fields']
+        index = getattr(self, '_fields_index', None)
+        if index is None or index[0] is not fields or index[1] != len(fields):
+            by_name = dict()
+            by_id = dict()
+            for field in fields:
+                if 'Description' in field:
+                    by_name.setdefault(field['Description'], field)
+                if 'Id' in field:
+                    by_id.setdefault(field['Id'], field)
+            index = self._fields_index = (fields, len(fields), by_name, by_id)
+        return index[2], index[3]
+
+    def find_field(self, field_name, by_name=None, by_id=None):
+        if by_name is None:
+            by_name, by_id = self.get_fields_index()
+        field = by_name.get(field_name)
+        if field is None:
+            field = by_id.get(field_name)
+        return field
+
+    def mark_field_changed(self, field):
+        if 'Id' in field:
+            self.mark_changed(('Fields', field['Id']))
+        else:
+            self.mark_changed('Fields')
+
+    def get_changed_fields(self):
+        """
+        :return: fields changed with set_field or set_fields, all fields if "fields" has been replaced
+        """
+        changed_keys = self.get_changes()
+        if not changed_keys:
+            return []
+        if changed_keys is True or 'Fields' in changed_keys:
+            return list(self.data_dict['Fields'])
+        by_id = self.get_fields_index()[1]
+        return [
+            by_id[key[1]] for key in changed_keys if isinstance(key, tuple) and key[0] == 'Fields' and key[1] in by_id
+        ]
+
+    # FIELDS METHODS
+    def set_field(self, field_name, field_value):
+        """
+        :param field_name: Description or Id of the field, fields not in data_dict["Fields"] are ignored
+        """
+        field = self.find_field(field_name)
+        if field is not None:
+            field['Value'] = field_value
+            self.mark_field_changed(field)
+
+    def get_field(self, field_name):
+        field = self.find_field(field_name)
+        if field is not None:
+            return field['Value']
+
+    def set_fields(self, field_dict):
+        by_name, by_id = self.get_fields_index()
+        for key, value in field_dict.items():
+            field = self.find_field(key, by_name, by_id)
+            if field is not None:
+                field['Value'] = value
+                self.mark_field_changed(field)
+
+    def get_fields(self, field_names=None):
+        """
+        :param field_names: Descriptions or Ids of the fields to read, all fields (by Description) if None
+        :return: dict field name: value
+        """
+        by_name, by_id = self.get_fields_index()
+        if field_names is None:
+            return dict((key, field['Value']) for key, field in by_name.items())
+        field_dict = dict()
+        for key in field_names:
+            field = self.find_field(key, by_name, by_id)
+            if field is not None:
+                field_dict[key] = field['Value']
+        return field_dict
+
+
 class List(MailUpComponent):
+    __slots__ = ()
 
     mailup_pattern_fields = {
         'Name': 'name',
@@ -160,8 +466,14 @@ class List(MailUpComponent):
             new_list = provider.create_list(data_dict=self.data_dict)
 
             self.data_dict = new_list.data_dict
+            self.mark_saved()
             return self
 
+        if not self.is_changed():
+            self.logger.info('List {list_id} has no changes, it is not saved'.format(list_id=self.id))
+            return self
+
+        # MailUp updates the whole list: all data_dict is sent
         # MailUp BUG FIX: Only in this case MailUp use "IdList" and not "idList"
         data_dict = self.data_dict.copy()
         list_id = data_dict.pop('idList')
@@ -177,6 +489,7 @@ class List(MailUpComponent):
         # data_dict as more keys than saved_data_dict
         saved_data_dict = filter_dict(saved_data_dict, self.mailup_pattern_fields)
         self.data_dict.update(saved_data_dict)
+        self.mark_saved()
 
         self.logger.info('List {list_id} has been successfully saved'.format(list_id=self.id))
         return self
@@ -223,6 +536,17 @@ class List(MailUpComponent):
                     list_id=self.id,
                 )
 
+    @client_enabled
+    def count_recipients(self, status=None, filters=None):
+        """
+        Number of recipients in "status" (all statuses if None), without reading them
+        """
+        statuses = [status] if status else ['subscribed', 'unsubscribed', 'pending']
+        return sum(
+            self.client.count_recipients(list_id=self.id, status=status_tried, filters=filters) or 0
+            for status_tried in statuses
+        )
+
     @client_enabled
     def get_subscribers(self):
         from mailup.providers import MailUpComponentProvider
@@ -236,6 +560,10 @@ class List(MailUpComponent):
             list_id=self.id,
         )
 
+    @client_enabled
+    def count_subscribers(self):
+        return self.count_recipients(status='subscribed')
+
     @client_enabled
     def get_unsubscribers(self):
         from mailup.providers import MailUpComponentProvider
@@ -264,9 +592,7 @@ class List(MailUpComponent):
 
     @client_enabled
     def subscribe_recipients_list(self, recipients, confirm_email=False, wait_import=False):
-        list_recipient_data_dict = []
-        for recipient in recipients:
-            list_recipient_data_dict.append(recipient.data_dict)
+        list_recipient_data_dict = to_import_data(recipients)
 
         import_id = self.client.subscribe_recipients_to_list(
             list_id=self.id,
@@ -280,20 +606,12 @@ class List(MailUpComponent):
             )
         )
         if wait_import:
-            # WAITING IMPORT IS COMPLETE
-            import_complete = False
-            while not import_complete:
-                status = self.client.read_import_status(import_id)
-                self.logger.warning('Waiting 2 seconds import is complete..')
-                time.sleep(2)
-                import_complete = status['Completed']
+            self.wait_import(import_id)
         return import_id
 
     @client_enabled
     def subscribe_recipients_list_forced(self, recipients, confirm_email=False, wait_import=False):
-        list_recipient_data_dict = []
-        for recipient in recipients:
-            list_recipient_data_dict.append(recipient.data_dict)
+        list_recipient_data_dict = to_import_data(recipients)
 
         import_id = self.client.subscribe_recipients_to_list(
             list_id=self.id,
@@ -308,20 +626,12 @@ class List(MailUpComponent):
             )
         )
         if wait_import:
-            # WAITING IMPORT IS COMPLETE
-            import_complete = False
-            while not import_complete:
-                status = self.client.read_import_status(import_id)
-                self.logger.warning('Waiting 2 seconds import is complete..')
-                time.sleep(2)
-                import_complete = status['Completed']
+            self.wait_import(import_id)
         return import_id
 
     @client_enabled
     def unsubscribe_recipients_list(self, recipients, wait_import=False):
-        list_recipient_data_dict = []
-        for recipient in recipients:
-            list_recipient_data_dict.append(recipient.data_dict)
+        list_recipient_data_dict = to_import_data(recipients)
 
         import_id = self.client.unsubscribe_recipients_to_list(
             list_id=self.id,
@@ -335,13 +645,7 @@ class List(MailUpComponent):
             )
         )
         if wait_import:
-            # WAITING IMPORT IS COMPLETE
-            import_complete = False
-            while not import_complete:
-                status = self.client.read_import_status(import_id)
-                self.logger.warning('Waiting 2 seconds import is complete..')
-                time.sleep(2)
-                import_complete = status['Completed']
+            self.wait_import(import_id)
         return import_id
 
     @client_enabled
@@ -380,6 +684,7 @@ class List(MailUpComponent):
 
 
 class Group(MailUpComponent):
+    __slots__ = ()
 
     mailup_pattern_fields = {
         'Deletable': 'deletable',
@@ -415,6 +720,11 @@ class Group(MailUpComponent):
                 data_dict=self.data_dict,
             )
             self.data_dict = new_group.data_dict
+            self.mark_saved()
+            return self
+
+        if not self.is_changed():
+            self.logger.info('Group {group_id} has no changes, it is not saved'.format(group_id=self.id))
             return self
 
         saved_data_dict = self.client.update_group(
@@ -424,6 +734,7 @@ class Group(MailUpComponent):
         )
         saved_data_dict = filter_dict(saved_data_dict, self.mailup_pattern_fields)
         self.data_dict.update(saved_data_dict)
+        self.mark_saved()
         self.logger.info('Group {group_id} has been successfully saved'.format(group_id=self.id))
         return self
 
@@ -443,7 +754,7 @@ class Group(MailUpComponent):
         )
         for recipient_data_dict in recipients_data_dict['Items']:
             recipient_data_dict['idList'] = self.list_id
-            recipient = Recipient(
+            recipient = Recipient.from_mailup(
                 data_dict=recipient_data_dict,
                 client=self.client,
                 logger=self.logger,
@@ -453,6 +764,13 @@ class Group(MailUpComponent):
         self.logger.debug('Subscribers from group {group_id} retrieved'.format(group_id=self.id))
         return recipient_list
 
+    @client_enabled
+    def count_subscribers(self):
+        """
+        Number of recipients in the group, without reading them
+        """
+        return self.client.count_group_members(group_id=self.id) or 0
+
     @client_enabled
     def insert_recipient(self, recipient_id):
         self.client.update_group_subscription(
@@ -483,9 +801,7 @@ class Group(MailUpComponent):
 
     @client_enabled
     def subscribe_recipients_list(self, recipients, confirm_email=False, wait_import=False):
-        list_recipient_data_dict = []
-        for recipient in recipients:
-            list_recipient_data_dict.append(recipient.data_dict)
+        list_recipient_data_dict = to_import_data(recipients)
 
         import_id = self.client.subscribe_recipients_to_group(
             group_id=self.id,
@@ -499,20 +815,12 @@ class Group(MailUpComponent):
             )
         )
         if wait_import:
-            # WAITING IMPORT IS COMPLETE
-            import_complete = False
-            while not import_complete:
-                status = self.client.read_import_status(import_id)
-                self.logger.warning('Waiting 2 seconds import is complete..')
-                time.sleep(2)
-                import_complete = status['Completed']
+            self.wait_import(import_id)
         return import_id
 
     @client_enabled
     def subscribe_recipients_list_forced(self, recipients, confirm_email=False, wait_import=False):
-        list_recipient_data_dict = []
-        for recipient in recipients:
-            list_recipient_data_dict.append(recipient.data_dict)
+        list_recipient_data_dict = to_import_data(recipients)
 
         import_id = self.client.subscribe_recipients_to_group(
             group_id=self.id,
@@ -527,20 +835,12 @@ class Group(MailUpComponent):
             )
         )
         if wait_import:
-            # WAITING IMPORT IS COMPLETE
-            import_complete = False
-            while not import_complete:
-                status = self.client.read_import_status(import_id)
-                self.logger.warning('Waiting 2 seconds import is complete..')
-                time.sleep(2)
-                import_complete = status['Completed']
+            self.wait_import(import_id)
         return import_id
 
     @client_enabled
     def unsubscribe_recipients_list(self, recipients, wait_import=False):
-        list_recipient_data_dict = []
-        for recipient in recipients:
-            list_recipient_data_dict.append(recipient.data_dict)
+        list_recipient_data_dict = to_import_data(recipients)
 
         import_id = self.client.unsubscribe_recipients_to_group(
             group_id=self.id,
@@ -554,13 +854,7 @@ class Group(MailUpComponent):
             )
         )
         if wait_import:
-            # WAITING IMPORT IS COMPLETE
-            import_complete = False
-            while not import_complete:
-                status = self.client.read_import_status(import_id)
-                self.logger.warning('Waiting 2 seconds import is complete..')
-                time.sleep(2)
-                import_complete = status['Completed']
+            self.wait_import(import_id)
         return import_id
 
     @client_enabled
@@ -583,9 +877,26 @@ class Group(MailUpComponent):
         return other_sending_info
 
     @client_enabled
-    def send_message(self, message_id):
+    def send_message(self, message_id, trust_ids=None):
+        """
+        :param trust_ids: if True (default MAILUP_TRUST_IDS) the message is sent without reading it first
+        """
         from mailup.providers import MailUpComponentProvider
 
+        if trust_ids is None:
+            trust_ids = self.client.configuration['MAILUP_TRUST_IDS']
+        if trust_ids:
+            # missing ids can not be trusted: MailUp would refuse the call
+            if self.id is None:
+                raise exceptions.GroupNotFoundException(self.id)
+            if message_id is None:
+                raise exceptions.MessageNotFoundException(message_id)
+            send_statistic = self.client.send_message_to_group(
+                group_id=self.id,
+                message_id=message_id,
+            )
+            return ast.literal_eval(send_statistic)
+
         provider = MailUpComponentProvider(
             client=self.client,
             logger=self.logger,
@@ -614,7 +925,8 @@ class Group(MailUpComponent):
         self.data_dict['idGroup'] = value
 
 
-class Recipient(MailUpComponent):
+class Recipient(FieldsMixin, MailUpComponent):
+    __slots__ = ('status', '_fields_index')
 
     mailup_pattern_fields = {
         'Name': 'name',
@@ -631,6 +943,12 @@ class Recipient(MailUpComponent):
         self.status = status
         super(Recipient, self).__init__(data_dict, client, logger, **kwargs)
 
+    @classmethod
+    def from_mailup(cls, data_dict, client=None, logger=None, status=None):
+        recipient = super(Recipient, cls).from_mailup(data_dict, client, logger)
+        recipient.status = status
+        return recipient
+
     def __repr__(self):
         return u'<{class_name}: {email}>'.format(
             class_name=self.__class__.__name__,
@@ -657,16 +975,41 @@ class Recipient(MailUpComponent):
             )
 
             self.data_dict = new_recipient.data_dict
+            self.mark_saved()
+            return self
+
+        if not self.is_changed():
+            self.logger.info('Recipient {recipient_id} has no changes, it is not saved'.format(recipient_id=self.id))
             return self
 
+        if self.client.configuration['MAILUP_PARTIAL_RECIPIENT_UPDATE']:
+            data_dict = self.get_update_data_dict()
+        else:
+            data_dict = self.data_dict
         saved_data_dict = self.client.update_recipient(
-            data_dict=self.data_dict
+            data_dict=data_dict
         )
         saved_data_dict = filter_dict(saved_data_dict, self.mailup_pattern_fields)
         self.data_dict.update(saved_data_dict)
+        self.mark_saved()
         self.logger.info('Recipient {recipient_id} has been successfully saved'.format(recipient_id=self.id))
         return self
 
+    def get_update_data_dict(self):
+        """
+        Partial payload of update_recipient, used if MAILUP_PARTIAL_RECIPIENT_UPDATE is True: idRecipient, Email, the
+        changed keys and the changed dynamic fields. It assumes MailUp keeps the values that are not sent, which is
+        not verified here: by default save sends the whole data_dict.
+        """
+        changed_keys = self.get_changed_keys()
+        changed_keys.update(['idRecipient', 'Email'])
+        data_dict = dict(
+            (key, value) for key, value in self.data_dict.items() if key in changed_keys and key != 'Fields'
+        )
+        if 'Fields' in changed_keys:
+            data_dict['Fields'] = self.get_changed_fields()
+        return data_dict
+
     @client_enabled
     def add_to_list(self, list_id, confirm_email=False):
         self.data_dict['idList'] = list_id
@@ -733,33 +1076,6 @@ class Recipient(MailUpComponent):
         ))
         return self
 
-    # FIELDS METHODS
-    def set_field(self, field_name, field_value):
-        for field in self.fields:
-            if field['Description'] == field_name:
-                field['Value'] = field_value
-                break
-
-    def get_field(self, field_name):
-        for field in self.fields:
-            if field['Description'] == field_name:
-                return field['Value']
-
-    def set_fields(self, field_dict):
-        for key, value in field_dict.iteritems():
-            self.set_field(key, value)
-
-    def get_fields(self):
-        field_dict = dict()
-        fields = self.data_dict['Fields']
-
-        for field in fields:
-            key = field['Description']
-            value = field['Value']
-            field_dict[key] = value
-
-        return field_dict
-
     # PROPERTY
     @property
     def id(self):
@@ -773,7 +1089,9 @@ class Recipient(MailUpComponent):
         self.data_dict['idRecipient'] = value
 
 
-class Message(MailUpComponent):
+class Message(FieldsMixin, MailUpComponent):
+    # _detail: message detail (Content, Embed, Head, Body, ...) as read from MailUp, read by save only once
+    __slots__ = ('_fields_index', '_detail')
 
     mailup_pattern_fields = {
         'Subject': 'subject',
@@ -790,6 +1108,16 @@ class Message(MailUpComponent):
 
     required_fields = ['Subject', 'idList']
 
+    @classmethod
+    def from_mailup(cls, data_dict, client=None, logger=None, detail=False):
+        """
+        :param detail: True if data_dict is the message detail (see read_message_detail): it is kept unfiltered
+                       for save, MailUp replaces the whole message
+        """
+        message = super(Message, cls).from_mailup(data_dict, client, logger)
+        message._detail = data_dict if detail else None
+        return message
+
     def __repr__(self):
         return u'<{class_name}: {subject}>'.format(
             class_name=self.__class__.__name__,
@@ -811,13 +1139,25 @@ class Message(MailUpComponent):
                 data_dict=self.data_dict
             )
             self.data_dict = new_message.data_dict
+            self.mark_saved()
             return self
-        detail_data_dict = self.client.read_message_detail(
-            list_id=self.list_id,
-            message_id=self.id
-        )
+
+        if not self.is_changed():
+            self.logger.info('Message {message_id} has no changes, it is not saved'.format(message_id=self.id))
+            return self
+
+        # MailUp updates the whole message: data_dict is completed with the detail, read only the first time
+        detail_data_dict = getattr(self, '_detail', None)
+        if detail_data_dict is None:
+            detail_data_dict = self.client.read_message_detail(
+                list_id=self.list_id,
+                message_id=self.id
+            )
+        detail_data_dict = dict(detail_data_dict)
         detail_data_dict.update(self.data_dict)
         self.data_dict.update(detail_data_dict)
+        # data_dict has all the detail now
+        self._detail = self.data_dict
         saved_data_dict = self.client.update_message(
             list_id=self.list_id,
             message_id=self.id,
@@ -825,6 +1165,7 @@ class Message(MailUpComponent):
         )
         saved_data_dict = filter_dict(saved_data_dict, self.mailup_pattern_fields)
         self.data_dict.update(saved_data_dict)
+        self.mark_saved()
         self.logger.info('Message {message_id} has been successfully saved'.format(message_id=self.id))
         return self
 
@@ -845,50 +1186,32 @@ class Message(MailUpComponent):
         return ast.literal_eval(send_statistic)
 
     @client_enabled
-    def send_to_recipient(self, recipient_id):
+    def send_to_recipient(self, recipient_id=None, email=None):
+        """
+        Send the message to a recipient of its list: MailUp needs the recipient email, if only "recipient_id" is
+        given the recipient is read first
+        """
         from mailup.providers import MailUpComponentProvider
 
-        provider = MailUpComponentProvider(
-            client=self.client,
-            logger=self.logger,
-        )
-        recipient = provider.get_recipient(
-            list_id=self.list_id,
-            recipient_id=recipient_id
-        )
+        if not email:
+            if not recipient_id:
+                self.logger.warning('"send_to_recipient" without "recipient_id" or "email"')
+                return None
+            provider = MailUpComponentProvider(
+                client=self.client,
+                logger=self.logger,
+            )
+            recipient = provider.get_recipient(
+                list_id=self.list_id,
+                recipient_id=recipient_id,
+            )
+            email = recipient.email
         send_statistic = self.client.send_message_to_recipient(
-            email=recipient.email,
+            email=email,
             message_id=self.id,
         )
         return send_statistic
 
-    # FIELDS METHODS
-    def set_field(self, field_name, field_value):
-        for field in self.fields:
-            if field['Description'] == field_name:
-                field['Value'] = field_value
-                break
-
-    def get_field(self, field_name):
-        for field in self.fields:
-            if field['Description'] == field_name:
-                return field['Value']
-
-    def set_fields(self, field_dict):
-        for key, value in field_dict.iteritems():
-            self.set_field(key, value)
-
-    def get_fields(self):
-        field_dict = dict()
-        fields = self.data_dict['Fields']
-
-        for field in fields:
-            key = field['Description']
-            value = field['Value']
-            field_dict[key] = value
-
-        return field_dict
-
     # PROPERTY
     @property
     def id(self):
@@ -903,6 +1226,7 @@ class Message(MailUpComponent):
 
 
 class Tag(MailUpComponent):
+    __slots__ = ()
 
     mailup_pattern_fields = {
         'Id': 'tag_id',
@@ -933,6 +1257,11 @@ class Tag(MailUpComponent):
                 data_dict=self.data_dict
             )
             self.data_dict = new_tag.data_dict
+            self.mark_saved()
+            return self
+
+        if not self.is_changed():
+            self.logger.info('Tag {tag_id} has no changes, it is not saved'.format(tag_id=self.id))
             return self
 
         saved_data_dict = self.client.modify_tag(
@@ -942,6 +1271,7 @@ class Tag(MailUpComponent):
 
         saved_data_dict = filter_dict(saved_data_dict, self.mailup_pattern_fields)
         self.data_dict.update(saved_data_dict)
+        self.mark_saved()
         self.logger.info('Tag {tag_id} has been successfully saved'.format(tag_id=self.id))
         return self
 
@@ -959,6 +1289,7 @@ class Tag(MailUpComponent):
 
 
 class Attachment(MailUpComponent):
+    __slots__ = ()
 
     mailup_pattern_fields = {
         'Name': 'name',
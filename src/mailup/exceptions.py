@@ -1,6 +1,8 @@
 # coding: utf-8
 
 import ast
+import json
+
 from mailup.logger import LoggerSingleton
 
 
@@ -51,10 +53,32 @@ class MailUpCallError(MailUpException):
         raise self.MailUpCallError(req)
     """
 
-    def __init__(self, error_text, write_log=True):
+    def __init__(self, error_text, write_log=True, status_code=None, response_text=None):
         self.error_text = error_text
+        # of the MailUp response, None if MailUp did not respond
+        self.status_code = status_code
+        self.response_text = response_text
         super(MailUpCallError, self).__init__(write_log)
 
+    # "ErrorCode" of MailUp error bodies telling that the object to create already exists
+    CONFLICT_ERROR_CODES = ('409',)
+
+    def get_error_code(self):
+        """
+        "ErrorCode" of the MailUp json error body, None if the response is not a MailUp error
+        """
+        try:
+            return str(json.loads(self.response_text)['ErrorCode'])
+        except (TypeError, ValueError, KeyError):
+            return None
+
+    def is_conflict(self):
+        """
+        True if MailUp refused the call because the object to create already exists: status 409 or an error body
+        with an ErrorCode of CONFLICT_ERROR_CODES. Other errors are not conflicts, whatever their text tells.
+        """
+        return self.status_code == 409 or self.get_error_code() in self.CONFLICT_ERROR_CODES
+
     @staticmethod
     def unicode_to_dict(unicode_dict):
         unicode_dict = unicode_dict.replace(':null', ':None')
@@ -77,9 +101,9 @@ class ListNotSpecifiedException(MailUpException):
         raise self.ListNotSpecifiedException()
     """
 
-    def __init__(self):
+    def __init__(self, write_log=True):
         self.error_text = '"idList" element not specified in data_dict'
-        super(ListNotSpecifiedException, self).__init__()
+        super(ListNotSpecifiedException, self).__init__(write_log)
 
 
 class InvalidConfigurationException(MailUpException):
@@ -96,7 +120,7 @@ class InvalidConfigurationException(MailUpException):
 
     def __init__(self, parameter_dict, write_log=True):
         parameters_str = [
-            '{key}={value}'.format(key=key, value=value) for key, value in parameter_dict.iteritems()
+            '{key}={value}'.format(key=key, value=value) for key, value in parameter_dict.items()
         ]
         self.error_text = 'Invalid configuration for one or more parameters in data_dict: {parameters}'.format(
             parameters=parameters_str
@@ -140,7 +164,7 @@ class InvalidRecipientConfigurationException(MailUpException):
 
     def __init__(self, parameter_dict, write_log=True):
         parameters_str = [
-            '{key}={value}'.format(key=key, value=value) for key, value in parameter_dict.iteritems()
+            '{key}={value}'.format(key=key, value=value) for key, value in parameter_dict.items()
         ]
         self.error_text = 'Invalid configuration for one or more parameters in recipient_data_dict: {parameters}'.format(
             parameters=parameters_str
@@ -222,7 +246,7 @@ class InvalidGroupConfigurationException(MailUpException):
 
     def __init__(self, parameter_dict, write_log=True):
         parameters_str = [
-            '{key}={value}'.format(key=key, value=value) for key, value in parameter_dict.iteritems()
+            '{key}={value}'.format(key=key, value=value) for key, value in parameter_dict.items()
         ]
         self.error_text = 'Invalid configuration for one or more parameters in group_data_dict: {parameters}'.format(
             parameters=parameters_str
@@ -262,7 +286,7 @@ class InvalidListConfigurationException(MailUpException):
 
     def __init__(self, parameter_dict, write_log=True):
         parameters_str = [
-            '{key}={value}'.format(key=key, value=value) for key, value in parameter_dict.iteritems()
+            '{key}={value}'.format(key=key, value=value) for key, value in parameter_dict.items()
         ]
         self.error_text = 'Invalid configuration for one or more parameters in list_data_dict: {parameters}'.format(
             parameters=parameters_str
@@ -288,6 +312,27 @@ class IdImportDoesNotExists(MailUpException):
         super(IdImportDoesNotExists, self).__init__(write_log)
 
 
+class ImportTimeoutException(MailUpException):
+    """
+    To import:
+        import exceptions
+
+    To declare in a class add a class attribute:
+        ImportTimeoutException = exceptions.ImportTimeoutException
+
+    To raise:
+        raise self.ImportTimeoutException(import_id, timeout)
+    """
+
+    def __init__(self, import_id, timeout, write_log=True):
+        self.import_id = import_id
+        self.error_text = 'Import {import_id} not complete after {timeout} seconds'.format(
+            import_id=import_id,
+            timeout=timeout,
+        )
+        super(ImportTimeoutException, self).__init__(write_log)
+
+
 # MESSAGE
 class MessageNotFoundException(MailUpException):
     """
@@ -320,7 +365,7 @@ class InvalidMessageConfigurationException(MailUpException):
 
     def __init__(self, parameter_dict, write_log=True):
         parameters_str = [
-            '{key}={value}'.format(key=key, value=value) for key, value in parameter_dict.iteritems()
+            '{key}={value}'.format(key=key, value=value) for key, value in parameter_dict.items()
         ]
         self.error_text = 'Invalid configuration for one or more parameters in message_data_dict: {parameters}'.format(
             parameters=parameters_str
@@ -363,7 +408,7 @@ class InvalidTagConfigurationException(MailUpException):
 
     def __init__(self, parameter_dict, write_log=True):
         parameters_str = [
-            '{key}={value}'.format(key=key, value=value) for key, value in parameter_dict.iteritems()
+            '{key}={value}'.format(key=key, value=value) for key, value in parameter_dict.items()
         ]
         self.error_text = 'Invalid configuration for one or more parameters in tag_data_dict: {parameters}'.format(
             parameters=parameters_str
@@ -443,7 +488,7 @@ class InvalidAttachmentConfigurationException(MailUpException):
 
     def __init__(self, parameter_dict, write_log=True):
         parameters_str = [
-            '{key}={value}'.format(key=key, value=value) for key, value in parameter_dict.iteritems()
+            '{key}={value}'.format(key=key, value=value) for key, value in parameter_dict.items()
         ]
         self.error_text = 'Invalid configuration for one or more parameters in attachment_data_dict: {parameters}'.format(
             parameters=parameters_str
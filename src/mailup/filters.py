@@ -0,0 +1,178 @@
+# coding: utf-8
+"""
+Filter and order expressions compiled to MailUp "filterby" and "orderby" querystring params::
+
+    from mailup.filters import F
+
+    filters = (F('Email').endswith('@example.com') | F('Email').isin(['a@b.it', 'c@d.it'])) & (F('idRecipient') > 100)
+    mailup_client.get_recipients(list_id, 'subscribed', filters=filters, order_by=F('Email').desc())
+
+Expressions can be passed as "filters" to read_lists, read_groups, get_recipients, list_messages and list_tags.
+"""
+
+import datetime
+import numbers
+
+try:
+    string_types = (str, unicode)
+    text_type = unicode
+except NameError:
+    string_types = (str,)
+    text_type = str
+
+
+def format_value(value):
+    """
+    MailUp literal of a python value: strings are quoted with ' (doubled inside the string), dates become
+    DateTime(...)
+    Literals and expressions are concatenated, not formatted: on python 2 they keep the type (str or unicode) of
+    the values.
+    """
+    if value is None:
+        return 'null'
+    if isinstance(value, bool):
+        return 'true' if value else 'false'
+    if isinstance(value, datetime.datetime):
+        return 'DateTime({},{},{},{},{},{})'.format(
+            value.year, value.month, value.day, value.hour, value.minute, value.second,
+        )
+    if isinstance(value, datetime.date):
+        return 'DateTime({},{},{})'.format(value.year, value.month, value.day)
+    if isinstance(value, float):
+        return repr(value)
+    if isinstance(value, numbers.Number):
+        return str(value)
+    if not isinstance(value, string_types):
+        value = str(value)
+    return "'" + value.replace("'", "''") + "'"
+
+
+class Expression(object):
+    """
+    Filter expression: combine with & (and), | (or) and ~ (not)
+    """
+
+    def __init__(self, expression, precedence=3):
+        self.expression = expression
+        # 1: ||, 2: &&, 3: single term (never needs parenthesis)
+        self.precedence = precedence
+
+    def __and__(self, other):
+        return Expression(self.wrap(2) + '&&' + other.wrap(2), precedence=2)
+
+    def __or__(self, other):
+        return Expression(self.wrap(1) + '||' + other.wrap(1), precedence=1)
+
+    def __invert__(self):
+        return Expression('!(' + self.expression + ')')
+
+    def wrap(self, precedence):
+        if self.precedence < precedence:
+            return '(' + self.expression + ')'
+        return self.expression
+
+    def compile(self):
+        return self.expression
+
+    def __str__(self):
+        return self.expression
+
+    def __repr__(self):
+        return '<Expression: {}>'.format(self.expression)
+
+
+class Field(object):
+    """
+    Field of a MailUp object (e.g. "Email", "idRecipient", "Name") used to build expressions
+    """
+
+    def __init__(self, name):
+        self.name = name
+
+    def compare(self, operator, value):
+        return Expression(self.name + operator + format_value(value))
+
+    def __eq__(self, value):
+        return self.compare('==', value)
+
+    def __ne__(self, value):
+        return self.compare('!=', value)
+
+    def __lt__(self, value):
+        return self.compare('<', value)
+
+    def __le__(self, value):
+        return self.compare('<=', value)
+
+    def __gt__(self, value):
+        return self.compare('>', value)
+
+    def __ge__(self, value):
+        return self.compare('>=', value)
+
+    __hash__ = object.__hash__
+
+    def call(self, method, value):
+        return Expression(self.name + '.' + method + '(' + format_value(value) + ')')
+
+    def contains(self, value):
+        return self.call('Contains', value)
+
+    def startswith(self, value):
+        return self.call('StartsWith', value)
+
+    def endswith(self, value):
+        return self.call('EndsWith', value)
+
+    def isin(self, values):
+        """
+        Field equal to one of "values": MailUp has no IN operator, terms are joined with ||
+        """
+        values = list(values)
+        if not values:
+            raise ValueError('isin() of {} without values'.format(self.name))
+        terms = [self == value for value in values]
+        expression = terms[0]
+        for term in terms[1:]:
+            expression = expression | term
+        return expression
+
+    def asc(self):
+        return Order(self.name)
+
+    def desc(self):
+        return Order(self.name, descending=True)
+
+
+F = Field
+
+
+class Order(object):
+
+    def __init__(self, name, descending=False):
+        self.name = name
+        self.descending = descending
+
+    def compile(self):
+        return '{} {}'.format(self.name, 'desc' if self.descending else 'asc')
+
+    def __str__(self):
+        return self.compile()
+
+
+def compile_order_by(order_by):
+    """
+    "orderby" value of an Order, a field name (prefix "-" for descending) or a list of them
+    """
+    if order_by is None:
+        return None
+    if isinstance(order_by, (Order, Field) + string_types):
+        order_by = [order_by]
+    terms = []
+    for order in order_by:
+        if isinstance(order, Field):
+            order = order.asc()
+        elif isinstance(order, string_types):
+            order = Order(order[1:], descending=True) if order.startswith('-') else Order(order)
+        terms.append(order.compile())
+    return ';'.join(terms) or None
@@ -0,0 +1,140 @@
+# coding: utf-8
+
+import os
+import sqlite3
+import threading
+import time
+
+
+class TokenBucket(object):
+    """
+    Token bucket shared by the threads of a process: "rate" calls per second, up to "burst" calls at once.
+
+    reserve() takes a token and returns the seconds to wait before using it, so tokens are assigned in order and
+    the waiting can be done with time.sleep or asyncio.sleep.
+    """
+    # reserve() does blocking I/O, asyncio code calls it in an executor
+    blocking = False
+
+    def __init__(self, rate, burst=None):
+        self.rate = float(rate)
+        self.burst = float(burst or max(rate, 1))
+
+        self._lock = threading.Lock()
+        self._tokens = self.burst
+        self._updated = time.time()
+
+    def reserve(self, tokens=1):
+        with self._lock:
+            self._tokens, self._updated, wait = self.take(
+                self._tokens, self._updated, time.time(), tokens
+            )
+        return wait
+
+    def acquire(self, tokens=1):
+        wait = self.reserve(tokens)
+        if wait > 0:
+            time.sleep(wait)
+        return wait
+
+    def take(self, available, updated, now, tokens):
+        """
+        :return: new available tokens, update time and seconds to wait; available tokens become negative
+                 when calls are queued
+        """
+        available = min(self.burst, available + (now - updated) * self.rate) - tokens
+        wait = -available / self.rate if available < 0 else 0
+        return available, now, wait
+
+
+class SQLiteTokenBucket(TokenBucket):
+    """
+    Token bucket stored in a SQLite database, shared by all processes (and threads) using the same "path" and "name"
+    """
+    blocking = True
+
+    def __init__(self, path, name, rate, burst=None):
+        super(SQLiteTokenBucket, self).__init__(rate, burst)
+        self.path = path
+        self.name = name
+        self._local = threading.local()
+
+    @property
+    def connection(self):
+        # sqlite connections can not be shared between threads and forked processes
+        if getattr(self._local, 'pid', None) != os.getpid():
+            connection = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            connection.execute(
+                'CREATE TABLE IF NOT EXISTS mailup_token_bucket '
+                '(name TEXT PRIMARY KEY, tokens REAL NOT NULL, updated REAL NOT NULL)'
+            )
+            self._local.connection = connection
+            self._local.pid = os.getpid()
+        return self._local.connection
+
+    def reserve(self, tokens=1):
+        connection = self.connection
+        connection.execute('BEGIN IMMEDIATE')
+        try:
+            row = connection.execute(
+                'SELECT tokens, updated FROM mailup_token_bucket WHERE name = ?', (self.name,)
+            ).fetchone()
+            now = time.time()
+            available, updated = row if row else (self.burst, now)
+            available, updated, wait = self.take(available, updated, now, tokens)
+            connection.execute(
+                'INSERT OR REPLACE INTO mailup_token_bucket (name, tokens, updated) VALUES (?, ?, ?)',
+                (self.name, available, updated)
+            )
+            connection.execute('COMMIT')
+        except Exception:
+            connection.execute('ROLLBACK')
+            raise
+        return wait
+
+
+class RateLimiter(object):
+    """
+    Group of token buckets used by MailUpClient, one for each kind of endpoint: "console", "statistics" and "send".
+    Calls to a kind of endpoint without bucket are not limited.
+    """
+
+    def __init__(self, console=None, statistics=None, send=None):
+        self.buckets = {
+            'console': console,
+            'statistics': statistics,
+            'send': send,
+        }
+
+    @classmethod
+    def from_configuration(cls, rate_limits, path=None):
+        """
+        :param rate_limits: dict like {'console': (rate, burst), 'statistics': (rate, burst), 'send': (rate, burst)}
+        :param path: SQLite database path, if given buckets are shared between processes
+        """
+        buckets = dict()
+        for name, limit in rate_limits.items():
+            if not limit:
+                continue
+            rate, burst = limit if isinstance(limit, (list, tuple)) else (limit, None)
+            if path:
+                buckets[name] = SQLiteTokenBucket(path, name, rate, burst)
+            else:
+                buckets[name] = TokenBucket(rate, burst)
+        return cls(**buckets)
+
+    def reserve(self, endpoint):
+        bucket = self.buckets.get(endpoint)
+        if bucket is None:
+            return 0
+        return bucket.reserve()
+
+    def is_blocking(self, endpoint):
+        bucket = self.buckets.get(endpoint)
+        return bucket is not None and bucket.blocking
+
+    def acquire(self, endpoint):
+        wait = self.reserve(endpoint)
+        if wait > 0:
+            time.sleep(wait)
+        return wait
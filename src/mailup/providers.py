@@ -1,11 +1,63 @@
 # coding: UTF-8
+import math
+import threading
 import time
 
+try:
+    import queue
+except ImportError:
+    import Queue as queue
+
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
 from mailup import exceptions
+from mailup.filters import F
+from mailup.filters import string_types
+from mailup.filters import text_type
 
 from mailup.logger import LoggerSingleton
 
 
+class Page(object):
+    """
+    A single page of components read with one call: "items" and what is needed to move to other pages
+    """
+
+    def __init__(self, items, total_count, page_number, page_size):
+        self.items = items
+        self.total_count = total_count
+        self.page_number = page_number
+        self.page_size = page_size
+
+    @property
+    def page_count(self):
+        if not self.total_count:
+            return 0
+        return int(math.ceil(self.total_count / float(self.page_size)))
+
+    @property
+    def has_next(self):
+        return self.page_number + 1 < self.page_count
+
+    @property
+    def has_previous(self):
+        return self.page_number > 0
+
+    def __iter__(self):
+        return iter(self.items)
+
+    def __len__(self):
+        return len(self.items)
+
+    def __repr__(self):
+        return '<Page {page_number}/{page_count}: {count} items>'.format(
+            page_number=self.page_number,
+            page_count=self.page_count,
+            count=len(self.items),
+        )
+
+
 class MailUpComponentProvider(object):
     client = None
     logger = None
@@ -23,6 +75,73 @@ class MailUpComponentProvider(object):
 
         super(MailUpComponentProvider, self).__init__()
 
+    # PAGE PROVIDER METHODS
+    def get_page(self, read_method, build_component, page_number=0, page_size=None, **kwargs):
+        """
+        Page "page_number" read with a single call of client "read_method" (read_lists, get_recipients, ...),
+        each item is transformed with "build_component"
+        """
+        page_size = page_size or self.client.configuration['MAILUP_DEFAULT_PAGE_SIZE']
+        r_json = read_method(page_number=page_number, page_size=page_size, paginate=False, **kwargs) or {}
+        return Page(
+            items=[build_component(data_dict) for data_dict in r_json.get('Items') or []],
+            total_count=r_json.get('TotalElementsCount'),
+            page_number=page_number,
+            page_size=page_size,
+        )
+
+    def page_lists(self, page_number=0, page_size=None, filters=None):
+        from mailup.components import List
+
+        return self.get_page(
+            self.client.read_lists,
+            lambda data_dict: List.from_mailup(data_dict=data_dict, client=self.client, logger=self.logger),
+            page_number=page_number, page_size=page_size, filters=filters,
+        )
+
+    def page_groups(self, list_id, page_number=0, page_size=None, filters=None):
+        from mailup.components import Group
+
+        return self.get_page(
+            self.client.read_groups,
+            lambda data_dict: Group.from_mailup(data_dict=data_dict, client=self.client, logger=self.logger),
+            page_number=page_number, page_size=page_size, list_id=list_id, filters=filters,
+        )
+
+    def page_recipients(self, list_id, status, page_number=0, page_size=None, filters=None):
+        from mailup.components import Recipient
+
+        def build_component(data_dict):
+            data_dict['idList'] = list_id
+            return Recipient.from_mailup(data_dict=data_dict, client=self.client, logger=self.logger, status=status)
+
+        return self.get_page(
+            self.client.get_recipients, build_component,
+            page_number=page_number, page_size=page_size, list_id=list_id, status=status, filters=filters,
+        )
+
+    def page_messages(self, list_id, status=None, page_number=0, page_size=None, filters=None):
+        from mailup.components import Message
+
+        return self.get_page(
+            self.client.list_messages,
+            lambda data_dict: Message.from_mailup(data_dict=data_dict, client=self.client, logger=self.logger),
+            page_number=page_number, page_size=page_size, list_id=list_id, status=status, filters=filters,
+        )
+
+    def page_tags(self, list_id, page_number=0, page_size=None):
+        from mailup.components import Tag
+
+        def build_component(data_dict):
+            # Mailup not get (in this case) 'idList' in data_dict
+            data_dict['idList'] = list_id
+            return Tag.from_mailup(data_dict=data_dict, client=self.client, logger=self.logger)
+
+        return self.get_page(
+            self.client.list_tags, build_component,
+            page_number=page_number, page_size=page_size, list_id=list_id,
+        )
+
     # LIST PROVIDER METHODS
     def create_list(self, data_dict):
         from mailup.components import List
@@ -30,7 +149,27 @@ class MailUpComponentProvider(object):
         # check data_dict, not valid InvalidConfigurationException is rise
         List(data_dict, required_fields=['Name', 'owneremail', 'replyto'])
 
-        # Default List parameter
+        self.set_list_defaults(data_dict)
+        list_id = self.client.create_list(
+            data_dict=data_dict
+        )
+
+        # provider = MailUpComponentProvider(client=self.client)
+        # provided_list = None
+        # while not provided_list:
+        #     provided_list = provider.get_list(list_id)
+        #     if not provided_list:
+        #         self.logger.warning('List just created is not ready yet')
+        #         time.sleep(2)
+
+        self.logger.info('List with id {list_id} created successfully'.format(list_id=list_id))
+        return self.get_list(list_id)
+
+    @staticmethod
+    def set_list_defaults(data_dict):
+        """
+        Default List parameters used by create_list
+        """
         if 'useDefaultSettings' not in data_dict:
             data_dict['useDefaultSettings'] = False
         if 'idSettings' not in data_dict:
@@ -71,44 +210,36 @@ class MailUpComponentProvider(object):
             data_dict['subscribedemail'] = True
         if 'sendconfirmsms' not in data_dict:
             data_dict['sendconfirmsms'] = False
-        list_id = self.client.create_list(
-            data_dict=data_dict
-        )
-
-        # provider = MailUpComponentProvider(client=self.client)
-        # provided_list = None
-        # while not provided_list:
-        #     provided_list = provider.get_list(list_id)
-        #     if not provided_list:
-        #         self.logger.warning('List just created is not ready yet')
-        #         time.sleep(2)
-
-        self.logger.info('List with id {list_id} created successfully'.format(list_id=list_id))
-        return self.get_list(list_id)
+        return data_dict
 
     def get_list(self, list_id):
         from mailup.components import List
 
-        items = self.client.read_lists(filters={'idList': list_id})['Items']
+        items = self.client.read_lists(filters={'idList': list_id}, limit=1)['Items']
         if not items:
             self.logger.debug('List with id {list_id} found'.format(list_id=list_id))
             raise exceptions.ListNotFoundException(list_id)
 
         data_dict = items[0]
-        return List(
+        return List.from_mailup(
             data_dict=data_dict,
             client=self.client,
             logger=self.logger
         )
 
-    def all_lists(self):
+    def all_lists(self, raw=False):
+        """
+        :param raw: if True MailUp data dicts are returned instead of List (see List.from_mailup to build them)
+        """
         from mailup.components import List
 
         paginated_data_dicts = self.client.read_lists()
-        all_lists = []
         data_dicts = paginated_data_dicts['Items']
+        if raw:
+            return data_dicts
+        all_lists = []
         for data_dict in data_dicts:
-            new_list = List(
+            new_list = List.from_mailup(
                 data_dict=data_dict,
                 client=self.client,
                 logger=self.logger
@@ -117,14 +248,27 @@ class MailUpComponentProvider(object):
         self.logger.debug('{count} Lists founds'.format(count=len(all_lists)))
         return all_lists
 
-    def filter_lists(self, filters):
+    def iter_lists(self, filters=None):
+        """
+        Generator of List, pages are requested while the generator is consumed
+        """
         from mailup.components import List
 
-        paginated_data_dicts = self.client.read_lists(filters=filters)
+        for data_dict in self.client.read_lists(filters=filters, stream=True):
+            yield List.from_mailup(
+                data_dict=data_dict,
+                client=self.client,
+                logger=self.logger
+            )
+
+    def filter_lists(self, filters, limit=None):
+        from mailup.components import List
+
+        paginated_data_dicts = self.client.read_lists(filters=filters, limit=limit)
         filtered_lists = []
         data_dicts = paginated_data_dicts['Items']
         for data_dict in data_dicts:
-            new_list = List(
+            new_list = List.from_mailup(
                 data_dict=data_dict,
                 client=self.client,
                 logger=self.logger
@@ -146,7 +290,7 @@ class MailUpComponentProvider(object):
             list_id=list_id,
             data_dict=data_dict,
         )
-        new_group = Group(
+        new_group = Group.from_mailup(
             data_dict=new_data_dict,
             client=self.client,
             logger=self.logger
@@ -160,6 +304,7 @@ class MailUpComponentProvider(object):
         items = self.client.read_groups(
             list_id=list_id,
             filters={'idGroup': group_id},
+            limit=1,
         )['Items']
 
         if not items:
@@ -167,19 +312,21 @@ class MailUpComponentProvider(object):
             raise exceptions.GroupNotFoundException(group_id)
 
         data_dict = items[0]
-        return Group(
+        return Group.from_mailup(
             data_dict=data_dict,
             client=self.client,
             logger=self.logger
         )
 
-    def all_groups(self, list_id):
+    def all_groups(self, list_id, raw=False):
         from mailup.components import Group
 
         data_dicts = []
         groups_data_dict = self.client.read_groups(list_id=list_id)
+        if raw:
+            return groups_data_dict['Items']
         for data_dict in groups_data_dict['Items']:
-            group = Group(
+            group = Group.from_mailup(
                 data_dict=data_dict,
                 client=self.client,
                 logger=self.logger
@@ -188,17 +335,28 @@ class MailUpComponentProvider(object):
         self.logger.debug('{count} Groups founds'.format(count=len(data_dicts)))
         return data_dicts
 
-    def filter_groups(self, list_id, filters):
+    def iter_groups(self, list_id, filters=None):
+        from mailup.components import Group
+
+        for data_dict in self.client.read_groups(list_id=list_id, filters=filters, stream=True):
+            yield Group.from_mailup(
+                data_dict=data_dict,
+                client=self.client,
+                logger=self.logger
+            )
+
+    def filter_groups(self, list_id, filters, limit=None):
         from mailup.components import Group
 
         data_dicts = self.client.read_groups(
             list_id=list_id,
-            filters=filters
+            filters=filters,
+            limit=limit,
         )
         filtered_groups = []
         data_dicts = data_dicts['Items']
         for data_dict in data_dicts:
-            new_group = Group(
+            new_group = Group.from_mailup(
                 data_dict=data_dict,
                 client=self.client,
                 logger=self.logger
@@ -208,7 +366,11 @@ class MailUpComponentProvider(object):
         return filtered_groups
 
     # RECIPIENT PROVIDER METHODS
-    def create_recipient(self, data_dict, confirm_email=False):
+    def create_recipient(self, data_dict, confirm_email=False, optimistic=None):
+        """
+        :param optimistic: if True (default MAILUP_OPTIMISTIC_CREATE) the recipient is created without reading it
+                           first, RecipientAlreadyExistException is raised if MailUp refuses a duplicate
+        """
         from mailup.components import Recipient
 
         if confirm_email:
@@ -228,6 +390,10 @@ class MailUpComponentProvider(object):
             status=status,
         )
         email = recipient.email
+        if optimistic is None:
+            optimistic = self.client.configuration['MAILUP_OPTIMISTIC_CREATE']
+        if optimistic:
+            return self.add_recipient(recipient, confirm_email=confirm_email, raise_errors=True)
         try:
             recipient = self.get_recipient(list_id=list_id, email=email, write_log=False)
             if recipient:
@@ -236,18 +402,163 @@ class MailUpComponentProvider(object):
                     email=email,
                 )
         except exceptions.RecipientNotFoundException:
+            return self.add_recipient(recipient, confirm_email=confirm_email)
+
+    def add_recipient(self, recipient, confirm_email=False, raise_errors=False):
+        try:
             recipient_id = self.client.add_recipient_to_list(
-                list_id=list_id,
+                list_id=recipient.list_id,
                 data_dict=recipient.data_dict,
-                confirm_email=confirm_email
+                confirm_email=confirm_email,
+                raise_errors=raise_errors,
             )
-            recipient.data_dict['idRecipient'] = recipient_id
-            self.logger.info('Recipient {new_recipient} created successfully'.format(
-                new_recipient=recipient
+        except exceptions.MailUpCallError as e:
+            if e.is_conflict():
+                raise exceptions.RecipientAlreadyExistException(
+                    list_id=recipient.list_id,
+                    email=recipient.email,
+                )
+            raise
+        recipient.data_dict['idRecipient'] = recipient_id
+        self.logger.info('Recipient {new_recipient} created successfully'.format(
+            new_recipient=recipient
+        ))
+        return recipient
+
+    def create_recipients(self, data_dicts, confirm_email=False, wait_import=False, chunk_size=None):
+        """
+        Create many recipients like create_recipient, with import calls of "chunk_size" recipients
+        (MAILUP_IMPORT_CHUNK_SIZE) instead of a call for each one. Recipients already on their list (or repeated in
+        "data_dicts") are not sent and are returned as "existing".
+        Imports are processed by MailUp in background: ids of created recipients are set only with wait_import=True.
+
+        :return: dict with "created" and "existing" Recipient lists and "import_ids"
+        """
+        status = 'pending' if confirm_email else 'subscribed'
+        recipients_by_list = self.group_recipients_by_list(data_dicts, status, self.logger, client=self.client)
+        chunk_size = chunk_size or self.client.configuration['MAILUP_IMPORT_CHUNK_SIZE']
+
+        result = {'created': [], 'existing': [], 'import_ids': []}
+        for list_id, recipients in recipients_by_list.items():
+            found = self.get_recipients_by_emails(list_id, [recipient.email for recipient in recipients], write_log=False)
+            new_recipients = self.split_existing_recipients(recipients, found, result)
+            import_ids = []
+            for index in range(0, len(new_recipients), chunk_size):
+                chunk = new_recipients[index:index + chunk_size]
+                import_id = self.client.subscribe_recipients_to_list(
+                    list_id=list_id,
+                    list_data_dict=[recipient.data_dict for recipient in chunk],
+                    confirm_email=confirm_email,  # confirm_email=True => "Pending"; confirm_email=False => "Subscribed"
+                    raise_errors=True,
+                )
+                import_ids.append(self.check_import_id(import_id, list_id, index, len(chunk)))
+            self.logger.info('{count} recipients submitted to list {list_id}, import_ids={import_ids}'.format(
+                count=len(new_recipients),
+                list_id=list_id,
+                import_ids=import_ids,
             ))
-            return recipient
+            if wait_import and new_recipients:
+                for import_id in import_ids:
+                    self.wait_import(import_id)
+                created = self.get_recipients_by_emails(
+                    list_id, [recipient.email for recipient in new_recipients], status=status,
+                )
+                self.set_created_ids(new_recipients, created)
+            result['import_ids'].extend(import_ids)
+        return result
+
+    @staticmethod
+    def check_import_id(import_id, list_id, index, count):
+        """
+        :return: "import_id", MailUpCallError is raised if MailUp accepted the import of recipients from "index" to
+                 "index + count" without returning its id
+        """
+        if import_id is None:
+            raise exceptions.MailUpCallError(
+                'Import of recipients {first}-{last} on list {list_id} returned no import id'.format(
+                    first=index,
+                    last=index + count - 1,
+                    list_id=list_id,
+                )
+            )
+        return import_id
 
-    def get_recipient(self, list_id, recipient_id=None, email=None, status=None, write_log=True):
+    @staticmethod
+    def group_recipients_by_list(data_dicts, status, logger, client=None):
+        """
+        Recipients of "data_dicts" grouped by idList (checked like create_recipient does)
+        """
+        from mailup.components import Recipient
+
+        recipients_by_list = OrderedDict()
+        for data_dict in data_dicts:
+            # check data_dict, not valid InvalidConfigurationException is rise
+            recipient = Recipient(data_dict=data_dict, client=client, logger=logger, status=status)
+            recipients_by_list.setdefault(recipient.list_id, []).append(recipient)
+        return recipients_by_list
+
+    @staticmethod
+    def split_existing_recipients(recipients, found, result):
+        """
+        Add to result["existing"] the recipients found on MailUp or repeated, to result["created"] the others
+
+        :return: recipients to create
+        """
+        new_recipients = []
+        new_emails = set()
+        for recipient in recipients:
+            if found.get(recipient.email) is not None:
+                result['existing'].append(found[recipient.email])
+            elif recipient.email.lower() in new_emails:
+                result['existing'].append(recipient)
+            else:
+                new_emails.add(recipient.email.lower())
+                new_recipients.append(recipient)
+        result['created'].extend(new_recipients)
+        return new_recipients
+
+    @staticmethod
+    def set_created_ids(recipients, created):
+        for recipient in recipients:
+            if created.get(recipient.email) is not None:
+                recipient.data_dict['idRecipient'] = created[recipient.email].id
+
+    def wait_import(self, import_id, poll_interval=2, timeout=None):
+        """
+        Wait until import with id "import_id" is complete
+
+        :param timeout: seconds (default MAILUP_IMPORT_TIMEOUT) after which ImportTimeoutException is raised
+        :return: import status
+        """
+        if timeout is None:
+            timeout = self.client.configuration['MAILUP_IMPORT_TIMEOUT']
+        deadline = time.time() + timeout
+        while True:
+            status = self.client.read_import_status(import_id)
+            if self.is_import_complete(import_id, status, deadline, timeout, self.logger):
+                return status
+            self.logger.warning('Waiting {} seconds import is complete..'.format(poll_interval))
+            time.sleep(poll_interval)
+
+    @staticmethod
+    def is_import_complete(import_id, status, deadline, timeout, logger):
+        """
+        :param status: import status read from MailUp, None if the call failed (it is read again)
+        :return: True if the import is complete; ImportTimeoutException is raised after "deadline"
+        """
+        if status is None:
+            logger.warning('Status of import {} not read'.format(import_id))
+        elif status.get('Completed'):
+            return True
+        if time.time() >= deadline:
+            raise exceptions.ImportTimeoutException(import_id, timeout)
+        return False
+
+    def get_recipient(self, list_id, recipient_id=None, email=None, status=None, write_log=True, parallel=None):
+        """
+        :param parallel: if True (default MAILUP_PARALLEL_LOOKUP) and status is not given, the three statuses are
+                         searched concurrently and the first recipient found is returned
+        """
         from mailup.components import Recipient
 
         filters = {}
@@ -262,23 +573,28 @@ class MailUpComponentProvider(object):
             self.logger.warning('"get_recipient" without "recipient_id" or "email"')
             return None
 
-        for status_tried in ['subscribed', 'unsubscribed', 'pending']:
-            if status == status_tried or not status:
-                data_dicts = self.client.get_recipients(
-                    list_id=list_id,
-                    filters=filters,
-                    status=status_tried,
-                )['Items']
-                if data_dicts:
-                    data_dict = data_dicts[0]
-                    if data_dict:
-                        data_dict['idList'] = list_id
-                        return Recipient(
-                            data_dict=data_dict,
-                            client=self.client,
-                            logger=self.logger,
-                            status=status_tried,
-                        )
+        if parallel is None:
+            parallel = self.client.configuration['MAILUP_PARALLEL_LOOKUP']
+        statuses = [status] if status else ['subscribed', 'unsubscribed', 'pending']
+
+        if parallel and len(statuses) > 1:
+            data_dict, status_found = self.find_recipient_parallel(list_id, filters, statuses)
+        else:
+            data_dict, status_found = None, None
+            for status_tried in statuses:
+                data_dict = self.find_recipient(list_id, filters, status_tried)
+                if data_dict:
+                    status_found = status_tried
+                    break
+
+        if data_dict:
+            data_dict['idList'] = list_id
+            return Recipient.from_mailup(
+                data_dict=data_dict,
+                client=self.client,
+                logger=self.logger,
+                status=status_found,
+            )
         raise exceptions.RecipientNotFoundException(
             recipient_id=recipient_id,
             email=email,
@@ -286,7 +602,38 @@ class MailUpComponentProvider(object):
             write_log=write_log
         )
 
-    def all_recipients_subscribed(self, list_id):
+    def find_recipient(self, list_id, filters, status):
+        """
+        data_dict of the first recipient with "status" matching "filters", None if not found.
+        Only the first item is requested. A failed call raises MailUpCallError: it is not "not found".
+        """
+        items = self.client.get_recipients(
+            list_id=list_id, status=status, filters=filters, limit=1, stream=True, raise_errors=True,
+        )
+        return next(iter(items), None)
+
+    def find_recipient_parallel(self, list_id, filters, statuses):
+        """
+        find_recipient on "statuses" concurrently
+
+        :return: data_dict and status of the first recipient found in "statuses" order, (None, None) if not found
+        """
+        futures = [
+            (self.client.executor.submit(self.find_recipient, list_id, filters, status), status) for status in statuses
+        ]
+        try:
+            # results are taken in "statuses" order, as the sequential lookup does
+            for future, status in futures:
+                data_dict = future.result()
+                if data_dict:
+                    return data_dict, status
+            return None, None
+        finally:
+            # lookups not started yet (all workers busy) are not done, running ones can not be stopped
+            for future, status in futures:
+                future.cancel()
+
+    def all_recipients_subscribed(self, list_id, raw=False):
         from mailup.components import Recipient
         recipient_list = []
 
@@ -294,10 +641,12 @@ class MailUpComponentProvider(object):
             list_id=list_id,
             status='subscribed',
         )['Items']
+        if raw:
+            return self.set_list_id(data_dicts, list_id)
         if data_dicts:
             for data_dict in data_dicts:
                 data_dict['idList'] = list_id
-                recipient = Recipient(
+                recipient = Recipient.from_mailup(
                     data_dict=data_dict,
                     client=self.client,
                     logger=self.logger,
@@ -306,7 +655,7 @@ class MailUpComponentProvider(object):
                 recipient_list.append(recipient)
         return recipient_list
 
-    def all_recipients_unsubscribed(self, list_id):
+    def all_recipients_unsubscribed(self, list_id, raw=False):
         from mailup.components import Recipient
         recipient_list = []
 
@@ -314,10 +663,12 @@ class MailUpComponentProvider(object):
             list_id=list_id,
             status='unsubscribed',
         )['Items']
+        if raw:
+            return self.set_list_id(data_dicts, list_id)
         if data_dicts:
             for data_dict in data_dicts:
                 data_dict['idList'] = list_id
-                recipient = Recipient(
+                recipient = Recipient.from_mailup(
                     data_dict=data_dict,
                     client=self.client,
                     logger=self.logger,
@@ -326,7 +677,7 @@ class MailUpComponentProvider(object):
                 recipient_list.append(recipient)
         return recipient_list
 
-    def all_recipients_pending(self, list_id):
+    def all_recipients_pending(self, list_id, raw=False):
         from mailup.components import Recipient
         recipient_list = []
 
@@ -334,10 +685,12 @@ class MailUpComponentProvider(object):
             list_id=list_id,
             status='pending',
         )['Items']
+        if raw:
+            return self.set_list_id(data_dicts, list_id)
         if data_dicts:
             for data_dict in data_dicts:
                 data_dict['idList'] = list_id
-                recipient = Recipient(
+                recipient = Recipient.from_mailup(
                     data_dict=data_dict,
                     client=self.client,
                     logger=self.logger,
@@ -346,15 +699,119 @@ class MailUpComponentProvider(object):
                 recipient_list.append(recipient)
         return recipient_list
 
-    def all_recipients(self, list_id):
-        subscribed_recipients = self.all_recipients_subscribed(list_id=list_id)
-        unsubscribed_recipients = self.all_recipients_unsubscribed(list_id=list_id)
-        pending_recipients = self.all_recipients_pending(list_id=list_id)
-        all_recipient = subscribed_recipients + unsubscribed_recipients + pending_recipients
+    def all_recipients(self, list_id, parallel=False, raw=False):
+        """
+        :param parallel: if True the three statuses are read concurrently (see iter_all_recipients)
+        :param raw: if True MailUp data dicts are returned instead of Recipient (they do not tell the status)
+        """
+        if parallel:
+            recipients_by_status = dict(subscribed=[], unsubscribed=[], pending=[])
+            for status, recipient in self.iter_all_recipients(list_id=list_id, raw=True, with_status=True):
+                if not raw:
+                    recipient = self.build_recipient(recipient, status)
+                recipients_by_status[status].append(recipient)
+            all_recipient = (
+                recipients_by_status['subscribed'] + recipients_by_status['unsubscribed'] +
+                recipients_by_status['pending']
+            )
+        else:
+            subscribed_recipients = self.all_recipients_subscribed(list_id=list_id, raw=raw)
+            unsubscribed_recipients = self.all_recipients_unsubscribed(list_id=list_id, raw=raw)
+            pending_recipients = self.all_recipients_pending(list_id=list_id, raw=raw)
+            all_recipient = subscribed_recipients + unsubscribed_recipients + pending_recipients
         self.logger.debug('{count} Recipient founds'.format(count=len(all_recipient)))
         return all_recipient
 
-    def filter_recipients(self, list_id, filters, status=None):
+    def iter_all_recipients(self, list_id, statuses=('subscribed', 'unsubscribed', 'pending'), filters=None,
+                            raw=False, with_status=False):
+        """
+        Generator of Recipient of all "statuses" (recipient.status tells which one): statuses are streamed
+        concurrently and recipients are yielded as they arrive, so their order is not defined.
+        At most a page for each status is kept in memory waiting to be consumed.
+
+        :param raw: if True MailUp data dicts are yielded instead of Recipient
+        :param with_status: if True (status, recipient) tuples are yielded
+        """
+        page_size = self.client.configuration['MAILUP_DEFAULT_PAGE_SIZE']
+        items = queue.Queue(maxsize=page_size * len(statuses))
+        stop = threading.Event()
+
+        def put(item):
+            # producers stop waiting when the generator is closed
+            while not stop.is_set():
+                try:
+                    items.put(item, timeout=0.1)
+                    return True
+                except queue.Full:
+                    pass
+            return False
+
+        def read(status):
+            error = None
+            try:
+                for data_dict in self.client.get_recipients(
+                    list_id=list_id, status=status, filters=filters, stream=True,
+                ):
+                    if not put((status, data_dict)):
+                        return
+            except Exception as e:
+                error = e
+            # end of "status": (None, exception or None)
+            put((None, error))
+
+        executor = ThreadPoolExecutor(max_workers=len(statuses))
+        try:
+            for status in statuses:
+                executor.submit(read, status)
+            running = len(statuses)
+            while running:
+                status, data_dict = items.get()
+                if status is None:
+                    if data_dict is not None:
+                        raise data_dict
+                    running -= 1
+                    continue
+                data_dict['idList'] = list_id
+                recipient = data_dict if raw else self.build_recipient(data_dict, status)
+                yield (status, recipient) if with_status else recipient
+        finally:
+            stop.set()
+            executor.shutdown(wait=False)
+
+    def build_recipient(self, data_dict, status=None):
+        """
+        Recipient of a data dict read from MailUp (see get_recipients_by_emails for data dicts of a lookup)
+        """
+        from mailup.components import Recipient
+
+        return Recipient.from_mailup(data_dict, client=self.client, logger=self.logger, status=status)
+
+    @staticmethod
+    def set_list_id(data_dicts, list_id):
+        # Mailup not get 'idList' in recipients and tags data_dict
+        for data_dict in data_dicts:
+            data_dict['idList'] = list_id
+        return data_dicts
+
+    def iter_recipients(self, list_id, status, filters=None):
+        """
+        Generator of Recipient with status "status", pages are requested while the generator is consumed
+        """
+        from mailup.components import Recipient
+
+        for data_dict in self.client.get_recipients(list_id=list_id, status=status, filters=filters, stream=True):
+            data_dict['idList'] = list_id
+            yield Recipient.from_mailup(
+                data_dict=data_dict,
+                client=self.client,
+                logger=self.logger,
+                status=status,
+            )
+
+    def filter_recipients(self, list_id, filters, status=None, limit=None):
+        """
+        :param limit: max number of recipients returned (for each status if status is not given)
+        """
         from mailup.components import Recipient
         recipient_list = []
 
@@ -363,10 +820,11 @@ class MailUpComponentProvider(object):
                 list_id=list_id,
                 status=status,
                 filters=filters,
+                limit=limit,
             )['Items']
             for data_dict in data_dicts:
                 data_dict['idList'] = list_id
-                recipient = Recipient(
+                recipient = Recipient.from_mailup(
                     data_dict=data_dict,
                     client=self.client,
                     logger=self.logger,
@@ -380,10 +838,11 @@ class MailUpComponentProvider(object):
                     list_id=list_id,
                     status=status_tried,
                     filters=filters,
+                    limit=limit,
                 )['Items']
                 for data_dict in data_dicts:
                     data_dict['idList'] = list_id
-                    recipient = Recipient(
+                    recipient = Recipient.from_mailup(
                         data_dict=data_dict,
                         client=self.client,
                         logger=self.logger,
@@ -392,6 +851,129 @@ class MailUpComponentProvider(object):
                     recipient_list.append(recipient)
             return recipient_list
 
+    def get_recipient_batch(self, list_id, statuses=('subscribed', 'unsubscribed', 'pending'), filters=None):
+        """
+        RecipientBatch of the recipients of list "list_id" with "statuses", filled page by page without building
+        a Recipient for each one
+        """
+        from mailup.batches import RecipientBatch
+
+        batch = RecipientBatch(list_id=list_id)
+        for status in statuses:
+            batch.extend_items(
+                self.client.get_recipients(list_id=list_id, status=status, filters=filters, stream=True),
+                status=status,
+            )
+        return batch
+
+    def get_recipients_by_emails(self, list_id, emails, status=None, chunk_size=None, write_log=True):
+        """
+        Recipients of list "list_id" with the given emails, read with a filter for each chunk of emails.
+        Chunks and statuses are read concurrently (MAILUP_MAX_WORKERS threads).
+
+        :return: dict email: Recipient, None for the emails not found (they are logged, not raised)
+        """
+        return self.get_recipients_by_field(
+            list_id, 'Email', emails, status=status, chunk_size=chunk_size, write_log=write_log,
+        )
+
+    def get_recipients_by_ids(self, list_id, recipient_ids, status=None, chunk_size=None, write_log=True):
+        """
+        Like get_recipients_by_emails, by idRecipient
+
+        :return: dict recipient_id: Recipient, None for the ids not found
+        """
+        return self.get_recipients_by_field(
+            list_id, 'idRecipient', recipient_ids, status=status, chunk_size=chunk_size, write_log=write_log,
+        )
+
+    def get_recipients_by_field(self, list_id, field, keys, status=None, chunk_size=None, write_log=True):
+        keys = list(keys)
+        lookups = self.get_lookups(
+            field, keys, status, chunk_size or self.client.configuration['MAILUP_LOOKUP_CHUNK_SIZE'],
+        )
+
+        def read(lookup):
+            lookup_status, filters = lookup
+            response = self.client.get_recipients(list_id=list_id, status=lookup_status, filters=filters)
+            if response is None:
+                raise exceptions.MailUpCallError('Recipients lookup failed on list {}'.format(list_id))
+            return response['Items']
+
+        futures = [self.client.executor.submit(read, lookup) for lookup in lookups]
+        try:
+            results = [future.result() for future in futures]
+        finally:
+            # after a failed lookup the ones not started yet are not done
+            for future in futures:
+                future.cancel()
+        return self.build_lookup_result(
+            list_id, field, keys, lookups, results, self.logger, client=self.client, write_log=write_log,
+        )
+
+    @staticmethod
+    def get_lookups(field, keys, status, chunk_size):
+        """
+        (status, filters) of each call needed to look up "keys": keys are chunked in filters joined with ||, keys
+        repeated with another case are looked up once
+        """
+        statuses = [status] if status else ['subscribed', 'unsubscribed', 'pending']
+        unique_keys = []
+        seen = set()
+        for key in keys:
+            lookup_key = MailUpComponentProvider.lookup_key(key)
+            if lookup_key not in seen:
+                seen.add(lookup_key)
+                unique_keys.append(key)
+        return [
+            (status_tried, F(field).isin(unique_keys[index:index + chunk_size]))
+            for index in range(0, len(unique_keys), chunk_size)
+            for status_tried in statuses
+        ]
+
+    @staticmethod
+    def lookup_key(value):
+        """
+        Case insensitive key of a looked up value, unicode safe on python 2
+        """
+        if isinstance(value, string_types):
+            return value.lower()
+        return text_type(value).lower()
+
+    @staticmethod
+    def build_lookup_result(list_id, field, keys, lookups, results, logger, client=None, write_log=True):
+        """
+        Map "keys" to the Recipient found by "lookups", a recipient in more statuses gets the first one
+        (subscribed, unsubscribed, pending)
+        """
+        from mailup.components import Recipient
+
+        found = dict()
+        for (status, filters), data_dicts in zip(lookups, results):
+            for data_dict in data_dicts:
+                # MailUp emails are case insensitive
+                found_key = MailUpComponentProvider.lookup_key(data_dict.get(field))
+                if found_key in found:
+                    continue
+                data_dict['idList'] = list_id
+                found[found_key] = Recipient.from_mailup(
+                    data_dict=data_dict,
+                    client=client,
+                    logger=logger,
+                    status=status,
+                )
+
+        recipients = dict((key, found.get(MailUpComponentProvider.lookup_key(key))) for key in keys)
+        missing = [key for key, recipient in recipients.items() if recipient is None]
+        if missing and write_log:
+            logger.warning(u'{count} recipients not found on list {list_id} by {field}: {missing}'.format(
+                count=len(missing),
+                list_id=list_id,
+                field=field,
+                missing=u', '.join(text_type(key) for key in missing[:20]) + (u', ...' if len(missing) > 20 else ''),
+            ))
+        return recipients
+
     # MESSAGE PROVIDER METHODS
     def create_message(
             self, data_dict, content='', embed=False, is_confirmation=False, tracking_info=None
@@ -421,7 +1003,7 @@ class MailUpComponentProvider(object):
         )
 
         new_data_dict = response
-        new_message = Message(
+        new_message = Message.from_mailup(
             data_dict=new_data_dict,
             client=self.client,
             logger=self.logger,
@@ -434,16 +1016,17 @@ class MailUpComponentProvider(object):
 
         try:
             data_dict = self.client.read_message_detail(list_id, message_id)
-            message = Message(
+            message = Message.from_mailup(
                 data_dict=data_dict,
                 client=self.client,
                 logger=self.logger,
+                detail=True,
             )
             return message
         except exceptions.MailUpCallError:
             raise exceptions.MessageNotFoundException(message_id=message_id)
 
-    def all_messages(self, list_id, status=None):
+    def all_messages(self, list_id, status=None, raw=False):
         from mailup.components import Message
 
         data_dicts = self.client.list_messages(
@@ -452,8 +1035,10 @@ class MailUpComponentProvider(object):
         )
         all_messages = []
         messages_data_dict = data_dicts['Items']
+        if raw:
+            return messages_data_dict
         for data_dict in messages_data_dict:
-            message = Message(
+            message = Message.from_mailup(
                 data_dict=data_dict,
                 client=self.client,
                 logger=self.logger,
@@ -462,24 +1047,35 @@ class MailUpComponentProvider(object):
         self.logger.debug('Messages found')
         return all_messages
 
-    def all_published_messages(self, list_id):
-        return self.all_messages(list_id=list_id, status='Online')
+    def iter_messages(self, list_id, status=None, filters=None):
+        from mailup.components import Message
+
+        for data_dict in self.client.list_messages(list_id=list_id, status=status, filters=filters, stream=True):
+            yield Message.from_mailup(
+                data_dict=data_dict,
+                client=self.client,
+                logger=self.logger,
+            )
+
+    def all_published_messages(self, list_id, raw=False):
+        return self.all_messages(list_id=list_id, status='Online', raw=raw)
 
-    def all_archived_messages(self, list_id):
-        return self.all_messages(list_id=list_id, status='Archived')
+    def all_archived_messages(self, list_id, raw=False):
+        return self.all_messages(list_id=list_id, status='Archived', raw=raw)
 
-    def filter_messages(self, list_id, status=None, filters=None):
+    def filter_messages(self, list_id, status=None, filters=None, limit=None):
         from mailup.components import Message
 
         data_dicts = self.client.list_messages(
             list_id=list_id,
             status=status,
             filters=filters,
+            limit=limit,
         )
         all_messages = []
         messages_data_dict = data_dicts['Items']
         for data_dict in messages_data_dict:
-            message = Message(
+            message = Message.from_mailup(
                 data_dict=data_dict,
                 client=self.client,
                 logger=self.logger,
@@ -489,7 +1085,11 @@ class MailUpComponentProvider(object):
         return all_messages
 
     # TAG PROVIDER METHOD
-    def create_tag(self, data_dict):
+    def create_tag(self, data_dict, optimistic=None):
+        """
+        :param optimistic: if True (default MAILUP_OPTIMISTIC_CREATE) the tag is created without reading it first,
+                           TagAlreadyExistException is raised if MailUp refuses a duplicate
+        """
         from mailup.components import Tag
 
         # check data_dict, not valid InvalidConfigurationException is rise
@@ -497,6 +1097,10 @@ class MailUpComponentProvider(object):
         list_id = data_dict['idList']
         tag_name = data_dict['Name']
 
+        if optimistic is None:
+            optimistic = self.client.configuration['MAILUP_OPTIMISTIC_CREATE']
+        if optimistic:
+            return self.add_tag(list_id, tag_name, raise_errors=True)
         try:
             self.get_tag(list_id, tag_name=tag_name, write_log=False)
             raise exceptions.TagAlreadyExistException(
@@ -504,30 +1108,44 @@ class MailUpComponentProvider(object):
                 tag_name=tag_name,
             )
         except exceptions.TagNotFoundException:
+            return self.add_tag(list_id, tag_name)
+
+    def add_tag(self, list_id, tag_name, raise_errors=False):
+        from mailup.components import Tag
+
+        try:
             response = self.client.create_tag(
                 list_id=list_id,
-                tag_name=data_dict['Name'],
-            )
-            new_data_dict = response
-            new_data_dict['idList'] = list_id
-            new_tag = Tag(
-                data_dict=new_data_dict,
-                client=self.client,
-                logger=self.logger
+                tag_name=tag_name,
+                raise_errors=raise_errors,
             )
-            self.logger.info('Tag {new_tag} created successfully'.format(new_tag=new_tag))
-            return new_tag
+        except exceptions.MailUpCallError as e:
+            if e.is_conflict():
+                raise exceptions.TagAlreadyExistException(
+                    list_id=list_id,
+                    tag_name=tag_name,
+                )
+            raise
+        new_data_dict = response
+        new_data_dict['idList'] = list_id
+        new_tag = Tag.from_mailup(
+            data_dict=new_data_dict,
+            client=self.client,
+            logger=self.logger
+        )
+        self.logger.info('Tag {new_tag} created successfully'.format(new_tag=new_tag))
+        return new_tag
 
     def get_tag(self, list_id, tag_id=None, tag_name=None, write_log=True):
         from mailup.components import Tag
 
         if not tag_id and not tag_name:
             return self.all_tags(list_id)
-        tags_data_paginated = self.client.list_tags(list_id=list_id, tag_id=tag_id, tag_name=tag_name)
+        tags_data_paginated = self.client.list_tags(list_id=list_id, tag_id=tag_id, tag_name=tag_name, limit=1)
         if tags_data_paginated and tags_data_paginated['TotalElementsCount'] > 0:
             data_dict = tags_data_paginated['Items'][0]
             data_dict['idList'] = list_id
-            tag = Tag(
+            tag = Tag.from_mailup(
                 data_dict=data_dict,
                 client=self.client,
                 logger=self.logger
@@ -541,17 +1159,18 @@ class MailUpComponentProvider(object):
                 write_log=write_log
             )
 
-    def all_tags(self, list_id):
+    def all_tags(self, list_id, raw=False):
         from mailup.components import Tag
 
         tags_list = []
         tags_data_dict = self.client.list_tags(list_id=list_id)
+        if raw:
+            return self.set_list_id(tags_data_dict['Items'], list_id)
         for data_dict in tags_data_dict['Items']:
             # Mailup not get (in this case) 'idList' in data_dict
             data_dict['idList'] = list_id
 
-            # check data_dict, not valid InvalidConfigurationException is rise
-            tag = Tag(
+            tag = Tag.from_mailup(
                 data_dict=data_dict,
                 client=self.client,
                 logger=self.logger
@@ -560,6 +1179,18 @@ class MailUpComponentProvider(object):
         self.logger.debug('{count} Tags founds'.format(count=len(tags_list)))
         return tags_list
 
+    def iter_tags(self, list_id):
+        from mailup.components import Tag
+
+        for data_dict in self.client.list_tags(list_id=list_id, stream=True):
+            # Mailup not get (in this case) 'idList' in data_dict
+            data_dict['idList'] = list_id
+            yield Tag.from_mailup(
+                data_dict=data_dict,
+                client=self.client,
+                logger=self.logger
+            )
+
     # ATTACHMENT PROVIDER METHODS
     def all_attachments(self, list_id, message_id):
         from mailup.components import Attachment
@@ -0,0 +1,78 @@
+# coding: utf-8
+
+import random
+import time
+from email.utils import parsedate_tz
+from email.utils import mktime_tz
+
+
+class RetryPolicy(object):
+    """
+    Decide if a failed MailUp call can be repeated and how long to wait before doing it.
+
+    Waits grow exponentially (backoff_base * 2 ** attempt) up to backoff_cap seconds; with full jitter a random
+    wait between 0 and that value is used, so workers throttled at the same moment do not call MailUp again
+    all together. A "Retry-After" header sent by MailUp is honored.
+
+    A request refused by MailUp (403, 429) has not been executed and is always repeated. A request that may have
+    been executed (timeout, connection error, 502/503/504) is repeated only for idempotent methods, or if the
+    caller marks it as safe.
+    """
+
+    IDEMPOTENT_METHODS = frozenset(['GET', 'HEAD', 'OPTIONS', 'PUT', 'DELETE'])
+
+    def __init__(
+        self, attempts=20, backoff_base=2, backoff_cap=60, jitter=True, respect_retry_after=True,
+        rejected_statuses=(403, 429), retry_statuses=(502, 503, 504), idempotent_methods=None,
+    ):
+        self.attempts = attempts
+        self.backoff_base = backoff_base
+        self.backoff_cap = backoff_cap
+        self.jitter = jitter
+        self.respect_retry_after = respect_retry_after
+        self.rejected_statuses = frozenset(rejected_statuses)
+        self.retry_statuses = frozenset(retry_statuses)
+        self.idempotent_methods = frozenset(idempotent_methods or self.IDEMPOTENT_METHODS)
+
+    def is_retryable(self, method, status_code=None, safe=False):
+        """
+        :param method: HTTP method of the request
+        :param status_code: response status code, None if no response has been received
+        :param safe: True if the request can be repeated even if it is not idempotent
+        """
+        if status_code in self.rejected_statuses:
+            return True
+        if status_code is not None and status_code not in self.retry_statuses:
+            return False
+        return safe or method.upper() in self.idempotent_methods
+
+    def get_backoff(self, attempt, response=None):
+        """
+        Seconds to wait before repeating a request that failed "attempt" times (attempt starts from 1)
+        """
+        if self.respect_retry_after and response is not None:
+            retry_after = self.parse_retry_after(response)
+            if retry_after is not None:
+                return retry_after
+
+        backoff = min(self.backoff_cap, self.backoff_base * (2 ** (attempt - 1)))
+        if self.jitter:
+            return random.uniform(0, backoff)
+        return backoff
+
+    @staticmethod
+    def parse_retry_after(response):
+        """
+        Seconds in "Retry-After" header (delay in seconds or HTTP date), None if missing or not valid
+        """
+        headers = getattr(response, 'headers', None) or {}
+        value = headers.get('Retry-After')
+        if not value:
+            return None
+        value = value.strip()
+        if value.isdigit():
+            return int(value)
+        date_tuple = parsedate_tz(value)
+        if date_tuple is None:
+            return None
+        return max(mktime_tz(date_tuple) - time.time(), 0)
@@ -0,0 +1,185 @@
+# coding: utf-8
+
+import contextlib
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+
+try:
+    import fcntl
+except ImportError:
+    # not available on Windows: the file is still written atomically, but processes are not serialized
+    fcntl = None
+
+
+class TokenStore(object):
+    """
+    Storage of the MailUp token shared by the processes using the same account, so a new process can reuse a still
+    valid access/refresh token pair instead of logging on again.
+
+    A stored token is a dict with "access_token", "refresh_token" and "expires_at" (timestamp, may be None).
+    load() and save() do not lock: MailUpClient calls them inside lock(), so a single process at a time requests
+    a token for a given key while the others wait and then load it.
+    """
+
+    def __init__(self):
+        self._local = threading.local()
+
+    @staticmethod
+    def get_key(client_id, username):
+        return '{}:{}'.format(client_id, username)
+
+    def load(self, key):
+        raise NotImplementedError
+
+    def save(self, key, token):
+        raise NotImplementedError
+
+    @contextlib.contextmanager
+    def lock(self, key):
+        # re-entrant for the thread holding the lock
+        depth = getattr(self._local, 'depth', 0)
+        if not depth:
+            self.acquire_lock(key)
+        self._local.depth = depth + 1
+        try:
+            yield
+        finally:
+            self._local.depth = depth
+            if not depth:
+                self.release_lock(key)
+
+    def acquire_lock(self, key):
+        pass
+
+    def release_lock(self, key):
+        pass
+
+
+class FileTokenStore(TokenStore):
+    """
+    Tokens stored in a JSON file (readable only by its owner), processes are serialized with an flock on
+    "<path>.lock"
+    """
+
+    def __init__(self, path):
+        super(FileTokenStore, self).__init__()
+        self.path = path
+
+    def read(self):
+        try:
+            with open(self.path) as token_file:
+                return json.load(token_file)
+        except (IOError, OSError, ValueError):
+            return {}
+
+    def load(self, key):
+        return self.read().get(key)
+
+    def save(self, key, token):
+        tokens = self.read()
+        tokens[key] = token
+        # written to a temporary file and renamed: readers never see a partial file
+        tmp_path = '{}.{}.tmp'.format(self.path, os.getpid())
+        fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, 'w') as token_file:
+            json.dump(tokens, token_file)
+        os.rename(tmp_path, self.path)
+
+    def acquire_lock(self, key):
+        if fcntl is None:
+            return
+        fd = os.open(self.path + '.lock', os.O_WRONLY | os.O_CREAT, 0o600)
+        fcntl.flock(fd, fcntl.LOCK_EX)
+        self._local.lock_fd = fd
+
+    def release_lock(self, key):
+        fd = getattr(self._local, 'lock_fd', None)
+        if fd is None:
+            return
+        self._local.lock_fd = None
+        fcntl.flock(fd, fcntl.LOCK_UN)
+        os.close(fd)
+
+
+class SQLiteTokenStore(TokenStore):
+    """
+    Tokens stored in a SQLite database. Processes are serialized with a lease: a row telling which thread of which
+    process is requesting the token of a key, until "lease_time" seconds have passed. Transactions last only the time
+    to read or write a row, the token request is done outside them: waiting processes poll the lease every
+    "poll_interval" seconds and never hit the SQLite busy timeout.
+    """
+
+    def __init__(self, path, lease_time=120, poll_interval=0.1):
+        super(SQLiteTokenStore, self).__init__()
+        self.path = path
+        self.lease_time = lease_time
+        self.poll_interval = poll_interval
+
+    @property
+    def connection(self):
+        # sqlite connections can not be shared between threads and forked processes
+        if getattr(self._local, 'pid', None) != os.getpid():
+            connection = sqlite3.connect(self.path, timeout=60, isolation_level=None)
+            connection.execute(
+                'CREATE TABLE IF NOT EXISTS mailup_token '
+                '(key TEXT PRIMARY KEY, access_token TEXT, refresh_token TEXT, expires_at REAL)'
+            )
+            connection.execute(
+                'CREATE TABLE IF NOT EXISTS mailup_token_lease '
+                '(key TEXT PRIMARY KEY, owner TEXT NOT NULL, expires_at REAL NOT NULL)'
+            )
+            self._local.connection = connection
+            self._local.pid = os.getpid()
+            self._local.depth = 0
+            self._local.owner = '{}:{}'.format(os.getpid(), uuid.uuid4().hex)
+        return self._local.connection
+
+    def load(self, key):
+        row = self.connection.execute(
+            'SELECT access_token, refresh_token, expires_at FROM mailup_token WHERE key = ?', (key,)
+        ).fetchone()
+        if not row:
+            return None
+        return dict(zip(('access_token', 'refresh_token', 'expires_at'), row))
+
+    def save(self, key, token):
+        self.connection.execute(
+            'INSERT OR REPLACE INTO mailup_token (key, access_token, refresh_token, expires_at) VALUES (?, ?, ?, ?)',
+            (key, token['access_token'], token['refresh_token'], token.get('expires_at'))
+        )
+
+    def acquire_lock(self, key):
+        while not self.take_lease(key):
+            time.sleep(self.poll_interval)
+
+    def take_lease(self, key):
+        """
+        Take the lease of "key" if it is free or expired (its holder died or is too slow)
+
+        :return: True if the lease has been taken
+        """
+        connection = self.connection
+        now = time.time()
+        connection.execute('BEGIN IMMEDIATE')
+        try:
+            row = connection.execute(
+                'SELECT owner, expires_at FROM mailup_token_lease WHERE key = ?', (key,)
+            ).fetchone()
+            if row is not None and row[0] != self._local.owner and row[1] > now:
+                return False
+            connection.execute(
+                'INSERT OR REPLACE INTO mailup_token_lease (key, owner, expires_at) VALUES (?, ?, ?)',
+                (key, self._local.owner, now + self.lease_time)
+            )
+            return True
+        finally:
+            connection.execute('COMMIT')
+
+    def release_lock(self, key):
+        self.connection.execute(
+            'DELETE FROM mailup_token_lease WHERE key = ? AND owner = ?', (key, self._local.owner)
+        )
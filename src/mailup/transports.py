@@ -0,0 +1,78 @@
+# coding: utf-8
+
+import os
+import threading
+
+import requests
+from requests.adapters import HTTPAdapter
+
+
+class MailUpTransport(object):
+    """
+    Connection-pooled HTTP transport used by a MailUpClient.
+
+    A single requests.Session is kept per process, so consecutive calls reuse the same keep-alive
+    connections to MailUp instead of paying a new TCP+TLS handshake every time.
+    The session is rebuilt after a fork: worker processes never share sockets with their parent.
+    """
+
+    def __init__(
+        self, pool_connections=10, pool_maxsize=10, pool_block=False, keep_alive=True,
+        connect_timeout=None, read_timeout=None,
+    ):
+        self.pool_connections = pool_connections
+        self.pool_maxsize = pool_maxsize
+        self.pool_block = pool_block
+        self.keep_alive = keep_alive
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+
+        self._lock = threading.Lock()
+        self._session = None
+        self._pid = None
+
+    @property
+    def session(self):
+        pid = os.getpid()
+        if self._session is None or self._pid != pid:
+            with self._lock:
+                if self._session is None or self._pid != pid:
+                    # sockets inherited from the parent process are dropped, not closed: closing them
+                    # would shut down connections the parent is still using
+                    self._session = self.build_session()
+                    self._pid = pid
+        return self._session
+
+    def build_session(self):
+        session = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=self.pool_connections,
+            pool_maxsize=self.pool_maxsize,
+            pool_block=self.pool_block,
+            max_retries=0,  # retries are handled by MailUpClient
+        )
+        session.mount('https://', adapter)
+        session.mount('http://', adapter)
+        if not self.keep_alive:
+            session.headers['Connection'] = 'close'
+        return session
+
+    def get_timeout(self, read_timeout=None):
+        """
+        Return the (connect, read) timeout tuple used by requests
+        """
+        read_timeout = read_timeout or self.read_timeout
+        return self.connect_timeout or read_timeout, read_timeout
+
+    def request(self, method, url, data=None, params=None, headers=None, cookies=None, timeout=None):
+        return self.session.request(
+            method.upper(), url, data=data, params=params, headers=headers, cookies=cookies,
+            timeout=self.get_timeout(timeout),
+        )
+
+    def close(self):
+        with self._lock:
+            if self._session is not None and self._pid == os.getpid():
+                self._session.close()
+            self._session = None
+            self._pid = None
@@ -1,34 +1,45 @@
 # coding: utf-8
 
 from mailup import exceptions
+from mailup.filters import Expression
+from mailup.filters import compile_order_by
+from mailup.filters import string_types
 from mailup.providers import MailUpComponentProvider
 
 
 # CLIENT
-def filters_to_querystring(filters):
+def filters_to_querystring(filters, order_by=None):
     """
-    Transform a dictionary in querystring: ES. "Name==John&LastName=='Doe'"
-    :param filters: dictionary
+    Transform filters in querystring: a dictionary ES. "Name==John&LastName=='Doe'", a filters.Expression
+    (or a "filterby" string) is used as it is
+    :param filters: dictionary, Expression or string
+    :param order_by: filters.Order, field name ("-" prefix for descending) or a list of them
     :return:
     """
-    filters = filters or dict()
     params = dict()
-    filters_string = ''
-    for p_name, p_value in filters.iteritems():
-        filter_string = "{p_name}=='{p_value}'&".format(
-            p_name=p_name,
-            p_value=p_value,
-        )
-        if type(p_value) == int:
-            filter_string = filter_string.replace("'", "")
-
-        filters_string = filters_string + filter_string
+    if isinstance(filters, Expression):
+        filters_string = filters.compile()
+    elif isinstance(filters, string_types):
+        filters_string = filters
+    else:
+        filters = filters or dict()
+        filters_string = ''
+        for p_name, p_value in filters.items():
+            filter_string = "{p_name}=='{p_value}'&".format(
+                p_name=p_name,
+                p_value=p_value,
+            )
+            if type(p_value) == int:
+                filter_string = filter_string.replace("'", "")
+
+            filters_string = filters_string + filter_string
+        filters_string = filters_string[:-1]
 
     if filters_string:
-        filters_string = filters_string[:-1]
-        params = {
-            "filterby": filters_string,
-        }
+        params["filterby"] = filters_string
+    order_by_string = compile_order_by(order_by)
+    if order_by_string:
+        params["orderby"] = order_by_string
     return params
 
 
@@ -44,20 +55,42 @@ def filter_dict(original_dict, pattern_dict):
     return {key: original_dict[key] for key in keys}
 
 
-def check_object_exist(obj, client):
+# NotFoundException of a component without id
+_not_found_exceptions = {
+    'list': lambda obj: exceptions.ListNotFoundException(None),
+    'group': lambda obj: exceptions.GroupNotFoundException(None),
+    'recipient': lambda obj: exceptions.RecipientNotFoundException(email=obj.data_dict.get('Email')),
+    'message': lambda obj: exceptions.MessageNotFoundException(None),
+    'tag': lambda obj: exceptions.TagNotFoundException(tag_name=obj.data_dict.get('Name')),
+}
+
+
+def check_object_exist(obj, client, trust_ids=None):
+    """
+    Raise the NotFoundException of obj if it does not exist on MailUp (or has no id).
+    If trust_ids is True (default MAILUP_TRUST_IDS) only the presence of the ids is checked, MailUp is not called
+    """
     obj_name = obj.__class__.__name__.lower()
     method_kwargs = {}
 
     if not obj_name == 'list':
         # all components except list need to have list_id in provider.get_ method
-        try:
-            method_kwargs['list_id'] = obj.data_dict['idList']
-        except KeyError:
+        method_kwargs['list_id'] = obj.data_dict.get('idList')
+        if method_kwargs['list_id'] is None:
             raise exceptions.ListNotSpecifiedException()
 
     obj_pk_name = '{}_id'.format(obj_name)
     method_kwargs[obj_pk_name] = obj.id
 
+    if obj.id is None and obj_name in _not_found_exceptions:
+        # without id the component is not on MailUp, even if ids are trusted
+        raise _not_found_exceptions[obj_name](obj)
+
+    if trust_ids is None:
+        trust_ids = client.configuration['MAILUP_TRUST_IDS']
+    if trust_ids:
+        return
+
     method_name = 'get_{}'.format(obj_name)
 
     provider = MailUpComponentProvider(client=client)
@@ -0,0 +1,109 @@
+# coding: utf-8
+"""
+AsyncMailUpClient tests, imported by test_async_clients only on python >= 3.5: python 2 can not parse them
+"""
+import asyncio
+import copy
+import os
+import shutil
+import tempfile
+import unittest
+
+from aiohttp import web
+
+from mailup import clients
+from mailup.async_clients import AsyncMailUpClient
+from mailup.limiters import RateLimiter
+from mailup.tokens import SQLiteTokenStore
+
+
+class AsyncMailUpClientTest(unittest.TestCase):
+
+    def setUp(self):
+        self.configuration = copy.deepcopy(clients._initial_client_configuration)
+        self.requests = []
+
+    def tearDown(self):
+        clients._initial_client_configuration.clear()
+        clients._initial_client_configuration.update(self.configuration)
+
+    async def start_server(self):
+        async def token(request):
+            self.requests.append(request.path)
+            return web.json_response({'access_token': 'token', 'refresh_token': 'refresh', 'expires_in': 3600})
+
+        async def lists(request):
+            self.requests.append(request.path)
+            self.assertEqual(request.headers['Authorization'], 'Bearer token')
+            return web.json_response({
+                'Items': [{'idList': 1, 'Name': 'List 1'}, {'idList': 2, 'Name': 'List 2'}],
+                'IsPaginated': True, 'PageNumber': 0, 'PageSize': 20, 'Skipped': 0, 'TotalElementsCount': 2,
+            })
+
+        app = web.Application()
+        app.router.add_post('/Authorization/OAuth/Token', token)
+        app.router.add_get('/Console/User/Lists', lists)
+        runner = web.AppRunner(app)
+        await runner.setup()
+        site = web.TCPSite(runner, '127.0.0.1', 0)
+        await site.start()
+        return runner, 'http://127.0.0.1:{}'.format(runner.addresses[0][1])
+
+    def test_read_lists(self):
+        async def run():
+            runner, base_url = await self.start_server()
+            try:
+                async with AsyncMailUpClient('id', 'secret', 'user', 'password') as client:
+                    client.token_endpoint = base_url + '/Authorization/OAuth/Token'
+                    client.console_endpoint = base_url
+                    return await client.read_lists()
+            finally:
+                await runner.cleanup()
+
+        lists = asyncio.new_event_loop().run_until_complete(run())
+        self.assertEqual([item['idList'] for item in lists['Items']], [1, 2])
+        self.assertEqual(self.requests, ['/Authorization/OAuth/Token', '/Console/User/Lists'])
+
+    def test_token_store_lock(self):
+        # two clients sharing a token store behave as two processes: a single token is requested
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        token_store_path = os.path.join(directory, 'tokens.sqlite3')
+
+        async def read_lists(base_url):
+            token_store = SQLiteTokenStore(token_store_path)
+            async with AsyncMailUpClient('id', 'secret', 'user', 'password', token_store=token_store) as client:
+                client.token_endpoint = base_url + '/Authorization/OAuth/Token'
+                client.console_endpoint = base_url
+                return await client.read_lists()
+
+        async def run():
+            runner, base_url = await self.start_server()
+            try:
+                return await asyncio.gather(read_lists(base_url), read_lists(base_url))
+            finally:
+                await runner.cleanup()
+
+        results = asyncio.new_event_loop().run_until_complete(run())
+        self.assertEqual([len(lists['Items']) for lists in results], [2, 2])
+        self.assertEqual(self.requests.count('/Authorization/OAuth/Token'), 1)
+
+    def test_shared_rate_limiter(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        rate_limiter = RateLimiter.from_configuration({'console': (100, 1)}, path=os.path.join(directory, 'rate.sqlite3'))
+        self.assertTrue(rate_limiter.is_blocking('console'))
+        self.assertFalse(rate_limiter.is_blocking('send'))
+
+        async def run():
+            runner, base_url = await self.start_server()
+            try:
+                async with AsyncMailUpClient('id', 'secret', 'user', 'password', rate_limiter=rate_limiter) as client:
+                    client.token_endpoint = base_url + '/Authorization/OAuth/Token'
+                    client.console_endpoint = base_url
+                    return await asyncio.gather(client.read_lists(), client.read_lists())
+            finally:
+                await runner.cleanup()
+
+        results = asyncio.new_event_loop().run_until_complete(run())
+        self.assertEqual([len(lists['Items']) for lists in results], [2, 2])
@@ -0,0 +1,127 @@
+# coding: utf-8
+"""
+Stub transport answering MailUpClient calls without network, shared by the client and provider tests
+"""
+import copy
+import json
+import threading
+import unittest
+
+from mailup import clients
+from mailup.clients import MailUpClient
+
+
+class StubResponse(object):
+    """
+    The part of requests.Response read by MailUpClient
+    """
+
+    def __init__(self, status_code=200, json_data=None, headers=None, reason=''):
+        self.status_code = status_code
+        self.content = b'' if json_data is None else json.dumps(json_data).encode('utf-8')
+        self.headers = headers or {}
+        self.reason = reason
+
+    @property
+    def text(self):
+        return self.content.decode('utf-8')
+
+    def json(self):
+        return json.loads(self.text)
+
+
+class StubCall(object):
+
+    def __init__(self, method, url, params, data, headers):
+        self.method = method
+        self.url = url
+        self.params = params
+        self.data = data
+        self.headers = headers
+
+    @property
+    def path(self):
+        return self.url.split('/ConsoleService.svc', 1)[-1]
+
+    def __repr__(self):
+        return '<StubCall {} {} {}>'.format(self.method, self.path, self.params)
+
+
+class StubTransport(object):
+    """
+    Transport of a MailUpClient: "handler(call)" returns a StubResponse, a json value (200 response) or None (empty
+    200 response). All calls are recorded in "calls".
+    """
+
+    def __init__(self, handler=None):
+        self.handler = handler
+        self.calls = []
+        self.closed = False
+        self._lock = threading.Lock()
+
+    def request(self, method, url, data=None, params=None, headers=None, cookies=None, timeout=None):
+        call = StubCall(method.upper(), url, dict(params or {}), data, headers)
+        with self._lock:
+            self.calls.append(call)
+        response = self.handler(call) if self.handler else None
+        if not isinstance(response, StubResponse):
+            response = StubResponse(json_data=response)
+        return response
+
+    def close(self):
+        self.closed = True
+
+    def get_calls(self, path=None):
+        """
+        Calls done on a Console path ending with "path" (all calls if None)
+        """
+        with self._lock:
+            calls = list(self.calls)
+        return [call for call in calls if path is None or call.path.endswith(path)]
+
+
+def paginated(items, params):
+    """
+    MailUp paginated response of the page of "items" requested with "params"
+    """
+    page_number = int(params.get('PageNumber', 0))
+    page_size = int(params.get('PageSize', 50))
+    return {
+        'Items': items[page_number * page_size:(page_number + 1) * page_size],
+        'IsPaginated': True,
+        'PageNumber': page_number,
+        'PageSize': page_size,
+        'Skipped': page_number * page_size,
+        'TotalElementsCount': len(items),
+    }
+
+
+class StubClientTestCase(unittest.TestCase):
+    """
+    Base of the tests using a MailUpClient with a StubTransport: the client configuration (shared by all clients)
+    is restored after each test
+    """
+
+    def setUp(self):
+        self.configuration = copy.deepcopy(clients._initial_client_configuration)
+        self.transport = StubTransport(self.respond)
+
+    def tearDown(self):
+        clients._initial_client_configuration.clear()
+        clients._initial_client_configuration.update(self.configuration)
+
+    def respond(self, call):
+        return StubResponse(404)
+
+    def get_client(self, **configuration):
+        """
+        Client with "configuration" and a valid access token: no token request is done
+        """
+        configuration.setdefault('MAILUP_CLIENT_ATTEMPT_WAIT', 0)
+        configuration.setdefault('MAILUP_RETRY_JITTER', False)
+        clients._initial_client_configuration.update(configuration)
+        client = MailUpClient('id', 'secret', 'user', 'password', transport=self.transport)
+        client.access_token = 'token'
+        client.refreshed_token = 'refresh'
+        self.addCleanup(client.close)
+        return client
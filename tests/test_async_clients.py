@@ -0,0 +1,5 @@
+# coding: utf-8
+import sys
+
+if sys.version_info >= (3, 5):
+    from async_client_cases import AsyncMailUpClientTest  # noqa: F401
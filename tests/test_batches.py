@@ -0,0 +1,99 @@
+# coding: utf-8
+import json
+import unittest
+
+from mailup import batches
+from mailup.batches import RecipientBatch
+from mailup.batches import to_import_data
+from mailup.components import Recipient
+from mailup.providers import MailUpComponentProvider
+
+from stubs import StubClientTestCase
+from stubs import paginated
+
+
+class RecipientBatchTest(unittest.TestCase):
+
+    def get_batch(self):
+        batch = RecipientBatch(list_id=1)
+        batch.append('a@b.it', 'A', recipient_id=3, status='pending', fields={1: 'Ann'})
+        batch.append('b@b.it', fields=[{'Id': 2, 'Value': 'Rome', 'Description': 'City'}])
+        batch.append('c@b.it', 'C')
+        return batch
+
+    def test_columns(self):
+        batch = self.get_batch()
+        self.assertEqual(len(batch), 3)
+        self.assertEqual(batch.emails, ['a@b.it', 'b@b.it', 'c@b.it'])
+        self.assertEqual(list(batch.ids), [3, 0, 0])
+        # recipients without a field get None in its column
+        self.assertEqual(batch.field_values, {1: ['Ann', None, None], 2: [None, 'Rome', None]})
+        self.assertEqual(batch.field_names, {2: 'City'})
+        self.assertEqual([batch.get_status(index) for index in range(3)], ['pending', None, None])
+
+    def test_data_dicts(self):
+        batch = self.get_batch()
+        self.assertEqual(batch.get_data_dict(0), {
+            'Email': 'a@b.it', 'Name': 'A', 'idRecipient': 3, 'Fields': [{'Id': 1, 'Value': 'Ann'}],
+        })
+        self.assertEqual(batch.get_data_dict(2), {'Email': 'c@b.it', 'Name': 'C', 'Fields': []})
+        self.assertEqual([len(chunk) for chunk in batch.iter_chunks(2)], [2, 1])
+        self.assertEqual(to_import_data(batch), batch.to_data_dicts())
+
+    def test_items(self):
+        batch = RecipientBatch.from_items([
+            {'Email': 'a@b.it', 'Name': 'A', 'idRecipient': 3, 'Fields': [{'Id': 1, 'Value': 'x'}]},
+        ], list_id=1, status='subscribed')
+        recipient = batch.to_recipients()[0]
+        self.assertEqual((recipient.email, recipient.id, recipient.list_id), ('a@b.it', 3, 1))
+        self.assertEqual(recipient.status, 'subscribed')
+        self.assertEqual(RecipientBatch.from_recipients([recipient]).get_data_dict(0), batch.get_data_dict(0))
+
+    def test_import_data(self):
+        recipient = Recipient({'Email': 'a@b.it', 'Name': 'A', 'idList': 1})
+        self.assertEqual(to_import_data([recipient, {'Email': 'b@b.it'}]), [recipient.data_dict, {'Email': 'b@b.it'}])
+
+    @unittest.skipIf(batches.numpy is None, 'numpy is not installed')
+    def test_ids_array(self):
+        batch = self.get_batch()
+        ids = batch.ids_array()
+        self.assertEqual(list(ids), [3, 0, 0])
+        # the array is a copy: the batch can still grow
+        batch.append('d@b.it', recipient_id=9)
+        self.assertEqual(len(ids), 3)
+        self.assertEqual(list(batch.ids_array()), [3, 0, 0, 9])
+
+    @unittest.skipIf(batches.pandas is None, 'pandas is not installed')
+    def test_dataframe(self):
+        batch = self.get_batch()
+        loaded = RecipientBatch.from_dataframe(batch.to_dataframe(), list_id=1, field_columns={1: 1, 'City': 2})
+        self.assertEqual(loaded.to_data_dicts(), batch.to_data_dicts())
+
+
+class ProviderBatchTest(StubClientTestCase):
+
+    def respond(self, call):
+        if call.path.endswith('/Subscribed'):
+            return paginated([{'idRecipient': i, 'Email': 'r{}@b.it'.format(i)} for i in range(70)], call.params)
+        if call.path.endswith('/Pending'):
+            return paginated([{'idRecipient': 100, 'Email': 'p@b.it', 'Fields': []}], call.params)
+        if call.method == 'POST':
+            return 5
+        return super(ProviderBatchTest, self).respond(call)
+
+    def test_get_recipient_batch(self):
+        provider = MailUpComponentProvider(self.get_client())
+        batch = provider.get_recipient_batch(1, statuses=('subscribed', 'pending'))
+        self.assertEqual(len(batch), 71)
+        self.assertEqual((batch.emails[70], batch.ids[70], batch.get_status(70)), ('p@b.it', 100, 'pending'))
+        self.assertEqual(batch.get_status(0), 'subscribed')
+        self.assertEqual(len(self.transport.calls), 3)
+
+    def test_import(self):
+        client = self.get_client()
+        batch = RecipientBatch(list_id=1)
+        batch.append('a@b.it', 'A', fields={1: 'x'})
+        self.assertEqual(client.subscribe_recipients_to_list(1, batch), 5)
+        self.assertEqual(json.loads(self.transport.calls[0].data), [
+            {'Email': 'a@b.it', 'Name': 'A', 'Fields': [{'Id': 1, 'Value': 'x'}]},
+        ])
@@ -0,0 +1,143 @@
+# coding: utf-8
+import os
+import shutil
+import tempfile
+import threading
+import time
+import unittest
+
+from mailup.caches import ResponseCache
+from mailup.caches import SingleFlight
+
+from stubs import StubClientTestCase
+
+
+class ResponseCacheTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, 'cache.sqlite3')
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_invalidate(self):
+        cache = ResponseCache(path=self.path)
+        cache.set('lists', 'User/List', {'Items': [1]})
+        cache.set('groups', 'List/5', {'Items': [2]})
+        cache.invalidate('User/List')
+        self.assertIsNone(cache.get('lists'))
+        self.assertEqual(cache.get('groups'), {'Items': [2]})
+
+    def test_invalidate_shared(self):
+        # two caches on the same file behave as two processes: the memory tier of the first one must not
+        # serve an entry invalidated by the second one
+        cache = ResponseCache(path=self.path)
+        other_cache = ResponseCache(path=self.path)
+        cache.set('lists', 'User/List', {'Items': [1]})
+        self.assertEqual(cache.get('lists'), {'Items': [1]})
+        self.assertEqual(other_cache.get('lists'), {'Items': [1]})
+
+        other_cache.invalidate('User/List')
+        self.assertIsNone(cache.get('lists'))
+        self.assertIsNone(other_cache.get('lists'))
+
+    def test_clear_shared(self):
+        cache = ResponseCache(path=self.path)
+        other_cache = ResponseCache(path=self.path)
+        cache.set('lists', 'User/List', {'Items': [1]})
+        other_cache.clear()
+        self.assertIsNone(cache.get('lists'))
+
+    def test_memory_only(self):
+        cache = ResponseCache()
+        cache.set('lists', 'User/List', {'Items': [1]})
+        value = cache.get('lists')
+        value['Items'].append(2)
+        self.assertEqual(cache.get('lists'), {'Items': [1]})
+        cache.invalidate('User/List')
+        self.assertIsNone(cache.get('lists'))
+
+
+class SingleFlightTest(unittest.TestCase):
+
+    def run_concurrently(self, single_flight, function, count=5):
+        results = []
+        errors = []
+
+        def call():
+            try:
+                results.append(single_flight.do('key', function))
+            except ValueError as e:
+                errors.append(e)
+
+        threads = [threading.Thread(target=call) for i in range(count)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return results, errors
+
+    def get_function(self, single_flight, followers, result=None, error=None):
+        calls = []
+
+        def function():
+            calls.append(1)
+            # the leader waits for all the other threads to join its call
+            while single_flight._calls['key'].followers < followers:
+                time.sleep(0.001)
+            if error is not None:
+                raise error
+            return result
+        return function, calls
+
+    def test_coalesce(self):
+        single_flight = SingleFlight()
+        function, calls = self.get_function(single_flight, 4, result={'Items': [1]})
+        results, errors = self.run_concurrently(single_flight, function)
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(results, [{'Items': [1]}] * 5)
+        # each caller receives its own copy
+        self.assertEqual(len(set(id(result) for result in results)), 5)
+
+    def test_error(self):
+        single_flight = SingleFlight()
+        function, calls = self.get_function(single_flight, 4, error=ValueError('failed'))
+        results, errors = self.run_concurrently(single_flight, function)
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(len(errors), 5)
+
+    def test_sequential(self):
+        single_flight = SingleFlight()
+        self.assertEqual(single_flight.do('key', lambda: 1), 1)
+        self.assertEqual(single_flight.do('key', lambda: 2), 2)
+        self.assertEqual(single_flight._calls, {})
+
+
+class ClientCoalesceTest(StubClientTestCase):
+
+    def respond(self, call):
+        time.sleep(0.2)
+        return {'ok': True}
+
+    def call_concurrently(self, function, count=5):
+        threads = [threading.Thread(target=function) for i in range(count)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+    def test_get_coalesced(self):
+        client = self.get_client()
+        self.call_concurrently(client.read_authentication_info)
+        self.assertEqual(len(self.transport.calls), 1)
+
+    def test_disabled(self):
+        client = self.get_client(MAILUP_COALESCE_REQUESTS=False)
+        self.call_concurrently(client.read_authentication_info)
+        self.assertEqual(len(self.transport.calls), 5)
+
+    def test_write_not_coalesced(self):
+        client = self.get_client()
+        self.call_concurrently(lambda: client.create_tag(1, 'tag'))
+        self.assertEqual(len(self.transport.calls), 5)
@@ -0,0 +1,246 @@
+# coding: utf-8
+import threading
+import time
+
+from mailup.components import Group
+from mailup.components import List
+
+from stubs import StubClientTestCase
+from stubs import StubResponse
+from stubs import paginated
+
+
+class PaginationTest(StubClientTestCase):
+
+    def setUp(self):
+        super(PaginationTest, self).setUp()
+        self.recipients = [{'idRecipient': i, 'Email': 'r{}@b.it'.format(i)} for i in range(120)]
+        self.total_count = True
+
+    def respond(self, call):
+        r_json = paginated(self.recipients, call.params)
+        if not self.total_count:
+            del r_json['TotalElementsCount']
+        return r_json
+
+    def get_page_numbers(self):
+        return [call.params['PageNumber'] for call in self.transport.calls]
+
+    def test_pages_merged(self):
+        client = self.get_client()
+        r_json = client.get_recipients(1, 'subscribed', page_size=50)
+        self.assertEqual([item['idRecipient'] for item in r_json['Items']], list(range(120)))
+        # TotalElementsCount tells that page 2 is the last one
+        self.assertEqual(self.get_page_numbers(), [0, 1, 2])
+
+    def test_pages_without_total_count(self):
+        self.total_count = False
+        client = self.get_client()
+        r_json = client.get_recipients(1, 'subscribed', page_size=50)
+        self.assertEqual(len(r_json['Items']), 120)
+        # the empty page 3 ends the pagination
+        self.assertEqual(self.get_page_numbers(), [0, 1, 2, 3])
+
+    def test_stream(self):
+        client = self.get_client()
+        items = client.get_recipients(1, 'subscribed', page_size=50, stream=True)
+        self.assertEqual(self.transport.calls, [])
+
+        self.assertEqual(next(items)['idRecipient'], 0)
+        self.assertEqual(self.get_page_numbers(), [0])
+        for i in range(50):
+            next(items)
+        # page 1 is requested only once page 0 has been consumed
+        self.assertEqual(self.get_page_numbers(), [0, 1])
+        self.assertEqual(len(list(items)), 69)
+        self.assertEqual(self.get_page_numbers(), [0, 1, 2])
+
+    def test_iter_pages_first_page(self):
+        self.recipients = []
+        client = self.get_client()
+        pages = list(client.iter_pages('GET', client.console_endpoint + '/Console/User/Lists'))
+        # the first page is returned even if empty
+        self.assertEqual(len(pages), 1)
+        self.assertEqual(pages[0]['Items'], [])
+
+    def test_last_page_number(self):
+        client = self.get_client()
+        self.assertEqual(client.get_last_page_number({'TotalElementsCount': 100, 'PageSize': 50}), 1)
+        self.assertEqual(client.get_last_page_number({'TotalElementsCount': 101, 'PageSize': 50}), 2)
+        self.assertEqual(client.get_last_page_number({'TotalElementsCount': 0, 'PageSize': 50}), 0)
+        self.assertIsNone(client.get_last_page_number({'PageSize': 50}))
+
+
+class PrefetchTest(StubClientTestCase):
+
+    def setUp(self):
+        super(PrefetchTest, self).setUp()
+        self.recipients = [{'idRecipient': i} for i in range(230)]
+
+    def respond(self, call):
+        if call.params['PageNumber'] == 1:
+            # page 1 arrives after the next ones: pages are returned in order anyway
+            time.sleep(0.05)
+        return paginated(self.recipients, call.params)
+
+    def test_parallel(self):
+        client = self.get_client()
+        r_json = client.get_recipients(1, 'subscribed', page_size=50, parallel=True)
+        self.assertEqual([item['idRecipient'] for item in r_json['Items']], list(range(230)))
+        self.assertEqual(sorted(call.params['PageNumber'] for call in self.transport.calls), [0, 1, 2, 3, 4])
+
+    def test_parallel_configuration(self):
+        client = self.get_client(MAILUP_PARALLEL_PAGINATION=True)
+        items = list(client.get_recipients(1, 'subscribed', page_size=50, stream=True))
+        self.assertEqual([item['idRecipient'] for item in items], list(range(230)))
+
+    def test_prefetch_window(self):
+        client = self.get_client(MAILUP_MAX_WORKERS=1)
+        pages = client.prefetch_pages(
+            'GET', client.console_endpoint + '/Console/User/Lists', range(1, 5), params={'PageSize': 50},
+        )
+        self.assertEqual(next(pages)['PageNumber'], 1)
+        pages.close()
+        # at most 2 * MAILUP_MAX_WORKERS pages are requested before they are consumed
+        self.assertLessEqual(len(self.transport.calls), 3)
+
+
+class TokenRefreshTest(StubClientTestCase):
+
+    def setUp(self):
+        super(TokenRefreshTest, self).setUp()
+        self.token_count = 0
+        self.lock = threading.Lock()
+
+    def respond(self, call):
+        if call.url.endswith('/Token'):
+            time.sleep(0.02)
+            with self.lock:
+                self.token_count += 1
+                return {'access_token': 'token{}'.format(self.token_count), 'refresh_token': 'refresh', 'expires_in': 3600}
+        if call.headers['Authorization'] == 'Bearer expired':
+            return StubResponse(401)
+        return {'ok': True}
+
+    def get_client(self, **configuration):
+        # concurrent calls are not coalesced: each one checks the token
+        client = super(TokenRefreshTest, self).get_client(
+            MAILUP_TOKEN_BACKGROUND_REFRESH=False, MAILUP_COALESCE_REQUESTS=False, **configuration
+        )
+        client.access_token = 'expired'
+        return client
+
+    def call_concurrently(self, client, count=8):
+        threads = [threading.Thread(target=client.read_authentication_info) for i in range(count)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+    def get_authorizations(self):
+        return [call.headers['Authorization'] for call in self.transport.calls if not call.url.endswith('/Token')]
+
+    def test_expiring_token(self):
+        client = self.get_client()
+        client.access_token = 'token'
+        client.token_expires_at = time.time() + 10
+        self.call_concurrently(client)
+        # threads waiting for the refresh do not refresh the token again
+        self.assertEqual(self.token_count, 1)
+        self.assertEqual(self.get_authorizations(), ['Bearer token1'] * 8)
+        self.assertFalse(client.is_token_expiring())
+
+    def test_refused_token(self):
+        client = self.get_client()
+        self.call_concurrently(client)
+        self.assertEqual(self.token_count, 1)
+        self.assertEqual(self.get_authorizations().count('Bearer token1'), 8)
+
+    def test_refresh_if_expiring(self):
+        client = self.get_client()
+        client.token_expires_at = time.time() + 3600
+        client.refresh_token(if_expiring=True)
+        self.assertEqual(self.token_count, 0)
+        client.refresh_token()
+        self.assertEqual(self.token_count, 1)
+        self.assertEqual(client.access_token, 'token1')
+
+    def test_used_token(self):
+        client = self.get_client()
+        client.access_token = 'token0'
+        # a call refused with an old token does not refresh the current one
+        client.refresh_token(used_token='expired')
+        self.assertEqual(self.token_count, 0)
+
+
+class LimitTest(StubClientTestCase):
+
+    def setUp(self):
+        super(LimitTest, self).setUp()
+        self.recipients = [{'idRecipient': i} for i in range(500)]
+
+    def respond(self, call):
+        return paginated(self.recipients, call.params)
+
+    def get_pages(self):
+        return [(call.params['PageNumber'], call.params['PageSize']) for call in self.transport.calls]
+
+    def test_limit(self):
+        client = self.get_client()
+        r_json = client.get_recipients(1, 'subscribed', limit=70, page_size=50)
+        self.assertEqual([item['idRecipient'] for item in r_json['Items']], list(range(70)))
+        self.assertEqual(self.get_pages(), [(0, 50), (1, 50)])
+
+    def test_limit_page_size(self):
+        client = self.get_client()
+        r_json = client.get_recipients(1, 'subscribed', limit=10)
+        self.assertEqual(len(r_json['Items']), 10)
+        # a single page of "limit" items is requested
+        self.assertEqual(self.get_pages(), [(0, 10)])
+
+    def test_limit_parallel(self):
+        client = self.get_client()
+        r_json = client.get_recipients(1, 'subscribed', limit=120, page_size=50, parallel=True)
+        self.assertEqual([item['idRecipient'] for item in r_json['Items']], list(range(120)))
+
+    def test_limit_stream(self):
+        client = self.get_client()
+        items = list(client.get_recipients(1, 'subscribed', limit=60, page_size=50, stream=True))
+        self.assertEqual(len(items), 60)
+        self.assertEqual(self.get_pages(), [(0, 50), (1, 50)])
+
+    def test_paginate(self):
+        client = self.get_client()
+        r_json = client.get_recipients(1, 'subscribed', page_size=50, page_number=3, paginate=False)
+        self.assertEqual([item['idRecipient'] for item in r_json['Items']], list(range(150, 200)))
+        self.assertEqual(r_json['TotalElementsCount'], 500)
+        self.assertEqual(self.get_pages(), [(3, 50)])
+
+
+class CountTest(StubClientTestCase):
+
+    def respond(self, call):
+        if call.path.endswith('/Recipients/Pending'):
+            return StubResponse(500, {'error': 'x'})
+        items = [{'idRecipient': i} for i in range(42 if call.path.endswith('/Subscribed') else 8)]
+        return paginated(items, call.params)
+
+    def test_count(self):
+        client = self.get_client()
+        self.assertEqual(client.count_recipients(1, 'subscribed'), 42)
+        self.assertEqual(client.count_lists(), 8)
+        self.assertEqual(client.count_group_members(3), 8)
+        # a single item is read to get TotalElementsCount
+        self.assertEqual([call.params['PageSize'] for call in self.transport.calls], [1, 1, 1])
+
+    def test_count_error(self):
+        client = self.get_client()
+        self.assertIsNone(client.count_recipients(1, 'pending'))
+
+    def test_components(self):
+        client = self.get_client()
+        mailup_list = List.from_mailup({'idList': 1, 'Name': 'List'}, client=client)
+        self.assertEqual(mailup_list.count_recipients(), 50)
+        self.assertEqual(mailup_list.count_subscribers(), 42)
+        group = Group.from_mailup({'idGroup': 3, 'idList': 1, 'Name': 'Group'}, client=client)
+        self.assertEqual(group.count_subscribers(), 8)
@@ -0,0 +1,151 @@
+# coding: utf-8
+import json
+import pickle
+import unittest
+
+from mailup.components import Message
+from mailup.components import Recipient
+
+from stubs import StubClientTestCase
+
+
+class ComponentPickleTest(unittest.TestCase):
+
+    def test_recipient(self):
+        recipient = Recipient.from_mailup({'Email': 'a@b.it', 'Name': 'A', 'idRecipient': 3}, status='subscribed')
+        recipient.name = 'B'
+        for protocol in range(pickle.HIGHEST_PROTOCOL + 1):
+            loaded = pickle.loads(pickle.dumps(recipient, protocol))
+            self.assertEqual(loaded.data_dict, recipient.data_dict)
+            self.assertEqual(loaded.status, 'subscribed')
+            self.assertEqual(loaded.get_changes(), set(['Name']))
+            self.assertIs(loaded.logger, recipient.logger)
+
+    def test_pattern_fields(self):
+        recipient = Recipient(
+            {'Email': 'a@b.it', 'Name': 'A'},
+            mailup_pattern_fields={'Email': 'email', 'Name': 'name'},
+            required_fields=['Email'],
+        )
+        for protocol in range(pickle.HIGHEST_PROTOCOL + 1):
+            loaded = pickle.loads(pickle.dumps(recipient, protocol))
+            self.assertIs(type(loaded), type(recipient))
+            self.assertEqual(loaded.email, 'a@b.it')
+
+    def test_message_detail(self):
+        message = Message.from_mailup({'Subject': 'S', 'idList': 1, 'idMessage': 3, 'Fields': []}, detail=True)
+        loaded = pickle.loads(pickle.dumps(message, 0))
+        self.assertEqual(loaded.subject, 'S')
+        self.assertEqual(loaded._detail, message._detail)
+
+
+class FieldsTest(unittest.TestCase):
+
+    def get_recipient(self):
+        return Recipient.from_mailup({
+            'Email': 'a@b.it', 'Name': 'A', 'idRecipient': 3, 'idList': 1,
+            'Fields': [
+                {'Id': 1, 'Description': 'FirstName', 'Value': 'Ann'},
+                {'Id': 2, 'Description': 'City', 'Value': 'Rome'},
+                {'Id': 3, 'Description': 'City', 'Value': 'Milan'},
+            ],
+        })
+
+    def test_get_field(self):
+        recipient = self.get_recipient()
+        self.assertEqual(recipient.get_field('FirstName'), 'Ann')
+        self.assertEqual(recipient.get_field(2), 'Rome')
+        # the first field with a Description wins, as in a linear search
+        self.assertEqual(recipient.get_field('City'), 'Rome')
+        self.assertIsNone(recipient.get_field('Missing'))
+        self.assertEqual(recipient.get_fields(['FirstName', 3, 'Missing']), {'FirstName': 'Ann', 3: 'Milan'})
+        self.assertEqual(recipient.get_fields(), {'FirstName': 'Ann', 'City': 'Rome'})
+
+    def test_set_field(self):
+        recipient = self.get_recipient()
+        recipient.set_field('FirstName', 'Bob')
+        recipient.set_fields({3: 'Turin', 'Missing': 'x'})
+        self.assertEqual(recipient.data_dict['Fields'][0]['Value'], 'Bob')
+        self.assertEqual(recipient.get_field(3), 'Turin')
+        self.assertEqual(recipient.get_changes(), set([('Fields', 1), ('Fields', 3)]))
+        self.assertEqual(sorted(field['Id'] for field in recipient.get_changed_fields()), [1, 3])
+        self.assertEqual(recipient.get_changed_keys(), set(['Fields']))
+
+    def test_index_rebuilt(self):
+        recipient = self.get_recipient()
+        self.assertEqual(recipient.get_field('FirstName'), 'Ann')
+        recipient.data_dict['Fields'].append({'Id': 4, 'Description': 'Zip', 'Value': '00100'})
+        self.assertEqual(recipient.get_field('Zip'), '00100')
+        recipient.fields = [{'Id': 5, 'Description': 'FirstName', 'Value': 'Carl'}]
+        self.assertEqual(recipient.get_field('FirstName'), 'Carl')
+        self.assertIsNone(recipient.get_field(1))
+
+    def test_message(self):
+        message = Message.from_mailup({
+            'Subject': 'S', 'idList': 1, 'idMessage': 3, 'Fields': [{'Id': 1, 'Description': 'Code', 'Value': 'x'}],
+        })
+        message.set_field('Code', 'y')
+        self.assertEqual(message.get_field(1), 'y')
+        self.assertEqual(message.get_changed_fields(), [{'Id': 1, 'Description': 'Code', 'Value': 'y'}])
+
+
+class ChangesTest(StubClientTestCase):
+
+    def respond(self, call):
+        if call.path == '/Console/Recipient/Detail':
+            return json.loads(call.data)
+        return super(ChangesTest, self).respond(call)
+
+    def get_recipient(self, client=None):
+        return Recipient.from_mailup({
+            'Email': 'a@b.it', 'Name': 'A', 'idRecipient': 3, 'idList': 1,
+            'Fields': [{'Id': 1, 'Description': 'City', 'Value': 'Rome'}],
+        }, client=client)
+
+    def get_payloads(self):
+        return [json.loads(call.data) for call in self.transport.calls]
+
+    def test_read_is_not_a_change(self):
+        recipient = self.get_recipient()
+        self.assertEqual(recipient.fields[0]['Value'], 'Rome')
+        self.assertFalse(recipient.is_changed())
+
+    def test_change_in_place(self):
+        recipient = self.get_recipient()
+        recipient.fields[0]['Value'] = 'Milan'
+        self.assertEqual(recipient.get_changes(), set(['Fields']))
+        loaded = pickle.loads(pickle.dumps(recipient))
+        self.assertEqual(loaded.get_changes(), set(['Fields']))
+        recipient.mark_saved()
+        self.assertFalse(recipient.is_changed())
+
+    def test_new_key(self):
+        recipient = Recipient.from_mailup({'Email': 'a@b.it', 'idRecipient': 3, 'idList': 1})
+        # a key missing from data_dict is added, so it is saved
+        recipient.name = 'A'
+        self.assertEqual(recipient.data_dict['Name'], 'A')
+        self.assertEqual(recipient.get_changes(), set(['Name']))
+
+    def test_save_without_changes(self):
+        recipient = self.get_recipient(self.get_client())
+        recipient.fields
+        recipient.save()
+        self.assertEqual(self.transport.calls, [])
+
+    def test_partial_update(self):
+        recipient = self.get_recipient(self.get_client(MAILUP_PARTIAL_RECIPIENT_UPDATE=True))
+        recipient.fields
+        recipient.name = 'B'
+        recipient.save()
+        recipient.fields[0]['Value'] = 'Milan'
+        recipient.save()
+        self.assertEqual(self.get_payloads(), [
+            {'idRecipient': 3, 'Email': 'a@b.it', 'Name': 'B'},
+            {'idRecipient': 3, 'Email': 'a@b.it', 'Fields': [{'Id': 1, 'Description': 'City', 'Value': 'Milan'}]},
+        ])
+
+    def test_full_update(self):
+        recipient = self.get_recipient(self.get_client())
+        recipient.name = 'B'
+        recipient.save()
+        self.assertEqual(sorted(self.get_payloads()[0]), ['Email', 'Fields', 'Name', 'idList', 'idRecipient'])
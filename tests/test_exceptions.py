@@ -0,0 +1,43 @@
+# coding: utf-8
+import json
+import unittest
+
+from mailup.exceptions import MailUpCallError
+
+
+def mailup_error(status_code, error_code, description):
+    # body of a MailUp REST error response
+    response_text = json.dumps({
+        'ErrorCode': error_code,
+        'ErrorDescription': description,
+        'ErrorName': 'Conflict' if error_code == '409' else 'BadRequest',
+        'ErrorStack': None,
+    })
+    return MailUpCallError('MailUp error', write_log=False, status_code=status_code, response_text=response_text)
+
+
+class MailUpCallErrorTest(unittest.TestCase):
+
+    def test_conflict_status(self):
+        self.assertTrue(mailup_error(409, '409', 'Tag already exists').is_conflict())
+
+    def test_conflict_error_code(self):
+        error = mailup_error(400, '409', 'Recipient already exists')
+        self.assertEqual(error.get_error_code(), '409')
+        self.assertTrue(error.is_conflict())
+
+    def test_bad_request_is_not_conflict(self):
+        # the text is not trusted: a 400 is a conflict only with a conflict ErrorCode
+        error = mailup_error(400, '400', 'Invalid email: a duplicate "@" already exists in the address')
+        self.assertEqual(error.get_error_code(), '400')
+        self.assertFalse(error.is_conflict())
+
+    def test_no_response(self):
+        error = MailUpCallError('Max attempts exceeded', write_log=False)
+        self.assertIsNone(error.get_error_code())
+        self.assertFalse(error.is_conflict())
+
+    def test_not_json_response(self):
+        error = MailUpCallError('MailUp error', write_log=False, status_code=500, response_text='<html></html>')
+        self.assertIsNone(error.get_error_code())
+        self.assertFalse(error.is_conflict())
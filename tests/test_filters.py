@@ -0,0 +1,95 @@
+# coding: utf-8
+import datetime
+import unittest
+
+from mailup.filters import F
+from mailup.filters import Order
+from mailup.filters import compile_order_by
+from mailup.filters import format_value
+from mailup.utils import filters_to_querystring
+
+from stubs import StubClientTestCase
+from stubs import paginated
+
+
+class FormatValueTest(unittest.TestCase):
+
+    def test_strings(self):
+        self.assertEqual(format_value('a@b.it'), "'a@b.it'")
+        self.assertEqual(format_value("O'Brien"), "'O''Brien'")
+        self.assertEqual(format_value(u'caf\xe8'), u"'caf\xe8'")
+        self.assertEqual((F('Name') == u"caf\xe8'").compile(), u"Name=='caf\xe8'''")
+
+    def test_numbers(self):
+        self.assertEqual(format_value(5), '5')
+        self.assertEqual(format_value(2 ** 70), str(2 ** 70))
+        self.assertEqual(format_value(1.5), '1.5')
+        self.assertEqual(format_value(True), 'true')
+        self.assertEqual(format_value(None), 'null')
+
+    def test_dates(self):
+        self.assertEqual(format_value(datetime.date(2016, 4, 12)), 'DateTime(2016,4,12)')
+        self.assertEqual(format_value(datetime.datetime(2016, 4, 12, 9, 5, 0)), 'DateTime(2016,4,12,9,5,0)')
+
+
+class ExpressionTest(unittest.TestCase):
+
+    def test_compare(self):
+        self.assertEqual(str(F('Email') == "a'b@c.it"), "Email=='a''b@c.it'")
+        self.assertEqual(str(F('idRecipient') > 100), 'idRecipient>100')
+        self.assertEqual(str(F('Name') != None), 'Name!=null')  # noqa: E711
+
+    def test_methods(self):
+        self.assertEqual(str(F('Email').endswith('@b.it')), "Email.EndsWith('@b.it')")
+        self.assertEqual(str(F('Name').contains("d'a")), "Name.Contains('d''a')")
+
+    def test_isin(self):
+        self.assertEqual(str(F('Email').isin(['a@b.it'])), "Email=='a@b.it'")
+        self.assertEqual(
+            str(F('idRecipient').isin(iter([1, 2, 3]))), 'idRecipient==1||idRecipient==2||idRecipient==3',
+        )
+        with self.assertRaises(ValueError):
+            F('Email').isin([])
+
+    def test_precedence(self):
+        expression = (F('Email').isin(['a@b.it', 'c@d.it'])) & (F('idRecipient') > 100)
+        self.assertEqual(str(expression), "(Email=='a@b.it'||Email=='c@d.it')&&idRecipient>100")
+        expression = (F('a') == 1) & (F('b') == 2) | (F('c') == 3)
+        self.assertEqual(str(expression), 'a==1&&b==2||c==3')
+        self.assertEqual(str(~(F('a') == 1)), '!(a==1)')
+
+
+class OrderTest(unittest.TestCase):
+
+    def test_order(self):
+        self.assertEqual(F('Email').desc().compile(), 'Email desc')
+        self.assertEqual(str(Order('Email')), 'Email asc')
+
+    def test_compile_order_by(self):
+        self.assertIsNone(compile_order_by(None))
+        self.assertEqual(compile_order_by('-idRecipient'), 'idRecipient desc')
+        self.assertEqual(compile_order_by(F('Name')), 'Name asc')
+        self.assertEqual(compile_order_by(['Name', F('Email').desc()]), 'Name asc;Email desc')
+        self.assertIsNone(compile_order_by([]))
+
+    def test_querystring(self):
+        self.assertEqual(filters_to_querystring(F('idList') == 3, order_by='-Name'), {
+            'filterby': 'idList==3', 'orderby': 'Name desc',
+        })
+        self.assertEqual(filters_to_querystring({'idList': 3}), {'filterby': 'idList==3'})
+        self.assertEqual(filters_to_querystring(None), {})
+
+
+class ClientFiltersTest(StubClientTestCase):
+
+    def respond(self, call):
+        return paginated([], call.params)
+
+    def test_params(self):
+        client = self.get_client()
+        client.get_recipients(
+            1, 'subscribed', filters=F('Email').endswith('@b.it') & (F('idRecipient') > 2), order_by=F('Email').desc(),
+        )
+        params = self.transport.calls[0].params
+        self.assertEqual(params['filterby'], "Email.EndsWith('@b.it')&&idRecipient>2")
+        self.assertEqual(params['orderby'], 'Email desc')
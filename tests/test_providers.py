@@ -0,0 +1,362 @@
+# coding: utf-8
+import json
+import re
+import time
+
+from mailup import exceptions
+from mailup.providers import MailUpComponentProvider
+from mailup.providers import Page
+
+from stubs import StubClientTestCase
+from stubs import StubResponse
+from stubs import paginated
+
+
+class ProviderTestCase(StubClientTestCase):
+    """
+    Provider on a stub list 1: "recipients" are the recipients of each status, None if reading them fails
+    """
+
+    def setUp(self):
+        super(ProviderTestCase, self).setUp()
+        self.recipients = {'subscribed': [], 'unsubscribed': [], 'pending': []}
+
+    def respond(self, call):
+        for status in self.recipients:
+            if call.path == '/Console/List/1/Recipients/{}'.format(status.capitalize()):
+                if self.recipients[status] is None:
+                    return StubResponse(500, {'error': 'x'})
+                return paginated(self.recipients[status], call.params)
+        return super(ProviderTestCase, self).respond(call)
+
+    def get_provider(self, **configuration):
+        return MailUpComponentProvider(self.get_client(**configuration))
+
+    def get_statuses(self):
+        return [call.path.rsplit('/', 1)[-1].lower() for call in self.transport.get_calls() if '/Recipients/' in call.path]
+
+
+class GetRecipientTest(ProviderTestCase):
+
+    def respond(self, call):
+        if call.path.endswith('/Unsubscribed'):
+            time.sleep(0.1)
+        return super(GetRecipientTest, self).respond(call)
+
+    def test_sequential(self):
+        self.recipients['unsubscribed'] = [{'idRecipient': 1, 'Email': 'a@b.it'}]
+        recipient = self.get_provider().get_recipient(1, email='a@b.it')
+        self.assertEqual(recipient.status, 'unsubscribed')
+        self.assertEqual(self.get_statuses(), ['subscribed', 'unsubscribed'])
+
+    def test_parallel_status_priority(self):
+        # found in two statuses: the first one in statuses order wins, as in the sequential lookup
+        self.recipients['unsubscribed'] = [{'idRecipient': 1, 'Email': 'a@b.it'}]
+        self.recipients['pending'] = [{'idRecipient': 1, 'Email': 'a@b.it'}]
+        recipient = self.get_provider().get_recipient(1, email='a@b.it', parallel=True)
+        self.assertEqual(recipient.status, 'unsubscribed')
+        self.assertEqual(recipient.list_id, 1)
+        self.assertEqual(sorted(self.get_statuses()), ['pending', 'subscribed', 'unsubscribed'])
+
+    def test_parallel_configuration(self):
+        self.recipients['pending'] = [{'idRecipient': 1, 'Email': 'a@b.it'}]
+        recipient = self.get_provider(MAILUP_PARALLEL_LOOKUP=True).get_recipient(1, recipient_id=1)
+        self.assertEqual(recipient.status, 'pending')
+
+    def test_parallel_cancel(self):
+        self.recipients['subscribed'] = [{'idRecipient': 1, 'Email': 'a@b.it'}]
+        provider = self.get_provider(MAILUP_MAX_WORKERS=1)
+        self.assertEqual(provider.get_recipient(1, email='a@b.it', parallel=True).status, 'subscribed')
+        time.sleep(0.2)
+        # the pending lookup was still waiting for a worker when the recipient has been found
+        self.assertNotIn('pending', self.get_statuses())
+
+    def test_parallel_not_found(self):
+        with self.assertRaises(exceptions.RecipientNotFoundException):
+            self.get_provider().get_recipient(1, email='a@b.it', parallel=True, write_log=False)
+        self.assertEqual(len(self.get_statuses()), 3)
+
+    def test_parallel_call_error(self):
+        self.recipients['pending'] = [{'idRecipient': 1, 'Email': 'a@b.it'}]
+        self.recipients['subscribed'] = None
+        with self.assertRaises(exceptions.MailUpCallError):
+            self.get_provider().get_recipient(1, email='a@b.it', parallel=True)
+
+
+class IterAllRecipientsTest(ProviderTestCase):
+
+    def setUp(self):
+        super(IterAllRecipientsTest, self).setUp()
+        for status, count in (('subscribed', 120), ('unsubscribed', 30), ('pending', 7)):
+            self.recipients[status] = [
+                {'idRecipient': i, 'Email': '{}{}@b.it'.format(status, i)} for i in range(count)
+            ]
+
+    def test_all_statuses(self):
+        provider = self.get_provider(MAILUP_DEFAULT_PAGE_SIZE=20)
+        recipients = list(provider.iter_all_recipients(1))
+        self.assertEqual(len(recipients), 157)
+        for recipient in recipients:
+            self.assertTrue(recipient.email.startswith(recipient.status))
+            self.assertEqual(recipient.list_id, 1)
+
+    def test_with_status(self):
+        provider = self.get_provider()
+        items = list(provider.iter_all_recipients(1, statuses=('unsubscribed', 'pending'), raw=True, with_status=True))
+        self.assertEqual(sorted(status for status, data_dict in items), ['pending'] * 7 + ['unsubscribed'] * 30)
+        self.assertTrue(all(isinstance(data_dict, dict) for status, data_dict in items))
+
+    def test_all_recipients_parallel(self):
+        provider = self.get_provider(MAILUP_DEFAULT_PAGE_SIZE=20)
+        recipients = provider.all_recipients(1, parallel=True)
+        # grouped by status as the sequential read
+        self.assertEqual([recipient.email for recipient in recipients], [
+            recipient.email for recipient in provider.all_recipients(1)
+        ])
+
+    def test_close(self):
+        provider = self.get_provider(MAILUP_DEFAULT_PAGE_SIZE=5)
+        recipients = provider.iter_all_recipients(1, statuses=('subscribed',))
+        next(recipients)
+        recipients.close()
+        time.sleep(0.3)
+        # reading stops when the generator is closed: 24 pages are not requested
+        self.assertLess(len(self.transport.calls), 10)
+
+    def test_error(self):
+        provider = self.get_provider()
+        with self.assertRaises(exceptions.InvalidRecipientStatusException):
+            list(provider.iter_all_recipients(1, statuses=('subscribed', 'deleted')))
+
+
+class FilterRecipientsTest(ProviderTestCase):
+
+    def setUp(self):
+        super(FilterRecipientsTest, self).setUp()
+        for status in self.recipients:
+            self.recipients[status] = [{'idRecipient': i, 'Email': '{}{}@b.it'.format(status, i)} for i in range(80)]
+
+    def test_limit(self):
+        recipients = self.get_provider().filter_recipients(1, {'Name': 'A'}, status='pending', limit=5)
+        self.assertEqual([recipient.email for recipient in recipients], ['pending{}@b.it'.format(i) for i in range(5)])
+        self.assertEqual(len(self.transport.calls), 1)
+
+    def test_limit_each_status(self):
+        recipients = self.get_provider().filter_recipients(1, {'Name': 'A'}, limit=3)
+        self.assertEqual([recipient.status for recipient in recipients], (
+            ['subscribed'] * 3 + ['unsubscribed'] * 3 + ['pending'] * 3
+        ))
+        self.assertEqual(len(self.transport.calls), 3)
+
+
+class PageTest(ProviderTestCase):
+
+    def setUp(self):
+        super(PageTest, self).setUp()
+        self.recipients['subscribed'] = [{'idRecipient': i, 'Email': 'r{}@b.it'.format(i)} for i in range(45)]
+        self.recipients['pending'] = None
+
+    def test_page(self):
+        page = Page(items=[1, 2], total_count=45, page_number=0, page_size=20)
+        self.assertEqual(page.page_count, 3)
+        self.assertTrue(page.has_next)
+        self.assertFalse(page.has_previous)
+        self.assertEqual(list(page), [1, 2])
+        self.assertEqual(len(page), 2)
+        self.assertEqual(repr(page), '<Page 0/3: 2 items>')
+        self.assertEqual(Page(items=[], total_count=None, page_number=0, page_size=20).page_count, 0)
+
+    def test_page_recipients(self):
+        page = self.get_provider().page_recipients(1, 'subscribed', page_number=2, page_size=20)
+        self.assertEqual([recipient.id for recipient in page], list(range(40, 45)))
+        self.assertEqual(page.items[0].status, 'subscribed')
+        self.assertEqual(page.items[0].list_id, 1)
+        self.assertEqual((page.total_count, page.page_count), (45, 3))
+        self.assertFalse(page.has_next)
+        self.assertTrue(page.has_previous)
+        # a single page is requested
+        self.assertEqual(len(self.transport.calls), 1)
+        self.assertEqual(self.transport.calls[0].params['PageNumber'], 2)
+
+    def test_default_page_size(self):
+        page = self.get_provider(MAILUP_DEFAULT_PAGE_SIZE=10).page_recipients(1, 'subscribed')
+        self.assertEqual((len(page), page.page_size, page.page_count), (10, 10, 5))
+
+    def test_page_error(self):
+        page = self.get_provider().page_recipients(1, 'pending')
+        self.assertEqual(len(page), 0)
+        self.assertIsNone(page.total_count)
+        self.assertFalse(page.has_next)
+
+
+class LookupTestCase(ProviderTestCase):
+    """
+    Provider with recipients read by filterby on their Email or idRecipient
+    """
+
+    def setUp(self):
+        super(LookupTestCase, self).setUp()
+        self.recipients['subscribed'] = [{'idRecipient': i, 'Email': 'r{}@b.it'.format(i)} for i in range(100)]
+        self.recipients['unsubscribed'] = [{'idRecipient': 200, 'Email': 'U@b.it'}]
+        self.recipients['pending'] = [{'idRecipient': 200, 'Email': 'U@b.it'}, {'idRecipient': 300, 'Email': 'p@b.it'}]
+
+    def respond(self, call):
+        # filterby "Field==value||Field==value...": MailUp emails are case insensitive
+        terms = set(value.strip("'").lower() for field, value in re.findall(r"(\w+)==('[^']*'|\d+)", call.params['filterby']))
+        for status, recipients in self.recipients.items():
+            if call.path.endswith('/' + status.capitalize()):
+                if recipients is None:
+                    return StubResponse(500, {'error': 'x'})
+                items = [item for item in recipients if str(item['Email']).lower() in terms or str(item['idRecipient']) in terms]
+                return paginated(items, call.params)
+
+
+class LookupTest(LookupTestCase):
+
+    def test_chunks(self):
+        emails = ['r{}@b.it'.format(i) for i in range(120)]
+        recipients = self.get_provider().get_recipients_by_emails(1, emails, chunk_size=50, write_log=False)
+        self.assertEqual(len(self.transport.calls), 9)
+        for call in self.transport.calls:
+            self.assertLessEqual(call.params['filterby'].count('||'), 49)
+        self.assertEqual([recipients['r{}@b.it'.format(i)].id for i in range(100)], list(range(100)))
+        self.assertEqual(recipients['r100@b.it'], None)
+        self.assertEqual(recipients['r5@b.it'].status, 'subscribed')
+        self.assertEqual(recipients['r5@b.it'].list_id, 1)
+
+    def test_chunk_size_configuration(self):
+        emails = ['r{}@b.it'.format(i) for i in range(30)]
+        self.get_provider(MAILUP_LOOKUP_CHUNK_SIZE=10).get_recipients_by_emails(1, emails, status='subscribed')
+        self.assertEqual(len(self.transport.calls), 3)
+        self.assertTrue(all(call.path.endswith('/Subscribed') for call in self.transport.calls))
+
+    def test_status_priority(self):
+        recipients = self.get_provider().get_recipients_by_emails(1, ['u@b.it', 'p@b.it'])
+        # found in two statuses: the first one in statuses order wins
+        self.assertEqual(recipients['u@b.it'].status, 'unsubscribed')
+        self.assertEqual(recipients['p@b.it'].status, 'pending')
+
+    def test_case_insensitive(self):
+        recipients = self.get_provider().get_recipients_by_emails(1, ['R1@B.it', 'r1@b.it', 'u@b.it'])
+        self.assertEqual(recipients['R1@B.it'].id, 1)
+        self.assertEqual(recipients['r1@b.it'].id, 1)
+        # emails repeated with another case are looked up once
+        self.assertEqual(self.transport.calls[0].params['filterby'], "Email=='R1@B.it'||Email=='u@b.it'")
+
+    def test_ids(self):
+        recipients = self.get_provider().get_recipients_by_ids(1, [3, 300, 999], write_log=False)
+        self.assertEqual(recipients[3].email, 'r3@b.it')
+        self.assertEqual(recipients[300].status, 'pending')
+        self.assertIsNone(recipients[999])
+
+    def test_call_error(self):
+        self.recipients['unsubscribed'] = None
+        with self.assertRaises(exceptions.MailUpCallError):
+            self.get_provider().get_recipients_by_emails(1, ['r1@b.it'])
+
+    def test_get_lookups(self):
+        lookups = MailUpComponentProvider.get_lookups('Email', ['a@b.it', 'A@B.IT', 'c@d.it'], 'pending', 1)
+        self.assertEqual([(status, str(filters)) for status, filters in lookups], [
+            ('pending', "Email=='a@b.it'"), ('pending', "Email=='c@d.it'"),
+        ])
+
+
+class CreateRecipientsTest(LookupTestCase):
+
+    def setUp(self):
+        super(CreateRecipientsTest, self).setUp()
+        self.imports = []
+        self.import_id = 10
+
+    def respond(self, call):
+        if call.method == 'POST' and '/Console/List/1/Recipients?' in call.path:
+            data_dicts = json.loads(call.data)
+            status = 'pending' if call.path.endswith('ConfirmEmail=True') else 'subscribed'
+            self.imports.append(len(data_dicts))
+            for data_dict in data_dicts:
+                self.recipients[status].append(dict(data_dict, idRecipient=1000 + len(self.recipients[status])))
+            if self.import_id is None:
+                return None
+            self.import_id += 1
+            return self.import_id
+        if call.path.startswith('/Console/Import/'):
+            return {'Completed': True}
+        return super(CreateRecipientsTest, self).respond(call)
+
+    def get_data_dicts(self, emails):
+        return [{'Email': email, 'Name': email.split('@')[0], 'idList': 1} for email in emails]
+
+    def test_chunks(self):
+        emails = ['n{}@b.it'.format(i) for i in range(25)]
+        result = self.get_provider().create_recipients(self.get_data_dicts(emails), chunk_size=10)
+        self.assertEqual(self.imports, [10, 10, 5])
+        self.assertEqual(result['import_ids'], [11, 12, 13])
+        self.assertEqual([recipient.email for recipient in result['created']], emails)
+        self.assertEqual(result['existing'], [])
+        # ids are set only waiting for the imports
+        self.assertIsNone(result['created'][0].id)
+
+    def test_chunk_size_configuration(self):
+        emails = ['n{}@b.it'.format(i) for i in range(7)]
+        self.get_provider(MAILUP_IMPORT_CHUNK_SIZE=3).create_recipients(self.get_data_dicts(emails))
+        self.assertEqual(self.imports, [3, 3, 1])
+
+    def test_existing(self):
+        emails = ['r1@b.it', 'new@b.it', 'NEW@b.it', 'u@b.it']
+        result = self.get_provider().create_recipients(self.get_data_dicts(emails))
+        self.assertEqual(self.imports, [1])
+        self.assertEqual([recipient.email for recipient in result['created']], ['new@b.it'])
+        self.assertEqual([recipient.email for recipient in result['existing']], ['r1@b.it', 'NEW@b.it', 'U@b.it'])
+        self.assertEqual(result['existing'][2].status, 'unsubscribed')
+
+    def test_wait_import(self):
+        result = self.get_provider().create_recipients(
+            self.get_data_dicts(['n1@b.it', 'n2@b.it']), confirm_email=True, wait_import=True,
+        )
+        self.assertEqual([recipient.id for recipient in result['created']], [1002, 1003])
+        self.assertEqual(result['created'][0].status, 'pending')
+        self.assertEqual(len(self.transport.get_calls('/Console/Import/11')), 1)
+
+    def test_nothing_to_create(self):
+        result = self.get_provider().create_recipients(self.get_data_dicts(['r1@b.it']), wait_import=True)
+        self.assertEqual(self.imports, [])
+        self.assertEqual(result['import_ids'], [])
+
+    def test_no_import_id(self):
+        self.import_id = None
+        with self.assertRaises(exceptions.MailUpCallError):
+            self.get_provider().create_recipients(self.get_data_dicts(['n1@b.it']))
+
+
+class RawTest(ProviderTestCase):
+
+    def setUp(self):
+        super(RawTest, self).setUp()
+        self.recipients['subscribed'] = [{'idRecipient': 1, 'Email': 'a@b.it', 'Name': 'A'}]
+        self.recipients['pending'] = [{'idRecipient': 2, 'Email': 'p@b.it', 'Name': 'P'}]
+
+    def respond(self, call):
+        if call.path == '/Console/User/Lists':
+            return paginated([{'idList': 1, 'Name': 'List'}], call.params)
+        if call.path == '/Console/List/1/Tags':
+            return paginated([{'Id': 4, 'Name': 'Tag', 'Enabled': True}], call.params)
+        return super(RawTest, self).respond(call)
+
+    def test_recipients(self):
+        provider = self.get_provider()
+        data_dicts = provider.all_recipients(1, raw=True)
+        self.assertEqual(data_dicts, [
+            {'idRecipient': 1, 'Email': 'a@b.it', 'Name': 'A', 'idList': 1},
+            {'idRecipient': 2, 'Email': 'p@b.it', 'Name': 'P', 'idList': 1},
+        ])
+        self.assertEqual(provider.all_recipients(1, parallel=True, raw=True), data_dicts)
+        recipients = provider.all_recipients(1)
+        self.assertEqual([recipient.data_dict for recipient in recipients], data_dicts)
+        self.assertEqual([recipient.status for recipient in recipients], ['subscribed', 'pending'])
+
+    def test_lists_and_tags(self):
+        provider = self.get_provider()
+        self.assertEqual(provider.all_lists(raw=True), [{'idList': 1, 'Name': 'List'}])
+        self.assertEqual(provider.all_tags(1, raw=True), [{'Id': 4, 'Name': 'Tag', 'Enabled': True, 'idList': 1}])
+        tag = provider.all_tags(1)[0]
+        self.assertEqual((tag.id, tag.list_id), (4, 1))
@@ -0,0 +1,95 @@
+# coding: utf-8
+import time
+import unittest
+from email.utils import formatdate
+
+from mailup import exceptions
+from mailup.retries import RetryPolicy
+
+from stubs import StubClientTestCase
+from stubs import StubResponse
+
+
+class RetryPolicyTest(unittest.TestCase):
+
+    def test_is_retryable(self):
+        policy = RetryPolicy()
+        self.assertTrue(policy.is_retryable('POST', 429))
+        self.assertTrue(policy.is_retryable('POST', 403))
+        self.assertTrue(policy.is_retryable('GET', 503))
+        self.assertFalse(policy.is_retryable('POST', 503))
+        self.assertTrue(policy.is_retryable('POST', 503, safe=True))
+        self.assertFalse(policy.is_retryable('GET', 404))
+        # no response: the request may have been executed
+        self.assertTrue(policy.is_retryable('put'))
+        self.assertFalse(policy.is_retryable('POST'))
+
+    def test_backoff(self):
+        policy = RetryPolicy(backoff_base=2, backoff_cap=10, jitter=False)
+        self.assertEqual([policy.get_backoff(attempt) for attempt in range(1, 6)], [2, 4, 8, 10, 10])
+
+    def test_jitter(self):
+        policy = RetryPolicy(backoff_base=2, backoff_cap=10)
+        for attempt in range(1, 6):
+            self.assertTrue(0 <= policy.get_backoff(attempt) <= min(10, 2 ** attempt))
+
+    def test_retry_after_seconds(self):
+        policy = RetryPolicy(jitter=False)
+        self.assertEqual(policy.get_backoff(1, StubResponse(429, headers={'Retry-After': '7'})), 7)
+        self.assertEqual(policy.get_backoff(1, StubResponse(429, headers={'Retry-After': 'soon'})), 2)
+        self.assertEqual(policy.get_backoff(1, StubResponse(429)), 2)
+
+    def test_retry_after_date(self):
+        policy = RetryPolicy(jitter=False)
+        response = StubResponse(503, headers={'Retry-After': formatdate(time.time() + 30, usegmt=True)})
+        self.assertTrue(28 <= policy.get_backoff(1, response) <= 30)
+        response = StubResponse(503, headers={'Retry-After': formatdate(time.time() - 30, usegmt=True)})
+        self.assertEqual(policy.get_backoff(1, response), 0)
+
+    def test_retry_after_ignored(self):
+        policy = RetryPolicy(jitter=False, respect_retry_after=False)
+        self.assertEqual(policy.get_backoff(1, StubResponse(429, headers={'Retry-After': '7'})), 2)
+
+
+class ClientRetryTest(StubClientTestCase):
+
+    def setUp(self):
+        super(ClientRetryTest, self).setUp()
+        self.statuses = []
+
+    def respond(self, call):
+        if self.statuses:
+            return StubResponse(self.statuses.pop(0), {'error': 'x'}, headers={'Retry-After': '0'})
+        return {'ok': True}
+
+    def test_throttled_call_repeated(self):
+        self.statuses = [429, 429]
+        client = self.get_client()
+        self.assertEqual(client.create_tag(1, 'tag'), {'ok': True})
+        self.assertEqual(len(self.transport.calls), 3)
+
+    def test_post_not_repeated(self):
+        self.statuses = [503]
+        client = self.get_client()
+        self.assertIsNone(client.create_tag(1, 'tag'))
+        self.assertEqual(len(self.transport.calls), 1)
+
+    def test_get_repeated(self):
+        self.statuses = [503, 502]
+        client = self.get_client()
+        self.assertEqual(client.read_authentication_info(), {'ok': True})
+        self.assertEqual(len(self.transport.calls), 3)
+
+    def test_attempts(self):
+        self.statuses = [429] * 5
+        client = self.get_client(MAILUP_CLIENT_ATTEMPTS=3)
+        with self.assertRaises(exceptions.MailUpCallError) as context:
+            client.read_authentication_info(raise_errors=True)
+        self.assertEqual(context.exception.status_code, 429)
+        self.assertEqual(len(self.transport.calls), 3)
+
+    def test_not_found(self):
+        self.statuses = [404]
+        client = self.get_client()
+        self.assertIsNone(client.read_authentication_info())
+        self.assertEqual(len(self.transport.calls), 1)
@@ -0,0 +1,52 @@
+# coding: utf-8
+import unittest
+
+from mailup.transports import MailUpTransport
+
+from stubs import StubClientTestCase
+
+
+class MailUpTransportTest(unittest.TestCase):
+
+    def test_session_reused(self):
+        transport = MailUpTransport(pool_connections=2, pool_maxsize=5)
+        session = transport.session
+        self.assertIs(transport.session, session)
+        adapter = session.get_adapter('https://services.mailup.com')
+        self.assertEqual(adapter._pool_maxsize, 5)
+        self.assertEqual(adapter.max_retries.total, 0)
+
+    def test_session_rebuilt_after_fork(self):
+        transport = MailUpTransport()
+        session = transport.session
+        transport._pid = -1  # session built by another process
+        self.assertIsNot(transport.session, session)
+
+    def test_close(self):
+        transport = MailUpTransport()
+        session = transport.session
+        transport.close()
+        self.assertIsNot(transport.session, session)
+
+    def test_keep_alive(self):
+        self.assertEqual(MailUpTransport().session.headers['Connection'], 'keep-alive')
+        self.assertEqual(MailUpTransport(keep_alive=False).session.headers['Connection'], 'close')
+
+    def test_timeout(self):
+        transport = MailUpTransport(connect_timeout=3, read_timeout=30)
+        self.assertEqual(transport.get_timeout(), (3, 30))
+        self.assertEqual(transport.get_timeout(10), (3, 10))
+        self.assertEqual(MailUpTransport(read_timeout=30).get_timeout(), (30, 30))
+
+
+class ClientTransportTest(StubClientTestCase):
+
+    def respond(self, call):
+        return {'Items': [], 'TotalElementsCount': 0, 'PageNumber': 0, 'PageSize': 50}
+
+    def test_calls_use_transport(self):
+        with self.get_client() as client:
+            client.read_lists()
+            client.read_groups(1)
+        self.assertEqual([call.path for call in self.transport.calls], ['/Console/User/Lists', '/Console/List/1/Groups'])
+        self.assertTrue(self.transport.closed)
@@ -0,0 +1,64 @@
+# coding: utf-8
+from mailup import exceptions
+from mailup.components import Group
+from mailup.components import List
+from mailup.utils import check_object_exist
+
+from stubs import StubClientTestCase
+from stubs import paginated
+
+
+class TrustIdsTest(StubClientTestCase):
+
+    def respond(self, call):
+        if call.path == '/Console/List/1/Groups':
+            groups = [{'idGroup': 3, 'idList': 1, 'Name': 'Group'}]
+            return paginated([group for group in groups if 'idGroup==3' in call.params['filterby']], call.params)
+        if call.path.endswith('/Send'):
+            return {'Sent': 3}
+        return super(TrustIdsTest, self).respond(call)
+
+    def get_group(self, client, group_id=3, list_id=1):
+        return Group.from_mailup({'idGroup': group_id, 'idList': list_id, 'Name': 'Group'}, client=client)
+
+    def test_checked(self):
+        client = self.get_client()
+        check_object_exist(self.get_group(client), client)
+        self.assertEqual(len(self.transport.calls), 1)
+        with self.assertRaises(exceptions.GroupNotFoundException):
+            check_object_exist(self.get_group(client, group_id=4), client)
+
+    def test_trusted(self):
+        client = self.get_client()
+        check_object_exist(self.get_group(client, group_id=4), client, trust_ids=True)
+        self.assertEqual(self.transport.calls, [])
+
+    def test_trusted_configuration(self):
+        client = self.get_client(MAILUP_TRUST_IDS=True)
+        check_object_exist(self.get_group(client, group_id=4), client)
+        self.assertEqual(self.transport.calls, [])
+        check_object_exist(List.from_mailup({'idList': 1, 'Name': 'List'}, client=client), client)
+        self.assertEqual(self.transport.calls, [])
+
+    def test_missing_ids(self):
+        # without ids the components are not on MailUp, even if ids are trusted
+        client = self.get_client(MAILUP_TRUST_IDS=True)
+        with self.assertRaises(exceptions.GroupNotFoundException):
+            check_object_exist(self.get_group(client, group_id=None), client)
+        with self.assertRaises(exceptions.ListNotFoundException):
+            check_object_exist(List.from_mailup({'Name': 'List'}, client=client), client)
+        with self.assertRaises(exceptions.ListNotSpecifiedException):
+            check_object_exist(self.get_group(client, list_id=None), client)
+        self.assertEqual(self.transport.calls, [])
+
+    def test_send_message(self):
+        client = self.get_client()
+        group = self.get_group(client)
+        self.assertEqual(group.send_message(7, trust_ids=True), {'Sent': 3})
+        # the message is not read before sending it
+        self.assertEqual([call.path for call in self.transport.calls], ['/Console/Group/3/Email/7/Send'])
+        with self.assertRaises(exceptions.MessageNotFoundException):
+            group.send_message(None, trust_ids=True)
+        with self.assertRaises(exceptions.GroupNotFoundException):
+            self.get_group(client, group_id=None).send_message(7, trust_ids=True)
+        self.assertEqual(len(self.transport.calls), 1)